@@ -0,0 +1,71 @@
+import argparse
+import copy
+import time
+import numpy as np
+
+from e2e_ad.config import DISTANCES_PATH
+from e2e_ad.data.detection_batch import DetectionBatch
+from e2e_ad.data.metrics_loader import MetricsLoader
+from e2e_ad.data.sensor_data import SensorData
+from e2e_ad.detection.distance_estimator import DistanceEstimator
+from e2e_ad.navigation.reactive_behavior_strategy import ReactiveBehaviorStrategy
+from e2e_ad.processing.cascade_processor import CascadeProcessor
+from e2e_ad.tracking.deepsort_tracker import DeepSortTracker
+
+FRAME_WIDTH, FRAME_HEIGHT = 640, 360
+
+def make_frames(count, objects, labels, seed):
+    """Synthetic per-frame detection dicts of slowly moving objects."""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(40, 600, size=(objects, 2))
+    sizes = rng.uniform(10, 150, size=(objects, 2))
+    object_labels = rng.choice(labels, size=objects)
+    frames = []
+    for _ in range(count):
+        centers += rng.normal(0, 3, size=centers.shape)
+        boxes = np.concatenate([centers - sizes / 2, centers + sizes / 2], axis=1)
+        frames.append([{"label": str(object_labels[i]), "bbox": boxes[i].tolist(), "confidence": float(rng.uniform(0.3, 1.0)),
+                        "camera_width": FRAME_WIDTH, "camera_height": FRAME_HEIGHT} for i in range(objects)])
+    return frames
+
+def run(frames, metrics, to_input):
+    """Distance estimation, tracking and both cheap decisions per frame; returns the outputs and ms per frame."""
+    estimator = DistanceEstimator(metrics)
+    tracker = DeepSortTracker()
+    strategy = ReactiveBehaviorStrategy()
+    cascade = CascadeProcessor([], None)
+    inputs = [to_input(detections) for detections in frames]
+    outputs = []
+    start = time.perf_counter()
+    for detections in inputs:
+        detections = estimator.process_detections(detections)
+        detections = tracker.update(detections, "left")
+        sensor_data = SensorData(left_detections=detections, right_detections=detections)
+        outputs.append((detections, strategy.decide(sensor_data), cascade._cheap_decision(sensor_data)))
+    return outputs, (time.perf_counter() - start) / len(frames) * 1000
+
+def main():
+    """
+    Compare detection dicts with DetectionBatch through distance estimation, tracking and the decisions.
+
+        python benchmark_detection_batch.py --objects 5 20 100
+    """
+    parser = argparse.ArgumentParser(description="Benchmark detection dicts against DetectionBatch.")
+    parser.add_argument("--objects", type=int, nargs="+", default=[5, 20, 100, 300], help="Detections per frame (default: %(default)s)")
+    parser.add_argument("-n", "--frames", type=int, default=200, help="Frames per run (default: %(default)s)")
+    args = parser.parse_args()
+
+    metrics = MetricsLoader(DISTANCES_PATH).load_metrics()
+    print(f"{'objects':>8} {'dicts ms':>9} {'batch ms':>9} {'speedup':>8}  identical")
+    for objects in args.objects:
+        frames = make_frames(args.frames, objects, sorted(metrics), seed=objects)
+        expected, dict_ms = run(frames, metrics, copy.deepcopy)
+        actual, batch_ms = run(frames, metrics, DetectionBatch.from_dicts)
+        identical = all(
+            batch.to_dicts() == dicts and batch_decision == dict_decision and batch_cascade == dict_cascade
+            for (dicts, dict_decision, dict_cascade), (batch, batch_decision, batch_cascade) in zip(expected, actual)
+        )
+        print(f"{objects:>8} {dict_ms:>9.3f} {batch_ms:>9.3f} {dict_ms / batch_ms:>7.1f}x  {identical}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import argparse
+import time
+
+from e2e_ad.config import CROP_PATH, STEREO_SYNC_TOLERANCE, VLM_INPUT_SIZE, MODEL_PATH, DISTANCES_PATH
+from e2e_ad.config import YOLO_NUM_THREADS, YOLO_INT8, YOLO_COLUMNAR
+from e2e_ad.camera.replay_capture import ReplayCapture, REPLAY_MODES
+from e2e_ad.camera.stereo_synchronizer import StereoSynchronizer
+from e2e_ad.camera.frame_cropper_factory import create_frame_cropper, CROPPER_BACKENDS
+from e2e_ad.data.sensor_data_hub import SensorDataHub
+from e2e_ad.visualizing.frame_visualizer import FrameVisualizer
+from e2e_ad.processing.processing_pipeline_manager import ProcessingPipelineManager
+from e2e_ad.processing.visualizing_processor import VisualizingProcessor
+from e2e_ad.processing.vlm_detection_processor import VmlDetectionProcessor
+from e2e_ad.processing.cascade_processor import CascadeProcessor
+from e2e_ad.processing.detection_processor import DetectionProcessor
+from e2e_ad.processing.distance_estimation_processor import DistanceEstimationProcessor
+from e2e_ad.data.metrics_loader import MetricsLoader
+from e2e_ad.detection.distance_estimator import DistanceEstimator
+from e2e_ad.detection.vlm_detector2 import VlmDetector2, STEREO_LAYOUTS
+from e2e_ad.navigation.reactive_behavior_strategy import ReactiveBehaviorStrategy
+from e2e_ad.navigation.vlm_behavior_strategy import VlmBehaviorStrategy
+
+STRATEGIES = {
+    "reactive": ReactiveBehaviorStrategy,
+    "vlm": VlmBehaviorStrategy,
+}
+
+def build_pipeline(args, sensor_data_hub):
+    """Create the processing pipeline that is benchmarked, plus the VLM stage if one is requested."""
+    processing_pipeline_manager = ProcessingPipelineManager(sensor_data_hub)
+    vlm_processor = None
+    if args.vlm != "none":
+        vlm_detector = VlmDetector2(args.model, stereo_layout=args.vlm_layout, streaming=args.stream)
+        vlm_detector.warm_up()
+        # Synchronous, so the process time contains the full VLM round trip
+        vlm_processor = VmlDetectionProcessor(vlm_detector, stereo=args.vlm == "stereo")
+        if args.cascade:
+            from e2e_ad.detection.yolo_detector import YoloDetector
+            metrics = MetricsLoader(DISTANCES_PATH).load_metrics()
+            cheap_modules = [
+                DetectionProcessor(YoloDetector(args.yolo_model, num_threads=args.yolo_threads, int8=args.yolo_int8, columnar=args.yolo_columnar)),
+                DistanceEstimationProcessor(DistanceEstimator(metrics)),
+            ]
+            processing_pipeline_manager.register_module(CascadeProcessor(cheap_modules, vlm_processor))
+        else:
+            processing_pipeline_manager.register_module(vlm_processor)
+    processing_pipeline_manager.register_module(VisualizingProcessor(FrameVisualizer()))
+    return processing_pipeline_manager, vlm_processor
+
+def run_benchmark(args):
+    capture = ReplayCapture(args.session, mode=args.mode, fps=args.fps)
+    synchronizer = StereoSynchronizer.from_capture(capture, tolerance=args.tolerance)
+    cropper = create_frame_cropper(args.crop_path, backend=args.cropper, model_input_size=VLM_INPUT_SIZE)
+    sensor_data_hub = SensorDataHub()
+    processing_pipeline_manager, vlm_processor = build_pipeline(args, sensor_data_hub)
+    strategy = STRATEGIES[args.strategy]()
+
+    crop_time = 0.0
+    process_time = 0.0
+    decide_time = 0.0
+    frame_count = 0
+    crop_failures = 0
+
+    capture.start()
+    start = end = time.perf_counter()
+    while True:
+        pair = synchronizer.wait_for_pair(timeout=0.5)
+        if pair is None:
+            if capture.finished.is_set():
+                break
+            continue
+        left_entry, right_entry = pair
+
+        t0 = time.perf_counter()
+        if vlm_processor is not None:
+            left_buffer, right_buffer, left_input, right_input = cropper.crop_frames_with_model_input(
+                left_entry.frame, right_entry.frame, capture.pool
+            )
+        else:
+            left_buffer, right_buffer = cropper.crop_frames_pooled(left_entry.frame, right_entry.frame, capture.pool)
+            left_input = right_input = None
+        left_entry.release()
+        right_entry.release()
+        if left_buffer is None or right_buffer is None:
+            crop_failures += 1
+            continue
+        t1 = time.perf_counter()
+        inputs = [buffer for buffer in (left_input, right_input) if buffer is not None]
+        sensor_data = processing_pipeline_manager.process_and_update(
+            left_buffer.array, right_buffer.array,
+            left_input.array if left_input is not None else None,
+            right_input.array if right_input is not None else None,
+            buffers=[left_buffer, right_buffer] + inputs, timestamp=left_entry.timestamp
+        )
+        t2 = time.perf_counter()
+        strategy.decide(sensor_data)
+        t3 = time.perf_counter()
+
+        crop_time += t1 - t0
+        process_time += t2 - t1
+        decide_time += t3 - t2
+        frame_count += 1
+        end = t3
+        if args.max_frames and frame_count >= args.max_frames:
+            break
+    # Measure up to the last processed frame, not the final idle wait.
+    elapsed = max(end - start, 1e-9)
+    capture.stop()
+
+    print(f"Frames processed: {frame_count} in {elapsed:.2f}s ({frame_count / elapsed:.1f} FPS)")
+    if crop_failures:
+        print(f"  [Warning] {crop_failures} frame pairs skipped because cropping failed")
+    if frame_count:
+        print(f"  crop:    {crop_time / frame_count * 1000:.2f} ms/frame")
+        print(f"  process: {process_time / frame_count * 1000:.2f} ms/frame")
+        print(f"  decide:  {decide_time / frame_count * 1000:.2f} ms/frame")
+    print(f"Capture stats: {capture.get_stats()}")
+    print(f"Stereo sync stats: {synchronizer.get_stats()}")
+    if vlm_processor is not None:
+        for module in processing_pipeline_manager.processing_modules:
+            if isinstance(module, CascadeProcessor):
+                print(f"Cascade stats: {module.get_stats()}")
+        print(f"VLM ({args.vlm}) stats: {vlm_processor.detector.get_stats()}")
+        vlm_processor.detector.cleanup()
+
+def main():
+    """
+    Replay a recorded stereo session through the processing pipeline and report throughput.
+
+        python benchmark_pipeline.py -s recordings/session01 --mode fast
+        python benchmark_pipeline.py -s recordings/session01 --strategy vlm --vlm stereo --max-frames 50
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the processing pipeline on a recorded session.")
+    parser.add_argument("-s", "--session", required=True, help="Recorded session directory")
+    parser.add_argument("--mode", default="fast", choices=REPLAY_MODES, help="Replay timing (default: %(default)s)")
+    parser.add_argument("--fps", type=float, default=None, help="Playback rate for --mode fixed")
+    parser.add_argument("--strategy", default="reactive", choices=sorted(STRATEGIES), help="Navigation strategy (default: %(default)s)")
+    parser.add_argument("--tolerance", type=float, default=STEREO_SYNC_TOLERANCE, help="Stereo sync tolerance in seconds")
+    parser.add_argument("--crop-path", default=CROP_PATH, help="Crop calibration file")
+    parser.add_argument("--cropper", default="auto", choices=["auto"] + list(CROPPER_BACKENDS), help="Cropper backend (default: %(default)s)")
+    parser.add_argument("--vlm", default="none", choices=["none", "mono", "stereo"], help="VLM stage: off, left camera only, or both cameras in one request (default: %(default)s)")
+    parser.add_argument("--vlm-layout", default="side_by_side", choices=STEREO_LAYOUTS, help="How --vlm stereo combines the views (default: %(default)s)")
+    parser.add_argument("--model", default="moondream", help="Ollama model for --vlm (default: %(default)s)")
+    parser.add_argument("--stream", action="store_true", help="Stream VLM answers and stop at the first command")
+    parser.add_argument("--cascade", action="store_true", help="Run YOLO + distance estimation first and escalate to the VLM only when inconclusive")
+    parser.add_argument("--yolo-model", default=MODEL_PATH, help="YOLO model for --cascade (default: %(default)s)")
+    parser.add_argument("--yolo-threads", type=int, default=YOLO_NUM_THREADS, help="ONNX Runtime threads for an .onnx --yolo-model (default: all cores)")
+    parser.add_argument("--yolo-int8", action="store_true", default=YOLO_INT8, help="Quantize an .onnx --yolo-model to int8 weights")
+    parser.add_argument("--yolo-columnar", action="store_true", default=YOLO_COLUMNAR, help="Pass detections as DetectionBatch instead of dicts")
+    parser.add_argument("--max-frames", type=int, default=0, help="Stop after this many frames (0 = whole session)")
+    args = parser.parse_args()
+    run_benchmark(args)
+
+if __name__ == "__main__":
+    main()
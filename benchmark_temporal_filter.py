@@ -0,0 +1,121 @@
+import argparse
+import copy
+import time
+import numpy as np
+
+from e2e_ad.detection.temporal_filter import TemporalConsistencyFilter
+
+LABELS = ["robot", "wall", "box", "chair"]
+
+class LoopFilter:
+    """The per-detection loop filter YoloDetector used before, kept as the reference."""
+    def __init__(self, detection_memory_size=5, memory_threshold=2, iou_threshold=0.3):
+        self.detection_history = {}
+        self.detection_memory_size = detection_memory_size
+        self.memory_threshold = memory_threshold
+        self.iou_threshold = iou_threshold
+
+    @staticmethod
+    def compute_iou(bbox1, bbox2):
+        x_left = max(bbox1[0], bbox2[0])
+        y_top = max(bbox1[1], bbox2[1])
+        x_right = min(bbox1[2], bbox2[2])
+        y_bottom = min(bbox1[3], bbox2[3])
+        if x_right < x_left or y_bottom < y_top:
+            return 0.0
+        intersection_area = (x_right - x_left) * (y_bottom - y_top)
+        area1 = (bbox1[2] - bbox1[0]) * (bbox1[3] - bbox1[1])
+        area2 = (bbox2[2] - bbox2[0]) * (bbox2[3] - bbox2[1])
+        union_area = area1 + area2 - intersection_area
+        if union_area == 0:
+            return 0.0
+        return intersection_area / union_area
+
+    def smooth_box_size(self, detection, history):
+        x1, y1, x2, y2 = detection["bbox"]
+        center = [(x1 + x2) / 2, (y1 + y2) / 2]
+        widths = []
+        heights = []
+        for frame in history:
+            for det in frame:
+                if det["label"] == detection["label"]:
+                    if self.compute_iou(detection["bbox"], det["bbox"]) >= self.iou_threshold:
+                        widths.append(det["bbox"][2] - det["bbox"][0])
+                        heights.append(det["bbox"][3] - det["bbox"][1])
+                        break
+        if widths and heights:
+            avg_width = sum(widths) / len(widths)
+            avg_height = sum(heights) / len(heights)
+            return [center[0] - avg_width / 2, center[1] - avg_height / 2,
+                    center[0] + avg_width / 2, center[1] + avg_height / 2]
+        return detection["bbox"]
+
+    def filter(self, camera_id, current_detections):
+        history = self.detection_history.setdefault(camera_id, [])
+        history.append(current_detections)
+        if len(history) > self.detection_memory_size:
+            history.pop(0)
+        if len(history) < self.detection_memory_size:
+            return current_detections
+        filtered_detections = []
+        for det in current_detections:
+            consistent_count = 0
+            for past_frame in history[:-1]:
+                for past_det in past_frame:
+                    if past_det["label"] == det["label"]:
+                        if self.compute_iou(det["bbox"], past_det["bbox"]) >= self.iou_threshold:
+                            consistent_count += 1
+                            break
+            if consistent_count >= self.memory_threshold:
+                det["bbox"] = self.smooth_box_size(det, history)
+                filtered_detections.append(det)
+        return filtered_detections
+
+def make_frames(count, detections, seed):
+    """Synthetic detections that drift and jitter between frames, with some dropping in and out."""
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(50, 590, size=(detections, 2))
+    sizes = rng.uniform(20, 120, size=(detections, 2))
+    labels = rng.integers(len(LABELS), size=detections)
+    frames = []
+    for _ in range(count):
+        centers += rng.normal(0, 4, size=centers.shape)
+        jittered = sizes * rng.uniform(0.85, 1.15, size=sizes.shape)
+        visible = rng.random(detections) > 0.15
+        boxes = np.concatenate([centers - jittered / 2, centers + jittered / 2], axis=1).astype(np.float32)
+        frames.append([{"label": LABELS[labels[i]], "bbox": boxes[i].tolist(), "confidence": 0.9}
+                       for i in np.flatnonzero(visible)])
+    return frames
+
+def run(filter, frames):
+    """Filter all frames of one camera and return the outputs and the mean time per frame in ms."""
+    outputs = []
+    start = time.perf_counter()
+    for detections in frames:
+        outputs.append(filter.filter("left", detections))
+    return outputs, (time.perf_counter() - start) / len(frames) * 1000
+
+def main():
+    """
+    Compare the reference loop with TemporalConsistencyFilter on synthetic detections (its own
+    per-detection loop up to SMALL_FRAME_SIZE detections per frame, IoU matrices above).
+
+        python benchmark_temporal_filter.py --detections 5 20 50 --depths 5 10 20
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the YOLO temporal consistency filter.")
+    parser.add_argument("--detections", type=int, nargs="+", default=[5, 20, 50], help="Detections per frame (default: %(default)s)")
+    parser.add_argument("--depths", type=int, nargs="+", default=[5, 10, 20], help="History depths (default: %(default)s)")
+    parser.add_argument("-n", "--frames", type=int, default=200, help="Frames per run (default: %(default)s)")
+    parser.add_argument("--threshold", type=int, default=2, help="Memory threshold (default: %(default)s)")
+    args = parser.parse_args()
+
+    print(f"{'detections':>10} {'depth':>5} {'loop ms':>9} {'filter ms':>9} {'speedup':>8}  identical")
+    for detections in args.detections:
+        for depth in args.depths:
+            frames = make_frames(args.frames, detections, seed=detections * 1000 + depth)
+            expected, loop_ms = run(LoopFilter(depth, args.threshold), copy.deepcopy(frames))
+            actual, filter_ms = run(TemporalConsistencyFilter(depth, args.threshold), copy.deepcopy(frames))
+            print(f"{detections:>10} {depth:>5} {loop_ms:>9.3f} {filter_ms:>9.3f} {loop_ms / filter_ms:>7.1f}x  {expected == actual}")
+
+if __name__ == "__main__":
+    main()
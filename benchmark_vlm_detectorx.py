@@ -0,0 +1,54 @@
+import argparse
+import sys
+import cv2
+import numpy as np
+
+from e2e_ad.data.sensor_data import SensorData
+from e2e_ad.detection.vlm_detectorx import VlmDetector2
+
+def run(detector, frame, iterations, warmup):
+    """Run the detector on the same frame and return the per-call query latencies in ms."""
+    for _ in range(warmup):
+        detector.process(SensorData(left_frame=frame))
+    latencies = []
+    for _ in range(iterations):
+        calls, call_time = detector.call_count, detector.call_time
+        detector.process(SensorData(left_frame=frame))
+        if detector.call_count > calls:
+            latencies.append((detector.call_time - call_time) * 1000)
+    return latencies
+
+def main():
+    """
+    Compare the per-call latency of the transformers Moondream detector with the compacted and the
+    original navigation prompt, both with the same answer settings.
+
+        python benchmark_vlm_detectorx.py -i image1.jpg -n 30
+        python benchmark_vlm_detectorx.py -i image1.jpg -n 30 --greedy
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the in-process Moondream detector.")
+    parser.add_argument("-i", "--image", default="image1.jpg", help="Input image (default: %(default)s)")
+    parser.add_argument("-n", "--iterations", type=int, default=30, help="Calls per mode (default: %(default)s)")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed calls per mode (default: %(default)s)")
+    parser.add_argument("--greedy", action="store_true", help="Answer greedily with capped answer tokens in both modes")
+    args = parser.parse_args()
+
+    frame = cv2.imread(args.image)
+    if frame is None:
+        print(f"Error: Could not read image {args.image}", file=sys.stderr)
+        sys.exit(1)
+
+    detector = VlmDetector2(greedy_answer=args.greedy)
+    for compact_prompt in (False, True):
+        detector.compact_prompt = compact_prompt
+        latencies = run(detector, frame, args.iterations, args.warmup)
+        if not latencies:
+            print(f"compact_prompt={compact_prompt}: no successful calls")
+            continue
+        print(f"compact_prompt={compact_prompt}: mean {np.mean(latencies):.1f} ms, "
+              f"p50 {np.percentile(latencies, 50):.1f} ms, p95 {np.percentile(latencies, 95):.1f} ms "
+              f"over {len(latencies)} calls")
+    detector.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import sys
+import time
+import cv2
+
+from e2e_ad.config import MODEL_PATH
+from e2e_ad.detection.yolo_detector import YoloDetector
+
+def run(detect, frames, camera_ids, iterations, warmup):
+    """Call detect(frames, camera_ids) repeatedly and return the camera frames processed per second."""
+    for _ in range(warmup):
+        detect(frames, camera_ids)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        detect(frames, camera_ids)
+    return iterations * len(frames) / (time.perf_counter() - start)
+
+def detect_serial(detector):
+    return lambda frames, camera_ids: [detector.detect(frame, camera_id) for frame, camera_id in zip(frames, camera_ids)]
+
+def main():
+    """
+    Compare serial per-camera YOLO calls with one batched call for 1..N cameras.
+
+        python benchmark_yolo_batch.py -i image1.jpg --cameras 4 --model yolo11n.pt
+    """
+    parser = argparse.ArgumentParser(description="Benchmark batched YOLO inference over several cameras.")
+    parser.add_argument("-i", "--image", default="image1.jpg", help="Frame used for every camera (default: %(default)s)")
+    parser.add_argument("--model", default=MODEL_PATH, help="YOLO model; needs a dynamic batch size to batch (default: %(default)s)")
+    parser.add_argument("--cameras", type=int, default=2, help="Maximum number of cameras (default: %(default)s)")
+    parser.add_argument("-n", "--iterations", type=int, default=50, help="Timed calls per mode (default: %(default)s)")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed calls per mode (default: %(default)s)")
+    args = parser.parse_args()
+
+    frame = cv2.imread(args.image)
+    if frame is None:
+        print(f"Error: Could not read image {args.image}", file=sys.stderr)
+        sys.exit(1)
+
+    detector = YoloDetector(args.model)
+    for cameras in range(1, args.cameras + 1):
+        frames = [frame.copy() for _ in range(cameras)]
+        camera_ids = [f"camera{i}" for i in range(cameras)]
+        serial = run(detect_serial(detector), frames, camera_ids, args.iterations, args.warmup)
+        batched = run(detector.detect_batch, frames, camera_ids, args.iterations, args.warmup)
+        print(f"{cameras} camera(s): serial {serial:.1f} frames/s, batched {batched:.1f} frames/s "
+              f"({batched / serial:.2f}x){'' if detector.batch_supported else ' [model does not batch]'}")
+
+if __name__ == "__main__":
+    main()
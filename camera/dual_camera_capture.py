@@ -2,11 +2,18 @@ import cv2
 import time
 import threading
 import os
+from e2e_ad.camera.frame_buffer_pool import FrameBufferPool
+from e2e_ad.camera.frame_ring_buffer import FrameRingBuffer
+from e2e_ad.data.sensor_data import SensorData
 
 class DualCameraCapture:
-    def __init__(self, stream1_url, stream2_url):
+    def __init__(self, stream1_url, stream2_url, buffer_size=4, pool=None):
         self.stream_urls = [stream1_url, stream2_url]
         self.frames = {i: None for i in range(2)}
+        # Per-camera history of timestamped, sequence-numbered frames
+        self.buffers = {i: FrameRingBuffer(buffer_size) for i in range(2)}
+        # Frames are decoded straight into pooled arrays instead of being allocated and copied
+        self.pool = pool or FrameBufferPool()
         self.running = True
         self.threads = []
         
@@ -57,16 +64,70 @@ class DualCameraCapture:
             print(f"Failed to open camera {cam_index} stream after 3 attempts. Shutting down.")
             os._exit(1)
 
+        frame_shape = None
         while self.running:
-            ret, frame = cap.read()
+            buffer = self.pool.acquire(frame_shape) if frame_shape is not None else None
+            ret, frame = cap.read(buffer.array) if buffer is not None else cap.read()
             if ret:
-                # Save a copy of the raw frame
-                self.frames[cam_index] = frame.copy()
+                if buffer is None or frame is not buffer.array:
+                    # First frame or resolution change: OpenCV allocated a new array
+                    if buffer is not None:
+                        buffer.release()
+                    buffer = self.pool.adopt(frame)
+                    frame_shape = frame.shape
+                self.frames[cam_index] = frame
+                # The ring buffer takes over our reference and releases it once overwritten
+                self.buffers[cam_index].put(frame, buffer=buffer)
             else:
+                if buffer is not None:
+                    buffer.release()
                 print(f"Failed to grab frame from cam{cam_index}")
                 time.sleep(0.1)
         cap.release()
 
+    def wait_for_frames(self, last_sequences, timeout=None):
+        """
+        Block until every camera has a frame newer than the given sequence numbers.
+
+        :param last_sequences: Dict mapping camera index to the last processed sequence number.
+        :param timeout: Maximum total time to wait in seconds, None waits forever.
+        :return: Dict mapping camera index to TimestampedFrame, or None on timeout or stop.
+                 The caller must release() every returned frame when done with it.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for cam_index, buffer in self.buffers.items():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if buffer.wait_for_newer(last_sequences.get(cam_index, 0), remaining, consume=False) is None:
+                return None
+        # Only mark frames as consumed once every camera has delivered a new one.
+        return {cam_index: buffer.consume_latest(retain=True) for cam_index, buffer in self.buffers.items()}
+
+    def acquire_latest(self):
+        """
+        Return the newest frame of every camera as a SensorData with the pooled buffers retained,
+        so they cannot be recycled while in use (e.g. on screen). Call release() on it when done.
+
+        :return: SensorData with left_frame/right_frame set, or None if any camera has no frame yet.
+        """
+        entries = []
+        for buffer in self.buffers.values():
+            entry = buffer.latest()
+            # The entry may have been overwritten and recycled since latest() returned it
+            if entry is None or not entry.try_retain():
+                for retained in entries:
+                    retained.release()
+                return None
+            entries.append(entry)
+        left, right = entries
+        return SensorData(left_frame=left.frame, right_frame=right.frame, timestamp=left.timestamp,
+                          buffers=[entry.buffer for entry in entries if entry.buffer is not None])
+
+    def get_stats(self):
+        """Return captured/dropped/duplicate frame counts per camera."""
+        stats = {cam_index: buffer.get_stats() for cam_index, buffer in self.buffers.items()}
+        stats["pool"] = self.pool.get_stats()
+        return stats
+
     def start(self):
         for i in range(len(self.stream_urls)):
             thread = threading.Thread(target=self.capture_frames, args=(i,), daemon=True)
@@ -75,5 +136,7 @@ class DualCameraCapture:
 
     def stop(self):
         self.running = False
+        for buffer in self.buffers.values():
+            buffer.close()
         for thread in self.threads:
             thread.join()
\ No newline at end of file
@@ -0,0 +1,106 @@
+import threading
+from collections import defaultdict
+from typing import Tuple
+import numpy as np
+
+class PooledFrame:
+    def __init__(self, pool: "FrameBufferPool", array: np.ndarray):
+        """A reference-counted array that returns to its pool when the last reference is released.
+
+        Args:
+            pool (FrameBufferPool): Pool that owns the array
+            array (np.ndarray): Backing array
+        """
+        self.pool = pool
+        self.array = array
+        self.generation = 0  # Incremented every time the buffer is handed out again
+        self._refcount = 0
+
+    @property
+    def refcount(self) -> int:
+        with self.pool._lock:
+            return self._refcount
+
+    def retain(self) -> "PooledFrame":
+        """Add a reference. Only valid while the caller already holds one."""
+        with self.pool._lock:
+            if self._refcount <= 0:
+                raise RuntimeError("Cannot retain a frame buffer that was already returned to the pool")
+            self._refcount += 1
+        return self
+
+    def try_retain(self, generation: int) -> bool:
+        """Add a reference if the buffer still holds the contents of the given generation."""
+        with self.pool._lock:
+            if self._refcount <= 0 or self.generation != generation:
+                return False
+            self._refcount += 1
+            return True
+
+    def release(self):
+        """Drop a reference; the last release hands the buffer back to the pool."""
+        with self.pool._lock:
+            if self._refcount <= 0:
+                raise RuntimeError("Frame buffer released more often than retained")
+            self._refcount -= 1
+            if self._refcount == 0:
+                self.pool._recycle(self)
+
+class FrameBufferPool:
+    def __init__(self, max_free_per_shape: int = 16):
+        """Pool of reusable frame arrays, keyed by shape and dtype.
+
+        Args:
+            max_free_per_shape (int): Maximum number of idle buffers kept per shape/dtype,
+                buffers beyond that are left to the garbage collector
+        """
+        self.max_free_per_shape = max_free_per_shape
+        self._lock = threading.RLock()
+        self._free = defaultdict(list)
+
+        # Statistics
+        self.allocated_count = 0
+        self.reused_count = 0
+        self.in_use_count = 0
+
+    def acquire(self, shape: Tuple[int, ...], dtype=np.uint8) -> PooledFrame:
+        """Return a buffer with one reference held by the caller. Contents are undefined."""
+        key = (tuple(shape), np.dtype(dtype))
+        with self._lock:
+            free = self._free[key]
+            if free:
+                buffer = free.pop()
+                self.reused_count += 1
+            else:
+                buffer = PooledFrame(self, np.empty(key[0], dtype=key[1]))
+                self.allocated_count += 1
+            buffer.generation += 1
+            buffer._refcount = 1
+            self.in_use_count += 1
+            return buffer
+
+    def adopt(self, array: np.ndarray) -> PooledFrame:
+        """Wrap an array allocated elsewhere so it is recycled through the pool."""
+        with self._lock:
+            buffer = PooledFrame(self, array)
+            buffer.generation = 1
+            buffer._refcount = 1
+            self.allocated_count += 1
+            self.in_use_count += 1
+            return buffer
+
+    def _recycle(self, buffer: PooledFrame):
+        # Called with self._lock held by PooledFrame.release()
+        self.in_use_count -= 1
+        free = self._free[(buffer.array.shape, buffer.array.dtype)]
+        if len(free) < self.max_free_per_shape:
+            free.append(buffer)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "allocated": self.allocated_count,
+                "reused": self.reused_count,
+                "in_use": self.in_use_count,
+                "free": sum(len(free) for free in self._free.values()),
+            }
@@ -1,17 +1,30 @@
 import json
+import cv2
 import numpy as np
 import threading
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Sequence
 
 class FrameCropper:
-    def __init__(self, crop_path: str):
+    def __init__(self, crop_path: str, model_input_size: Optional[Tuple[int, int]] = None,
+                 normalize: bool = False, mean: Sequence[float] = (0.0, 0.0, 0.0),
+                 std: Sequence[float] = (1.0, 1.0, 1.0)):
         """Initialize the FrameCropper with optimized parameters.
         
         Args:
             crop_path (str): Path to the JSON configuration file
+            model_input_size (Optional[Tuple[int, int]]): (width, height) of the model input
+                produced by crop_frames_for_model, defaults to the crop size
+            normalize (bool): Produce float32 (x / 255 - mean) / std instead of uint8
+            mean (Sequence[float]): Per-channel RGB mean used when normalizing
+            std (Sequence[float]): Per-channel RGB standard deviation used when normalizing
         """
         self.config = self._load_config(crop_path)
         self._lock = threading.Lock()
+        self.model_input_size = model_input_size or (self.config["crop_width"], self.config["crop_height"])
+        self.normalize = normalize
+        # (x / 255 - mean) / std == x * scale - offset
+        self._scale = (1.0 / (255.0 * np.asarray(std, dtype=np.float32))).astype(np.float32)
+        self._offset = (np.asarray(mean, dtype=np.float32) / np.asarray(std, dtype=np.float32)).astype(np.float32)
         
         # Pre-calculate slicing indices for better performance
         self.left_slice = np.s_[
@@ -26,6 +39,12 @@ class FrameCropper:
         # Pre-allocate memory for output frames
         self.left_output = None
         self.right_output = None
+
+        # Reusable model input buffers (uint8 RGB, plus float32 when normalizing)
+        self.left_model_output = None
+        self.right_model_output = None
+        self.left_model_normalized = None
+        self.right_model_normalized = None
         
     def _load_config(self, config_path: str) -> dict:
         """Load cropping parameters from a JSON file."""
@@ -70,8 +89,136 @@ class FrameCropper:
                 print(f"Error during frame cropping: {e}")
                 return None, None
     
+    def crop_frames_pooled(self, left_frame: np.ndarray, right_frame: np.ndarray, pool) -> Tuple[Optional[object], Optional[object]]:
+        """Crop frames into buffers taken from a FrameBufferPool.
+
+        Unlike crop_frames, every call returns fresh buffers that stay valid until the
+        last consumer releases them, so the results can be shared across threads.
+        
+        Args:
+            left_frame (np.ndarray): Left camera frame
+            right_frame (np.ndarray): Right camera frame
+            pool (FrameBufferPool): Pool to take the output buffers from
+            
+        Returns:
+            Tuple[Optional[PooledFrame], Optional[PooledFrame]]: Cropped frames, each holding
+            one reference owned by the caller
+        """
+        if left_frame is None or right_frame is None:
+            return None, None
+
+        shape = (self.config["crop_height"], self.config["crop_width"], left_frame.shape[2])
+        left_buffer = pool.acquire(shape, left_frame.dtype)
+        right_buffer = pool.acquire(shape, right_frame.dtype)
+        try:
+            np.copyto(left_buffer.array, left_frame[self.left_slice])
+            np.copyto(right_buffer.array, right_frame[self.right_slice])
+            return left_buffer, right_buffer
+        except Exception as e:
+            print(f"Error during frame cropping: {e}")
+            left_buffer.release()
+            right_buffer.release()
+            return None, None
+
+    def _to_model_input(self, view: np.ndarray, output: np.ndarray, normalized: Optional[np.ndarray]) -> np.ndarray:
+        """Resize a crop view straight into the model buffer and convert it to RGB in place."""
+        cv2.resize(view, self.model_input_size, dst=output, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(output, cv2.COLOR_BGR2RGB, dst=output)
+        if normalized is None:
+            return output
+        np.multiply(output, self._scale, out=normalized)
+        np.subtract(normalized, self._offset, out=normalized)
+        return normalized
+
+    def crop_frames_with_model_input(self, left_frame: np.ndarray, right_frame: np.ndarray, pool) -> Tuple[Optional[object], ...]:
+        """Crop frames and derive the model inputs from those crops, all into pooled buffers.
+
+        The raw frames are read only once; the model inputs are resized from the small,
+        contiguous cropped buffers instead of a second pass over the raw frames. Like the
+        crops, the model inputs stay valid until their last reference is released.
+        
+        Args:
+            left_frame (np.ndarray): Left camera frame (BGR)
+            right_frame (np.ndarray): Right camera frame (BGR)
+            pool (FrameBufferPool): Pool to take the output buffers from
+            
+        Returns:
+            Tuple[Optional[PooledFrame], ...]: (left crop, right crop, left model input, right model input),
+            each holding one reference owned by the caller; the model inputs are None if preparing them failed
+        """
+        left_buffer, right_buffer = self.crop_frames_pooled(left_frame, right_frame, pool)
+        if left_buffer is None or right_buffer is None:
+            return None, None, None, None
+
+        left_input, right_input = self._acquire_model_buffers(pool)
+        with self._lock:
+            try:
+                self._allocate_model_outputs()
+                if self.normalize:
+                    # The uint8 buffers are only scratch space for the resize
+                    self._to_model_input(left_buffer.array, self.left_model_output, left_input.array)
+                    self._to_model_input(right_buffer.array, self.right_model_output, right_input.array)
+                else:
+                    self._to_model_input(left_buffer.array, left_input.array, None)
+                    self._to_model_input(right_buffer.array, right_input.array, None)
+                return left_buffer, right_buffer, left_input, right_input
+
+            except Exception as e:
+                print(f"Error during model input preparation: {e}")
+                left_input.release()
+                right_input.release()
+                return left_buffer, right_buffer, None, None
+
+    def _acquire_model_buffers(self, pool) -> Tuple[object, object]:
+        """Take a left and right model input buffer (RGB uint8, or float32 when normalizing) from the pool."""
+        width, height = self.model_input_size
+        dtype = np.float32 if self.normalize else np.uint8
+        return pool.acquire((height, width, 3), dtype), pool.acquire((height, width, 3), dtype)
+
+    def _allocate_model_outputs(self):
+        """Allocate the reusable model input buffers on first use."""
+        if self.left_model_output is None:
+            width, height = self.model_input_size
+            self.left_model_output = np.empty((height, width, 3), dtype=np.uint8)
+            self.right_model_output = np.empty_like(self.left_model_output)
+            if self.normalize:
+                self.left_model_normalized = np.empty((height, width, 3), dtype=np.float32)
+                self.right_model_normalized = np.empty_like(self.left_model_normalized)
+
+    def crop_frames_for_model(self, left_frame: np.ndarray, right_frame: np.ndarray) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Crop, resize and convert frames to model-ready RGB arrays in a single pass.
+
+        The crop is never copied: the source view is resized directly into reusable
+        output buffers, so the returned arrays are overwritten by the next call.
+        
+        Args:
+            left_frame (np.ndarray): Left camera frame (BGR)
+            right_frame (np.ndarray): Right camera frame (BGR)
+            
+        Returns:
+            Tuple[Optional[np.ndarray], Optional[np.ndarray]]: HxWx3 RGB uint8 arrays, or
+            float32 arrays when normalization is enabled
+        """
+        if left_frame is None or right_frame is None:
+            return None, None
+
+        with self._lock:
+            try:
+                self._allocate_model_outputs()
+                left_input = self._to_model_input(left_frame[self.left_slice], self.left_model_output, self.left_model_normalized)
+                right_input = self._to_model_input(right_frame[self.right_slice], self.right_model_output, self.right_model_normalized)
+                return left_input, right_input
+
+            except Exception as e:
+                print(f"Error during model input preparation: {e}")
+                return None, None
+
     def cleanup(self):
         """Release resources."""
         with self._lock:
             self.left_output = None
             self.right_output = None
+            self.left_model_output = None
+            self.right_model_output = None
+            self.left_model_normalized = None
+            self.right_model_normalized = None
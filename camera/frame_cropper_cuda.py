@@ -2,18 +2,38 @@ import json
 import cv2
 import numpy as np
 import threading
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Sequence
 
 class FrameCropper:
-    def __init__(self, crop_path: str):
+    def __init__(self, crop_path: str, model_input_size: Optional[Tuple[int, int]] = None,
+                 normalize: bool = False, mean: Sequence[float] = (0.0, 0.0, 0.0),
+                 std: Sequence[float] = (1.0, 1.0, 1.0)):
         """Initialize the FrameCropper with a configuration file path and GPU resources.
         
         Args:
             crop_path (str): Path to the JSON configuration file containing cropping parameters
+            model_input_size (Optional[Tuple[int, int]]): (width, height) of the model input
+                produced by crop_frames_for_model, defaults to the crop size
+            normalize (bool): Produce float32 (x / 255 - mean) / std instead of uint8
+            mean (Sequence[float]): Per-channel RGB mean used when normalizing
+            std (Sequence[float]): Per-channel RGB standard deviation used when normalizing
         """
         self.config = self._load_config(crop_path)
         self.cuda_stream = cv2.cuda.Stream()
         self._lock = threading.Lock()
+        self.model_input_size = model_input_size or (self.config["crop_width"], self.config["crop_height"])
+        self.normalize = normalize
+        # (x / 255 - mean) / std == x * scale - offset
+        self._scale = (1.0 / (255.0 * np.asarray(std, dtype=np.float32))).astype(np.float32)
+        self._offset = (np.asarray(mean, dtype=np.float32) / np.asarray(std, dtype=np.float32)).astype(np.float32)
+
+        # Reusable GPU and host buffers for the model inputs
+        self.left_model_gpu = cv2.cuda_GpuMat()
+        self.right_model_gpu = cv2.cuda_GpuMat()
+        self.left_model_output = None
+        self.right_model_output = None
+        self.left_model_normalized = None
+        self.right_model_normalized = None
         
         # Pre-allocate GPU memory for input frames
         self.left_gpu = cv2.cuda_GpuMat()
@@ -81,9 +101,159 @@ class FrameCropper:
                 print(f"CUDA error during frame cropping: {e}")
                 return None, None
     
+    def crop_frames_pooled(self, left_frame: np.ndarray, right_frame: np.ndarray, pool) -> Tuple[Optional[object], Optional[object]]:
+        """Crop frames on the GPU and download them into buffers taken from a FrameBufferPool.
+        
+        Args:
+            left_frame (np.ndarray): Left camera frame
+            right_frame (np.ndarray): Right camera frame
+            pool (FrameBufferPool): Pool to take the output buffers from
+            
+        Returns:
+            Tuple[Optional[PooledFrame], Optional[PooledFrame]]: Cropped frames, each holding
+            one reference owned by the caller
+        """
+        if left_frame is None or right_frame is None:
+            return None, None
+
+        shape = (self.config["crop_height"], self.config["crop_width"], left_frame.shape[2])
+        left_buffer = pool.acquire(shape, left_frame.dtype)
+        right_buffer = pool.acquire(shape, right_frame.dtype)
+        with self._lock:
+            try:
+                self.left_gpu.upload(left_frame, self.cuda_stream)
+                self.right_gpu.upload(right_frame, self.cuda_stream)
+                self.left_gpu.roi(*self.left_roi).download(self.cuda_stream, left_buffer.array)
+                self.right_gpu.roi(*self.right_roi).download(self.cuda_stream, right_buffer.array)
+                self.cuda_stream.waitForCompletion()
+                return left_buffer, right_buffer
+
+            except cv2.error as e:
+                print(f"CUDA error during frame cropping: {e}")
+                left_buffer.release()
+                right_buffer.release()
+                return None, None
+
+    def _to_model_input(self, roi_gpu, model_gpu, output: np.ndarray, normalized: Optional[np.ndarray]) -> np.ndarray:
+        """Resize a GPU ROI and convert it to RGB on the device, then download into a reusable buffer."""
+        resized = cv2.cuda.resize(roi_gpu, self.model_input_size, interpolation=cv2.INTER_AREA, stream=self.cuda_stream)
+        cv2.cuda.cvtColor(resized, cv2.COLOR_BGR2RGB, dst=model_gpu, stream=self.cuda_stream)
+        model_gpu.download(self.cuda_stream, output)
+        return output
+
+    def crop_frames_for_model(self, left_frame: np.ndarray, right_frame: np.ndarray) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Crop, resize and convert frames to model-ready RGB arrays on the GPU.
+
+        The returned arrays are reusable buffers that are overwritten by the next call.
+        
+        Args:
+            left_frame (np.ndarray): Left camera frame (BGR)
+            right_frame (np.ndarray): Right camera frame (BGR)
+            
+        Returns:
+            Tuple[Optional[np.ndarray], Optional[np.ndarray]]: HxWx3 RGB uint8 arrays, or
+            float32 arrays when normalization is enabled
+        """
+        if left_frame is None or right_frame is None:
+            return None, None
+
+        with self._lock:
+            try:
+                if self.left_model_output is None:
+                    width, height = self.model_input_size
+                    self.left_model_output = np.empty((height, width, 3), dtype=np.uint8)
+                    self.right_model_output = np.empty_like(self.left_model_output)
+                    if self.normalize:
+                        self.left_model_normalized = np.empty((height, width, 3), dtype=np.float32)
+                        self.right_model_normalized = np.empty_like(self.left_model_normalized)
+
+                self.left_gpu.upload(left_frame, self.cuda_stream)
+                self.right_gpu.upload(right_frame, self.cuda_stream)
+                return self._model_inputs_from_gpu(
+                    (self.left_model_output, self.right_model_output),
+                    (self.left_model_normalized, self.right_model_normalized),
+                )
+
+            except cv2.error as e:
+                print(f"CUDA error during model input preparation: {e}")
+                return None, None
+
+    def _model_inputs_from_gpu(self, outputs, normalized) -> Tuple[np.ndarray, np.ndarray]:
+        """Build both model inputs from the frames already uploaded to left_gpu/right_gpu and wait for the stream.
+
+        Args:
+            outputs (Tuple[np.ndarray, np.ndarray]): Left/right uint8 RGB download targets
+            normalized (Tuple[Optional[np.ndarray], Optional[np.ndarray]]): Left/right float32 targets
+                when normalizing, the uint8 outputs are then only scratch space
+        """
+        left_input = self._to_model_input(self.left_gpu.roi(*self.left_roi), self.left_model_gpu, outputs[0], None)
+        right_input = self._to_model_input(self.right_gpu.roi(*self.right_roi), self.right_model_gpu, outputs[1], None)
+        self.cuda_stream.waitForCompletion()
+
+        if self.normalize:
+            # Normalizing the already downscaled image on the host is cheap
+            for output, target in ((left_input, normalized[0]), (right_input, normalized[1])):
+                np.multiply(output, self._scale, out=target)
+                np.subtract(target, self._offset, out=target)
+            return normalized
+        return left_input, right_input
+
+    def crop_frames_with_model_input(self, left_frame: np.ndarray, right_frame: np.ndarray, pool) -> Tuple[Optional[object], ...]:
+        """Crop frames and prepare the model inputs from a single upload of each frame.
+
+        Both the pooled crops and the pooled model inputs are produced from the same GPU
+        copies, with one stream synchronization per pair.
+        
+        Args:
+            left_frame (np.ndarray): Left camera frame (BGR)
+            right_frame (np.ndarray): Right camera frame (BGR)
+            pool (FrameBufferPool): Pool to take the output buffers from
+            
+        Returns:
+            Tuple[Optional[PooledFrame], ...]: (left crop, right crop, left model input, right model input),
+            each holding one reference owned by the caller
+        """
+        if left_frame is None or right_frame is None:
+            return None, None, None, None
+
+        width, height = self.model_input_size
+        shape = (self.config["crop_height"], self.config["crop_width"], left_frame.shape[2])
+        buffers = [
+            pool.acquire(shape, left_frame.dtype),
+            pool.acquire(shape, right_frame.dtype),
+            pool.acquire((height, width, 3), np.float32 if self.normalize else np.uint8),
+            pool.acquire((height, width, 3), np.float32 if self.normalize else np.uint8),
+        ]
+        left_buffer, right_buffer, left_input, right_input = buffers
+        with self._lock:
+            try:
+                if self.normalize and self.left_model_output is None:
+                    # uint8 scratch space for the downloads before normalizing
+                    self.left_model_output = np.empty((height, width, 3), dtype=np.uint8)
+                    self.right_model_output = np.empty_like(self.left_model_output)
+
+                self.left_gpu.upload(left_frame, self.cuda_stream)
+                self.right_gpu.upload(right_frame, self.cuda_stream)
+                self.left_gpu.roi(*self.left_roi).download(self.cuda_stream, left_buffer.array)
+                self.right_gpu.roi(*self.right_roi).download(self.cuda_stream, right_buffer.array)
+                if self.normalize:
+                    self._model_inputs_from_gpu((self.left_model_output, self.right_model_output),
+                                                (left_input.array, right_input.array))
+                else:
+                    self._model_inputs_from_gpu((left_input.array, right_input.array), (None, None))
+                return left_buffer, right_buffer, left_input, right_input
+
+            except cv2.error as e:
+                print(f"CUDA error during frame cropping: {e}")
+                for buffer in buffers:
+                    buffer.release()
+                return None, None, None, None
+
     def cleanup(self):
         """Release GPU resources."""
         with self._lock:
             self.left_gpu.release()
             self.right_gpu.release()
+            self.left_model_gpu.release()
+            self.right_model_gpu.release()
             # The cuda_stream is automatically released when the object is destroyed
@@ -0,0 +1,103 @@
+import importlib
+import json
+import time
+import numpy as np
+from e2e_ad.camera.frame_buffer_pool import FrameBufferPool
+
+# Backend name -> module providing a FrameCropper class
+CROPPER_BACKENDS = {
+    "numpy": "e2e_ad.camera.frame_cropper",
+    "cuda": "e2e_ad.camera.frame_cropper_cuda",
+    "pytorch": "e2e_ad.camera.frame_cropper_pytorch",
+}
+
+def _backend_available(name):
+    """Check whether a cropper backend can run on this machine without importing it eagerly."""
+    try:
+        if name == "numpy":
+            return True
+        if name == "cuda":
+            import cv2
+            return hasattr(cv2, "cuda") and cv2.cuda.getCudaEnabledDeviceCount() > 0
+        if name == "pytorch":
+            import torch
+            # On CPU the PyTorch backend only adds host-to-host copies
+            return torch.cuda.is_available()
+    except Exception as e:
+        print(f"[Warning] Cropper backend '{name}' unavailable: {e}", flush=True)
+    return False
+
+def available_backends():
+    """Return the names of all cropper backends usable on this machine."""
+    return [name for name in CROPPER_BACKENDS if _backend_available(name)]
+
+def _load_backend(name):
+    return importlib.import_module(CROPPER_BACKENDS[name]).FrameCropper
+
+def benchmark_cropper(cropper, frame_shape, iterations=20, warmup=3):
+    """
+    Measure the per-pair time of the cropping work done in the frame processing loop
+    (pooled crop plus model input preparation).
+
+    :return: Median time per frame pair in seconds.
+    """
+    left_frame = np.random.randint(0, 256, frame_shape, dtype=np.uint8)
+    right_frame = np.random.randint(0, 256, frame_shape, dtype=np.uint8)
+    pool = FrameBufferPool()
+    timings = []
+    for i in range(warmup + iterations):
+        start = time.perf_counter()
+        buffers = cropper.crop_frames_with_model_input(left_frame, right_frame, pool)
+        elapsed = time.perf_counter() - start
+        if any(buffer is None for buffer in buffers):
+            raise RuntimeError("cropper returned no frames")
+        for buffer in buffers:
+            buffer.release()
+        if i >= warmup:
+            timings.append(elapsed)
+    return float(np.median(timings))
+
+def create_frame_cropper(crop_path, backend="auto", iterations=20, **kwargs):
+    """
+    Create a FrameCropper for the given backend, or pick the fastest available one.
+
+    With backend='auto' every available backend is micro-benchmarked on the configured crop
+    size and the fastest is returned. The NumPy backend is always available, so machines
+    without a GPU fall back to it.
+
+    :param crop_path: Path to the crop calibration JSON file.
+    :param backend: 'auto', 'numpy', 'cuda' or 'pytorch'.
+    :param iterations: Number of timed iterations per backend when benchmarking.
+    :param kwargs: Passed on to the FrameCropper constructor (e.g. model_input_size).
+    :return: A FrameCropper instance.
+    """
+    if backend != "auto":
+        if backend not in CROPPER_BACKENDS:
+            raise ValueError(f"Unknown cropper backend '{backend}', expected one of {', '.join(CROPPER_BACKENDS)}")
+        return _load_backend(backend)(crop_path, **kwargs)
+
+    with open(crop_path, "r") as f:
+        config = json.load(f)
+    frame_shape = (config["original_height"], config["original_width"], 3)
+
+    best_name, best_cropper, best_time = None, None, None
+    for name in available_backends():
+        try:
+            cropper = _load_backend(name)(crop_path, **kwargs)
+            elapsed = benchmark_cropper(cropper, frame_shape, iterations)
+        except Exception as e:
+            print(f"[Warning] Cropper backend '{name}' failed during benchmark: {e}", flush=True)
+            continue
+        print(f"Cropper backend '{name}': {elapsed * 1000:.2f} ms per frame pair", flush=True)
+        if best_time is None or elapsed < best_time:
+            if best_cropper is not None:
+                best_cropper.cleanup()
+            best_name, best_cropper, best_time = name, cropper, elapsed
+        else:
+            cropper.cleanup()
+
+    if best_cropper is None:
+        # Should not happen, NumPy is always available; let any error surface here.
+        return _load_backend("numpy")(crop_path, **kwargs)
+    print(f"Using cropper backend '{best_name}'", flush=True)
+    return best_cropper
@@ -1,20 +1,29 @@
 import json
 import numpy as np
 import torch
+import torch.nn.functional as F
 import threading
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Sequence
 
 class FrameCropper:
-    def __init__(self, crop_path: str):
+    def __init__(self, crop_path: str, model_input_size: Optional[Tuple[int, int]] = None,
+                 normalize: bool = False, mean: Sequence[float] = (0.0, 0.0, 0.0),
+                 std: Sequence[float] = (1.0, 1.0, 1.0)):
         """Initialize the FrameCropper with PyTorch GPU support.
         
         Args:
             crop_path (str): Path to the JSON configuration file
+            model_input_size (Optional[Tuple[int, int]]): (width, height) of the model input
+                produced by crop_frames_for_model, defaults to the crop size
+            normalize (bool): Produce float32 (x / 255 - mean) / std instead of uint8
+            mean (Sequence[float]): Per-channel RGB mean used when normalizing
+            std (Sequence[float]): Per-channel RGB standard deviation used when normalizing
         """
 
         print(f"CUDA available: {torch.cuda.is_available()}", flush=True)
-        print(f"Current device: {torch.cuda.current_device()}", flush=True)
-        print(f"Device name: {torch.cuda.get_device_name(0)}", flush=True)
+        if torch.cuda.is_available():
+            print(f"Current device: {torch.cuda.current_device()}", flush=True)
+            print(f"Device name: {torch.cuda.get_device_name(0)}", flush=True)
 
         self.config = self._load_config(crop_path)
         self._lock = threading.Lock()
@@ -22,6 +31,15 @@ class FrameCropper:
         # Set up CUDA device if available
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         print(f"Using device: {self.device}")
+
+        self.model_input_size = model_input_size or (self.config["crop_width"], self.config["crop_height"])
+        self.normalize = normalize
+        self._mean = torch.tensor(mean, dtype=torch.float32, device=self.device).view(1, 3, 1, 1)
+        self._std = torch.tensor(std, dtype=torch.float32, device=self.device).view(1, 3, 1, 1)
+
+        # Reusable host buffers for the model inputs (pinned for faster device-to-host copies)
+        self.left_model_output = None
+        self.right_model_output = None
         
         # Pre-calculate slicing indices
         self.left_slice = (
@@ -85,7 +103,136 @@ class FrameCropper:
                 print(f"Error during frame cropping: {e}")
                 return None, None
     
+    def crop_frames_pooled(self, left_frame: np.ndarray, right_frame: np.ndarray, pool) -> Tuple[Optional[object], Optional[object]]:
+        """Crop frames on the GPU and download them into buffers taken from a FrameBufferPool.
+        
+        Args:
+            left_frame (np.ndarray): Left camera frame
+            right_frame (np.ndarray): Right camera frame
+            pool (FrameBufferPool): Pool to take the output buffers from
+            
+        Returns:
+            Tuple[Optional[PooledFrame], Optional[PooledFrame]]: Cropped frames, each holding
+            one reference owned by the caller
+        """
+        if left_frame is None or right_frame is None:
+            return None, None
+
+        shape = (self.config["crop_height"], self.config["crop_width"], left_frame.shape[2])
+        left_buffer = pool.acquire(shape, left_frame.dtype)
+        right_buffer = pool.acquire(shape, right_frame.dtype)
+        with self._lock:
+            try:
+                torch.from_numpy(left_buffer.array).copy_(self._frame_to_tensor(left_frame)[self.left_slice])
+                torch.from_numpy(right_buffer.array).copy_(self._frame_to_tensor(right_frame)[self.right_slice])
+                return left_buffer, right_buffer
+
+            except Exception as e:
+                print(f"Error during frame cropping: {e}")
+                left_buffer.release()
+                right_buffer.release()
+                return None, None
+
+    def _to_model_input(self, tensor: torch.Tensor, output: torch.Tensor) -> np.ndarray:
+        """Resize, convert BGR to RGB and optionally normalize a cropped HWC tensor on the device."""
+        width, height = self.model_input_size
+        batch = tensor.permute(2, 0, 1).unsqueeze(0).float()
+        batch = F.interpolate(batch, size=(height, width), mode="bilinear", align_corners=False, antialias=True)
+        batch = batch.flip(1)  # BGR -> RGB
+        if self.normalize:
+            batch = (batch / 255.0 - self._mean) / self._std
+        else:
+            batch = batch.round_().clamp_(0, 255).to(torch.uint8)
+        output.copy_(batch[0].permute(1, 2, 0))
+        return output.numpy()
+
+    def crop_frames_with_model_input(self, left_frame: np.ndarray, right_frame: np.ndarray, pool) -> Tuple[Optional[object], ...]:
+        """Crop frames and prepare the model inputs from a single upload of each frame.
+
+        Each frame is uploaded once; the cropped view on the device is downloaded into a
+        pooled buffer and also resized into a pooled model input buffer.
+        
+        Args:
+            left_frame (np.ndarray): Left camera frame (BGR)
+            right_frame (np.ndarray): Right camera frame (BGR)
+            pool (FrameBufferPool): Pool to take the output buffers from
+            
+        Returns:
+            Tuple[Optional[PooledFrame], ...]: (left crop, right crop, left model input, right model input),
+            each holding one reference owned by the caller; the model inputs are None if preparing them failed
+        """
+        if left_frame is None or right_frame is None:
+            return None, None, None, None
+
+        shape = (self.config["crop_height"], self.config["crop_width"], left_frame.shape[2])
+        left_buffer = pool.acquire(shape, left_frame.dtype)
+        right_buffer = pool.acquire(shape, right_frame.dtype)
+        with self._lock:
+            try:
+                left_cropped = self._frame_to_tensor(left_frame)[self.left_slice]
+                right_cropped = self._frame_to_tensor(right_frame)[self.right_slice]
+                torch.from_numpy(left_buffer.array).copy_(left_cropped)
+                torch.from_numpy(right_buffer.array).copy_(right_cropped)
+            except Exception as e:
+                print(f"Error during frame cropping: {e}")
+                left_buffer.release()
+                right_buffer.release()
+                return None, None, None, None
+
+            width, height = self.model_input_size
+            dtype = np.float32 if self.normalize else np.uint8
+            left_input = pool.acquire((height, width, 3), dtype)
+            right_input = pool.acquire((height, width, 3), dtype)
+            try:
+                self._to_model_input(left_cropped, torch.from_numpy(left_input.array))
+                self._to_model_input(right_cropped, torch.from_numpy(right_input.array))
+                return left_buffer, right_buffer, left_input, right_input
+
+            except Exception as e:
+                print(f"Error during model input preparation: {e}")
+                left_input.release()
+                right_input.release()
+                return left_buffer, right_buffer, None, None
+
+    def _allocate_model_outputs(self):
+        """Allocate the reusable host buffers for the model inputs on first use."""
+        if self.left_model_output is None:
+            width, height = self.model_input_size
+            dtype = torch.float32 if self.normalize else torch.uint8
+            pin = self.device.type == "cuda"
+            self.left_model_output = torch.empty((height, width, 3), dtype=dtype, pin_memory=pin)
+            self.right_model_output = torch.empty((height, width, 3), dtype=dtype, pin_memory=pin)
+
+    def crop_frames_for_model(self, left_frame: np.ndarray, right_frame: np.ndarray) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Crop, resize and convert frames to model-ready RGB arrays on the GPU.
+
+        The returned arrays share reusable host buffers and are overwritten by the next call.
+        
+        Args:
+            left_frame (np.ndarray): Left camera frame (BGR)
+            right_frame (np.ndarray): Right camera frame (BGR)
+            
+        Returns:
+            Tuple[Optional[np.ndarray], Optional[np.ndarray]]: HxWx3 RGB uint8 arrays, or
+            float32 arrays when normalization is enabled
+        """
+        if left_frame is None or right_frame is None:
+            return None, None
+
+        with self._lock:
+            try:
+                self._allocate_model_outputs()
+                left_input = self._to_model_input(self._frame_to_tensor(left_frame)[self.left_slice], self.left_model_output)
+                right_input = self._to_model_input(self._frame_to_tensor(right_frame)[self.right_slice], self.right_model_output)
+                return left_input, right_input
+
+            except Exception as e:
+                print(f"Error during model input preparation: {e}")
+                return None, None
+
     def cleanup(self):
         """Release GPU memory."""
         with self._lock:
+            self.left_model_output = None
+            self.right_model_output = None
             torch.cuda.empty_cache() if torch.cuda.is_available() else None
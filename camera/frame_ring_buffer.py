@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, List, Optional
+import numpy as np
+
+@dataclass
+class TimestampedFrame:
+    frame: np.ndarray
+    timestamp: float  # time.monotonic() at capture
+    sequence: int     # Per-camera, strictly increasing, starting at 1
+    buffer: Any = None  # PooledFrame backing `frame`, if it comes from a FrameBufferPool
+    generation: int = 0
+
+    def try_retain(self) -> bool:
+        """Take a reference on the pooled buffer; fails if it was already recycled."""
+        return self.buffer is None or self.buffer.try_retain(self.generation)
+
+    def release(self):
+        """Release a reference taken with try_retain() (or handed out retained)."""
+        if self.buffer is not None:
+            self.buffer.release()
+
+class FrameRingBuffer:
+    def __init__(self, capacity: int = 4):
+        """Fixed-size ring of the most recent frames of a single camera.
+
+        Args:
+            capacity (int): Number of frames kept before the oldest is overwritten
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._entries = deque(maxlen=capacity)
+        self._condition = threading.Condition()
+        self._sequence = 0
+        self._last_consumed = 0
+        self._closed = False
+
+        # Statistics
+        self.captured_count = 0
+        self.dropped_count = 0
+        self.duplicate_count = 0
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the newest frame (0 if none yet)."""
+        with self._condition:
+            return self._sequence
+
+    def put(self, frame: np.ndarray, timestamp: Optional[float] = None, buffer=None) -> TimestampedFrame:
+        """Append a frame and wake up every waiting consumer.
+
+        Args:
+            frame (np.ndarray): Captured frame
+            timestamp (Optional[float]): Capture time, defaults to time.monotonic()
+            buffer (Optional[PooledFrame]): Pooled buffer backing the frame; the ring takes over
+                the caller's reference and releases it when the frame is overwritten
+        """
+        evicted = None
+        with self._condition:
+            self._sequence += 1
+            entry = TimestampedFrame(
+                frame=frame,
+                timestamp=time.monotonic() if timestamp is None else timestamp,
+                sequence=self._sequence,
+                buffer=buffer,
+                generation=buffer.generation if buffer is not None else 0,
+            )
+            if self._closed:
+                # Nobody will consume it anymore
+                evicted = entry
+            else:
+                if len(self._entries) == self.capacity:
+                    evicted = self._entries.popleft()
+                self._entries.append(entry)
+            self.captured_count += 1
+            self._condition.notify_all()
+        if evicted is not None:
+            evicted.release()
+        return entry
+
+    def latest(self) -> Optional[TimestampedFrame]:
+        """Return the newest frame without marking it as consumed."""
+        with self._condition:
+            return self._entries[-1] if self._entries else None
+
+    def snapshot(self) -> List[TimestampedFrame]:
+        """Return the buffered frames, oldest first."""
+        with self._condition:
+            return list(self._entries)
+
+    def consume_latest(self, retain: bool = False) -> Optional[TimestampedFrame]:
+        """Return the newest frame and mark it as consumed.
+
+        Returning a frame that was already consumed counts as a duplicate.
+
+        Args:
+            retain (bool): Take a reference on the pooled buffer, the caller must release() it
+        """
+        with self._condition:
+            if not self._entries:
+                return None
+            entry = self._consume(self._entries[-1])
+            if retain:
+                # Cannot fail: the ring itself still holds a reference
+                entry.try_retain()
+            return entry
+
+    def wait_for_newer(self, sequence: int, timeout: Optional[float] = None,
+                       consume: bool = True) -> Optional[TimestampedFrame]:
+        """Block until a frame with a sequence number greater than `sequence` exists.
+
+        Args:
+            sequence (int): Last sequence number seen by the caller
+            timeout (Optional[float]): Maximum time to wait in seconds, None waits forever
+            consume (bool): Mark the returned frame as consumed
+
+        Returns:
+            Optional[TimestampedFrame]: The newest frame, or None on timeout or close
+        """
+        with self._condition:
+            ready = self._condition.wait_for(
+                lambda: self._sequence > sequence or self._closed, timeout
+            )
+            if not ready or self._closed or self._sequence <= sequence:
+                return None
+            entry = self._entries[-1]
+            return self._consume(entry) if consume else entry
+
+    def mark_consumed(self, entry: TimestampedFrame) -> TimestampedFrame:
+        """Mark a frame obtained from `latest()` or `snapshot()` as consumed."""
+        with self._condition:
+            return self._consume(entry)
+
+    def mark_dropped(self, entry: TimestampedFrame):
+        """Mark a frame (and every older one) as skipped without processing it."""
+        with self._condition:
+            if entry.sequence > self._last_consumed:
+                self.dropped_count += entry.sequence - self._last_consumed
+                self._last_consumed = entry.sequence
+                self._condition.notify_all()
+
+    def has_unconsumed(self) -> bool:
+        """Whether a frame newer than the last consumed or dropped one is buffered."""
+        with self._condition:
+            return self._sequence > self._last_consumed and not self._closed
+
+    def wait_until_consumed(self, sequence: int, timeout: Optional[float] = None) -> bool:
+        """Block until the frame with the given sequence number was consumed or dropped.
+
+        Used by producers that apply back-pressure instead of overwriting frames.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._last_consumed >= sequence or self._closed, timeout
+            )
+
+    def _consume(self, entry: TimestampedFrame) -> TimestampedFrame:
+        if entry.sequence <= self._last_consumed:
+            self.duplicate_count += 1
+        else:
+            # Every frame captured since the previous consumption was never processed.
+            self.dropped_count += entry.sequence - self._last_consumed - 1
+            self._last_consumed = entry.sequence
+            self._condition.notify_all()
+        return entry
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            return {
+                "captured": self.captured_count,
+                "dropped": self.dropped_count,
+                "duplicates": self.duplicate_count,
+                "last_sequence": self._sequence,
+            }
+
+    def close(self):
+        """Wake up all waiting consumers and release the buffered frames."""
+        with self._condition:
+            self._closed = True
+            entries = list(self._entries)
+            self._entries.clear()
+            self._condition.notify_all()
+        for entry in entries:
+            entry.release()
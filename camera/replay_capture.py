@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+import numpy as np
+from e2e_ad.camera.dual_camera_capture import DualCameraCapture
+from e2e_ad.camera.frame_buffer_pool import FrameBufferPool
+from e2e_ad.camera.frame_ring_buffer import FrameRingBuffer
+
+REPLAY_MODES = ("original", "fast", "fixed")
+
+def _frames_path(session_dir, cam_index):
+    return os.path.join(session_dir, f"cam{cam_index}_frames.npy")
+
+def _timestamps_path(session_dir, cam_index):
+    return os.path.join(session_dir, f"cam{cam_index}_timestamps.npy")
+
+def write_replay_session(session_dir, frames, timestamps):
+    """
+    Write a stereo session in the layout read by ReplayCapture.
+
+    Each camera is stored as one .npy file of shape (N, H, W, C) that can be memory-mapped,
+    plus a float64 .npy file with the N capture timestamps in seconds.
+
+    :param session_dir: Directory to write the session to (created if missing).
+    :param frames: List with one sequence of equally shaped frames per camera.
+    :param timestamps: List with one sequence of capture timestamps per camera.
+    """
+    os.makedirs(session_dir, exist_ok=True)
+    for cam_index, (cam_frames, cam_timestamps) in enumerate(zip(frames, timestamps)):
+        if len(cam_frames) != len(cam_timestamps):
+            raise ValueError(f"Camera {cam_index}: {len(cam_frames)} frames but {len(cam_timestamps)} timestamps")
+        first = np.asarray(cam_frames[0])
+        out = np.lib.format.open_memmap(
+            _frames_path(session_dir, cam_index), mode="w+",
+            dtype=first.dtype, shape=(len(cam_frames),) + first.shape
+        )
+        for i, frame in enumerate(cam_frames):
+            out[i] = frame
+        out.flush()
+        del out
+        np.save(_timestamps_path(session_dir, cam_index), np.asarray(cam_timestamps, dtype=np.float64))
+
+class ReplayCapture:
+    def __init__(self, session_dir, mode="original", fps=None, loop=False, buffer_size=4, pool=None):
+        """
+        Drop-in replacement for DualCameraCapture that plays a recorded stereo session.
+
+        :param session_dir: Directory written by write_replay_session().
+        :param mode: 'original' replays with the recorded timing, 'fast' as fast as the consumer
+                     keeps up (no frame is overwritten before it was consumed or skipped) and
+                     'fixed' at a constant rate given by fps.
+        :param fps: Playback rate for the 'fixed' mode.
+        :param loop: Restart from the beginning when the session ends.
+        :param buffer_size: Size of the per-camera ring buffers.
+        :param pool: FrameBufferPool the frames are copied into.
+        """
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode '{mode}', expected one of {', '.join(REPLAY_MODES)}")
+        if mode == "fixed" and not fps:
+            raise ValueError("The 'fixed' replay mode requires fps")
+
+        self.session_dir = session_dir
+        self.mode = mode
+        self.fps = fps
+        self.loop = loop
+
+        # Frames are memory-mapped, so only the frames actually played are paged in.
+        self.recorded_frames = []
+        self.recorded_timestamps = []
+        cam_index = 0
+        while os.path.exists(_frames_path(session_dir, cam_index)):
+            self.recorded_frames.append(np.load(_frames_path(session_dir, cam_index), mmap_mode="r"))
+            self.recorded_timestamps.append(np.load(_timestamps_path(session_dir, cam_index)))
+            cam_index += 1
+        if cam_index == 0:
+            raise FileNotFoundError(f"No recorded camera streams found in {session_dir}")
+
+        self.frames = {i: None for i in range(cam_index)}
+        self.buffers = {i: FrameRingBuffer(buffer_size) for i in range(cam_index)}
+        self.pool = pool or FrameBufferPool()
+        self.running = True
+        self.finished = threading.Event()
+        self.threads = []
+        self._schedule = self._build_schedule()
+
+    def _build_schedule(self):
+        """Return (offset_seconds, cam_index, frame_index) events in playback order."""
+        start = min(ts[0] for ts in self.recorded_timestamps if len(ts))
+        events = []
+        for cam_index, timestamps in enumerate(self.recorded_timestamps):
+            for frame_index, ts in enumerate(timestamps):
+                if self.mode == "fixed":
+                    offset = frame_index / self.fps
+                else:
+                    offset = float(ts - start)
+                events.append((offset, cam_index, frame_index))
+        events.sort()
+        return events
+
+    def _wait_for_consumer(self, cam_index):
+        """
+        Back-pressure for the 'fast' mode: wait until the previous frame was taken.
+
+        A stereo consumer only takes frames once every camera has a new one, so the wait ends as
+        soon as another camera has no unconsumed frame left. The frame is then added next to the
+        previous one instead (the ring buffer keeps both), e.g. while one camera runs ahead
+        because of a start offset or a dropped frame.
+        """
+        buffer = self.buffers[cam_index]
+        previous = buffer.sequence
+        others = [other for index, other in self.buffers.items() if index != cam_index]
+        while self.running and all(other.has_unconsumed() for other in others):
+            if buffer.wait_until_consumed(previous, timeout=0.01):
+                return
+
+    def playback(self):
+        while self.running:
+            start = time.monotonic()
+            for offset, cam_index, frame_index in self._schedule:
+                if not self.running:
+                    break
+                if self.mode == "fast":
+                    self._wait_for_consumer(cam_index)
+                else:
+                    delay = start + offset - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                # Memory-mapped read into a pooled array; the ring buffer releases it once overwritten.
+                recorded = self.recorded_frames[cam_index][frame_index]
+                buffer = self.pool.acquire(recorded.shape, recorded.dtype)
+                np.copyto(buffer.array, recorded)
+                self.frames[cam_index] = buffer.array
+                self.buffers[cam_index].put(buffer.array, timestamp=start + offset, buffer=buffer)
+            if not self.loop:
+                break
+        self.finished.set()
+
+    def wait_finished(self, timeout=None):
+        """Block until the session has been played completely."""
+        return self.finished.wait(timeout)
+
+    # Consumers use the same blocking API as with live cameras.
+    wait_for_frames = DualCameraCapture.wait_for_frames
+    get_stats = DualCameraCapture.get_stats
+
+    def start(self):
+        thread = threading.Thread(target=self.playback, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def stop(self):
+        self.running = False
+        for buffer in self.buffers.values():
+            buffer.close()
+        for thread in self.threads:
+            thread.join()
@@ -0,0 +1,108 @@
+import threading
+import time
+from typing import Optional, Tuple
+from e2e_ad.camera.frame_ring_buffer import FrameRingBuffer, TimestampedFrame
+
+class StereoSynchronizer:
+    def __init__(self, left_buffer: FrameRingBuffer, right_buffer: FrameRingBuffer, tolerance: float = 0.015):
+        """Pair left and right frames by nearest capture timestamp.
+
+        Args:
+            left_buffer (FrameRingBuffer): Ring buffer of the left camera
+            right_buffer (FrameRingBuffer): Ring buffer of the right camera
+            tolerance (float): Maximum allowed skew between paired frames in seconds
+        """
+        self.left_buffer = left_buffer
+        self.right_buffer = right_buffer
+        self.tolerance = tolerance
+        self._lock = threading.Lock()
+        self._last_left = 0
+        self._last_right = 0
+
+        # Statistics
+        self.pair_count = 0
+        self.unmatched_count = 0
+        self.skew_sum = 0.0
+        self.max_skew = 0.0
+        self.last_skew = None
+
+    @classmethod
+    def from_capture(cls, capture, tolerance: float = 0.015) -> "StereoSynchronizer":
+        """Create a synchronizer for the two buffers of a DualCameraCapture."""
+        return cls(capture.buffers[0], capture.buffers[1], tolerance)
+
+    def _find_pair(self, lefts, rights) -> Optional[Tuple[TimestampedFrame, TimestampedFrame]]:
+        """Return the newest pair whose skew is within tolerance."""
+        for left in reversed(lefts):
+            right = min(rights, key=lambda r: abs(r.timestamp - left.timestamp))
+            if abs(right.timestamp - left.timestamp) <= self.tolerance:
+                return left, right
+        return None
+
+    def wait_for_pair(self, timeout: Optional[float] = None) -> Optional[Tuple[TimestampedFrame, TimestampedFrame]]:
+        """Block until a new matched stereo pair is available.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds, None waits forever
+
+        Returns:
+            Optional[Tuple[TimestampedFrame, TimestampedFrame]]: Matched (left, right) frames,
+            or None on timeout. The caller must release() both frames when done with them.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+
+                # Both cameras need at least one frame newer than the last emitted pair.
+                if self.left_buffer.wait_for_newer(self._last_left, remaining, consume=False) is None:
+                    return None
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if self.right_buffer.wait_for_newer(self._last_right, remaining, consume=False) is None:
+                    return None
+
+                lefts = [e for e in self.left_buffer.snapshot() if e.sequence > self._last_left]
+                rights = [e for e in self.right_buffer.snapshot() if e.sequence > self._last_right]
+                pair = self._find_pair(lefts, rights)
+                if pair is not None:
+                    left, right = pair
+                    # Keep the pooled buffers alive for the caller; fails if already overwritten.
+                    if left.try_retain():
+                        if right.try_retain():
+                            return self._emit(left, right)
+                        left.release()
+                    continue
+
+                # No match yet: only a newer frame of the lagging camera can still match.
+                self.unmatched_count += 1
+                if lefts[-1].timestamp < rights[-1].timestamp:
+                    self._last_left = lefts[-1].sequence
+                    self.left_buffer.mark_dropped(lefts[-1])
+                else:
+                    self._last_right = rights[-1].sequence
+                    self.right_buffer.mark_dropped(rights[-1])
+
+    def _emit(self, left: TimestampedFrame, right: TimestampedFrame) -> Tuple[TimestampedFrame, TimestampedFrame]:
+        skew = abs(right.timestamp - left.timestamp)
+        self._last_left = left.sequence
+        self._last_right = right.sequence
+        self.left_buffer.mark_consumed(left)
+        self.right_buffer.mark_consumed(right)
+        self.pair_count += 1
+        self.skew_sum += skew
+        self.max_skew = max(self.max_skew, skew)
+        self.last_skew = skew
+        return left, right
+
+    def get_stats(self) -> dict:
+        """Return pairing counts and skew statistics in milliseconds."""
+        mean_skew = self.skew_sum / self.pair_count if self.pair_count else None
+        return {
+            "pairs": self.pair_count,
+            "unmatched": self.unmatched_count,
+            "mean_skew_ms": mean_skew * 1000 if mean_skew is not None else None,
+            "max_skew_ms": self.max_skew * 1000,
+            "last_skew_ms": self.last_skew * 1000 if self.last_skew is not None else None,
+        }
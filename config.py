@@ -5,6 +5,55 @@ MODEL_PATH = os.path.join(BASE_DIR, 'models', 'yolo11m_robot_detect_v2.engine')
 DISTANCES_PATH = os.path.join(BASE_DIR, 'data', 'distances.json')
 CROP_PATH = os.path.join(BASE_DIR, 'data', 'crop_calibration.json')
 
+# (width, height) of the RGB frames handed to the VLM, keeps the 16:9 crop aspect ratio.
+VLM_INPUT_SIZE = (512, 288)
+
+# In-memory encoding of the images sent to Ollama ("jpeg" or "png"), None keeps the input size.
+VLM_IMAGE_FORMAT = "jpeg"
+VLM_IMAGE_QUALITY = 85
+VLM_IMAGE_MAX_DIMENSION = None
+
+# Ollama server (None uses the OLLAMA_HOST environment variable) and how long it keeps the model loaded.
+OLLAMA_HOST = None
+OLLAMA_KEEP_ALIVE = "30m"
+
+# Run the VLM on background workers so the pipeline keeps camera rate; decisions from frames
+# older than VLM_MAX_DECISION_AGE seconds are dropped. Off by default: every frame then waits
+# for its own VLM decision, as before.
+VLM_ASYNCHRONOUS = False
+VLM_MAX_IN_FLIGHT = 1
+VLM_MAX_DECISION_AGE = 2.0
+
+# Stream VLM answers and stop generating as soon as a command is recognized.
+VLM_STREAMING = True
+
+# Give the VLM both camera views in one request: one "side_by_side" composite or "multi_image".
+VLM_STEREO = False
+VLM_STEREO_LAYOUT = "side_by_side"
+
+# Decide from YOLO detections and distances first, and ask the VLM only when that is inconclusive.
+VLM_CASCADE = False
+
+# Reuse VLM decisions for near-duplicate views: perceptual hashes within VLM_CACHE_MAX_DISTANCE
+# bits, at most VLM_CACHE_TTL seconds old (VLM_CACHE_SIZE = 0 disables the cache).
+VLM_CACHE_SIZE = 64
+VLM_CACHE_TTL = 2.0
+VLM_CACHE_MAX_DISTANCE = 6
+
+# Run capture/cropping and the VLM in separate processes connected through shared memory.
+MULTIPROCESS_PIPELINE = False
+
+# Maximum capture time difference (seconds) between the two frames of a stereo pair.
+STEREO_SYNC_TOLERANCE = 0.015
+
+# CPU inference when MODEL_PATH is an exported .onnx model: ONNX Runtime intra-op threads
+# (None uses all physical cores) and int8-quantized weights.
+YOLO_NUM_THREADS = None
+YOLO_INT8 = False
+
+# Pass YOLO detections between modules as one columnar DetectionBatch per camera instead of a list of dicts.
+YOLO_COLUMNAR = False
+
 # Mapping from model class id to label.
 CLASS_MAPPING = {
     0: 'robot',
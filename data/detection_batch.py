@@ -0,0 +1,105 @@
+import math
+import numpy as np
+
+# Up to this many detections (or detection-track pairs), plain Python loops over the columns are
+# faster than NumPy calls, whose fixed per-call overhead dominates for a handful of rows.
+SMALL_BATCH_SIZE = 32
+
+class DetectionBatch:
+    def __init__(self, boxes=None, labels=None, confidences=None, distances=None, track_ids=None,
+                 camera_width=None, camera_height=None):
+        """
+        Detections of one camera frame as columns (struct of arrays) instead of a list of dicts.
+
+        Row i of every column describes detection i. Missing distances are NaN and missing track
+        ids are -1. The frame size is stored once for the whole batch.
+
+        :param boxes: (N, 4) [x1, y1, x2, y2] in pixels.
+        :param labels: (N,) class labels.
+        :param confidences: (N,) confidence scores, NaN when unknown.
+        :param distances: (N,) estimated distances in meters, NaN when unknown.
+        :param track_ids: (N,) track ids, -1 when untracked.
+        :param camera_width: Width of the camera frame.
+        :param camera_height: Height of the camera frame.
+        """
+        self.boxes = np.empty((0, 4), dtype=np.float64) if boxes is None else np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        count = len(self.boxes)
+        self.labels = np.asarray([] if labels is None else labels, dtype=str)
+        self.confidences = self._column(confidences, count, np.nan, np.float64)
+        self.distances = self._column(distances, count, np.nan, np.float64)
+        self.track_ids = self._column(track_ids, count, -1, np.int64)
+        self.camera_width = camera_width
+        self.camera_height = camera_height
+        if len(self.labels) != count:
+            raise ValueError(f"Expected {count} labels, got {len(self.labels)}")
+
+    @staticmethod
+    def _column(values, count, missing, dtype):
+        if values is None:
+            return np.full(count, missing, dtype=dtype)
+        column = np.asarray(values, dtype=dtype)
+        if column.shape != (count,):
+            raise ValueError(f"Expected a column of {count} values, got shape {column.shape}")
+        return column
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def dispatch(self, small, large, *args, others=None):
+        """
+        Run an operation that has a loop and a NumPy implementation: small(self, *args) for at most
+        SMALL_BATCH_SIZE rows, large(self, *args) otherwise.
+
+        :param others: Size of a second collection every row is compared with (e.g. tracks); the
+                       rows times others are then held against SMALL_BATCH_SIZE ** 2.
+        """
+        if others is None:
+            is_small = len(self) <= SMALL_BATCH_SIZE
+        else:
+            is_small = len(self) * others <= SMALL_BATCH_SIZE ** 2
+        return small(self, *args) if is_small else large(self, *args)
+
+    @classmethod
+    def from_dicts(cls, detections):
+        """Convert a list of detection dictionaries (see YoloDetector.extract_detections)."""
+        def column(key, missing):
+            return [missing if det.get(key) is None else det[key] for det in detections]
+
+        first = detections[0] if detections else {}
+        return cls(
+            boxes=[det["bbox"] for det in detections],
+            labels=[det["label"] for det in detections],
+            confidences=column("confidence", np.nan),
+            distances=column("distance", np.nan),
+            track_ids=column("track_id", -1),
+            camera_width=first.get("camera_width"),
+            camera_height=first.get("camera_height"),
+        )
+
+    def detection(self, index):
+        """Detection dictionary of one row, with "distance" and "track_id" only when known."""
+        confidence = float(self.confidences[index])
+        distance = float(self.distances[index])
+        track_id = int(self.track_ids[index])
+        detection = {
+            "label": str(self.labels[index]),
+            "bbox": self.boxes[index].tolist(),
+            "confidence": None if math.isnan(confidence) else confidence,
+            "camera_width": self.camera_width,
+            "camera_height": self.camera_height,
+        }
+        if not math.isnan(distance):
+            detection["distance"] = distance
+        if track_id >= 0:
+            detection["track_id"] = track_id
+        return detection
+
+    def to_dicts(self):
+        """Convert to a list of detection dictionaries."""
+        return [self.detection(index) for index in range(len(self))]
+
+    def select(self, indices):
+        """New batch with the given rows (index array or boolean mask)."""
+        return DetectionBatch(self.boxes[indices], self.labels[indices], self.confidences[indices],
+                              self.distances[indices], self.track_ids[indices],
+                              self.camera_width, self.camera_height)
@@ -1,15 +1,48 @@
 from dataclasses import dataclass, field
-from typing import List, Any
+from typing import List, Any, Union
 import numpy as np
+from e2e_ad.data.detection_batch import DetectionBatch
+
+# Attributes that hold the frames of one capture (or buffers backing them, or its timestamp),
+# as opposed to results computed from them by processing modules.
+FRAME_FIELDS = {
+    "timestamp",
+    "left_frame", "right_frame",
+    "left_model_input", "right_model_input",
+    "left_frame_visualized", "right_frame_visualized",
+    "buffers",
+}
 
 @dataclass
 class SensorData:
     left_frame: np.ndarray = None
     right_frame: np.ndarray = None
+    left_model_input: np.ndarray = None   # RGB, resized for the VLM (see FrameCropper.crop_frames_with_model_input)
+    right_model_input: np.ndarray = None
     left_frame_visualized: np.ndarray = None
     right_frame_visualized: np.ndarray = None
-    left_detections: List[dict] = field(default_factory=list)
-    right_detections: List[dict] = field(default_factory=list)
-    left_tracking: List[Any] = field(default_factory=list)
-    right_tracking: List[Any] = field(default_factory=list)
+    # Lists of detection dicts, or a DetectionBatch each when the detector is columnar
+    left_detections: Union[List[dict], DetectionBatch] = field(default_factory=list)
+    right_detections: Union[List[dict], DetectionBatch] = field(default_factory=list)
+    left_tracking: Union[List[Any], DetectionBatch] = field(default_factory=list)
+    right_tracking: Union[List[Any], DetectionBatch] = field(default_factory=list)
     vlm_direction: str = None
+    # Objects found by VLM detect/point queries (same dict layout as the detections, and {"label", "x", "y"})
+    vlm_detections: List[dict] = field(default_factory=list)
+    vlm_points: List[dict] = field(default_factory=list)
+    # Capture time (time.monotonic) of the frames, and of the frames vlm_direction was computed from
+    timestamp: float = None
+    vlm_timestamp: float = None
+    # Pooled buffers backing the frames above (see FrameBufferPool); empty when not pooled
+    buffers: List[Any] = field(default_factory=list)
+
+    def retain(self):
+        """Take a reference on every pooled frame buffer. Only valid while already holding one."""
+        for buffer in self.buffers:
+            buffer.retain()
+        return self
+
+    def release(self):
+        """Release a reference on every pooled frame buffer."""
+        for buffer in self.buffers:
+            buffer.release()
@@ -8,9 +8,23 @@ class SensorDataHub:
     def update(self, sensor_data):
         """Atomically update the latest sensor data."""
         with self._lock:
-            self._latest = sensor_data
+            # The hub keeps its own reference on pooled frames until the next update
+            sensor_data.retain()
+            previous, self._latest = self._latest, sensor_data
+        if previous is not None:
+            previous.release()
 
     def get_latest(self):
         """Atomically retrieve the latest sensor data."""
         with self._lock:
             return self._latest
+
+    def acquire_latest(self):
+        """
+        Atomically retrieve the latest sensor data with its pooled frames retained,
+        so they cannot be recycled while in use. Call release() on it when done.
+        """
+        with self._lock:
+            if self._latest is None:
+                return None
+            return self._latest.retain()
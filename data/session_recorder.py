@@ -0,0 +1,254 @@
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+import cv2
+import numpy as np
+from e2e_ad.data.detection_batch import DetectionBatch
+
+RECORD_HEADER = struct.Struct("<II")  # (json header length, payload length)
+FRAME_COMPRESSIONS = (None, "zlib", "jpeg", "png")
+
+def _json_default(value):
+    """Serialize NumPy scalars and arrays found in detections, and DetectionBatches as detection dictionaries."""
+    if isinstance(value, DetectionBatch):
+        return value.to_dicts()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def encode_frame(frame, compression=None, jpeg_quality=90):
+    """Encode a frame to bytes with the given compression."""
+    if compression is None:
+        return np.ascontiguousarray(frame).tobytes()
+    if compression == "zlib":
+        return zlib.compress(np.ascontiguousarray(frame).tobytes(), 1)
+    if compression == "jpeg":
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+    elif compression == "png":
+        ok, buf = cv2.imencode(".png", frame, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    else:
+        raise ValueError(f"Unknown frame compression '{compression}'")
+    if not ok:
+        raise ValueError(f"Failed to encode frame as {compression}")
+    return buf.tobytes()
+
+def decode_frame(data, meta):
+    """Inverse of encode_frame, using the frame metadata stored in the record header."""
+    encoding = meta["encoding"]
+    if encoding in ("jpeg", "png"):
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if encoding == "zlib":
+        data = zlib.decompress(data)
+    return np.frombuffer(data, dtype=meta["dtype"]).reshape(meta["shape"])
+
+class SessionRecorder:
+    def __init__(self, session_dir, compression=None, jpeg_quality=90, max_queue_size=64,
+                 max_queue_bytes=256 * 1024 * 1024, chunk_size_bytes=64 * 1024 * 1024):
+        """
+        Record SensorData and motor commands to disk without blocking the caller.
+
+        Records are queued and written by a background thread to append-only chunk files
+        (chunk_00000.bin, chunk_00001.bin, ...). Each record is a little-endian
+        (header length, payload length) pair followed by a JSON header and the encoded frames.
+        When the queue is full or holds more than max_queue_bytes of frame data, new records
+        are dropped and counted instead of blocking.
+
+        :param session_dir: Output directory (created if missing).
+        :param compression: Frame compression: None, 'zlib', 'jpeg' or 'png'.
+        :param jpeg_quality: JPEG quality when compression is 'jpeg'.
+        :param max_queue_size: Maximum number of queued records.
+        :param max_queue_bytes: Maximum amount of frame data held in the queue.
+        :param chunk_size_bytes: Start a new chunk file after this many bytes.
+        """
+        if compression not in FRAME_COMPRESSIONS:
+            raise ValueError(f"Unknown frame compression '{compression}'")
+        self.session_dir = session_dir
+        self.compression = compression
+        self.jpeg_quality = jpeg_quality
+        self.max_queue_bytes = max_queue_bytes
+        self.chunk_size_bytes = chunk_size_bytes
+        os.makedirs(session_dir, exist_ok=True)
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._queued_bytes = 0
+        self._sequence = 0
+        self._chunk_index = 0
+        self._chunk_file = None
+        self._chunk_bytes = 0
+
+        # Statistics
+        self.recorded_count = 0
+        self.dropped_count = 0
+        self.bytes_written = 0
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def record(self, sensor_data, timestamp=None):
+        """Queue the frames, detections and VLM decision of a SensorData. Never blocks."""
+        pooled = bool(sensor_data.buffers)
+        frames = {name: getattr(sensor_data, name) for name in ("left_frame", "right_frame")
+                  if getattr(sensor_data, name) is not None}
+        if not pooled:
+            # Plain frames may be reused, so they are copied; check first that the record would not be dropped
+            if not self._has_capacity(sum(frame.nbytes for frame in frames.values())):
+                with self._lock:
+                    self.dropped_count += 1
+                return False
+            frames = {name: frame.copy() for name, frame in frames.items()}
+        fields = {
+            "left_detections": sensor_data.left_detections,
+            "right_detections": sensor_data.right_detections,
+            "vlm_direction": sensor_data.vlm_direction,
+            "vlm_timestamp": sensor_data.vlm_timestamp,
+        }
+        if timestamp is None:
+            timestamp = sensor_data.timestamp
+        on_done = sensor_data.retain().release if pooled else None
+        return self._enqueue("sensor_data", fields, frames, timestamp, on_done)
+
+    def record_command(self, left_speed, right_speed, timestamp=None):
+        """Queue a motor command sent to the robot. Never blocks."""
+        return self._enqueue("command", {"left": left_speed, "right": right_speed}, {}, timestamp)
+
+    def _enqueue(self, record_type, fields, frames, timestamp, on_done=None):
+        """Queue a record; on_done is called once it was written or dropped."""
+        frame_bytes = sum(frame.nbytes for frame in frames.values())
+        if not self._try_enqueue(record_type, fields, frames, frame_bytes, timestamp, on_done):
+            if on_done is not None:
+                on_done()
+            return False
+        return True
+
+    def _has_capacity(self, frame_bytes):
+        """Whether a record with frame_bytes of frames would currently be queued."""
+        with self._lock:
+            return (self.running and not self._queue.full()
+                    and self._queued_bytes + frame_bytes <= self.max_queue_bytes)
+
+    def _try_enqueue(self, record_type, fields, frames, frame_bytes, timestamp, on_done):
+        with self._lock:
+            if not self.running or self._queued_bytes + frame_bytes > self.max_queue_bytes:
+                self.dropped_count += 1
+                return False
+            self._sequence += 1
+            item = {
+                "type": record_type,
+                "sequence": self._sequence,
+                "timestamp": time.monotonic() if timestamp is None else timestamp,
+                "wall_time": time.time(),
+                "fields": fields,
+            }
+            try:
+                self._queue.put_nowait((item, frames, frame_bytes, on_done))
+            except queue.Full:
+                self.dropped_count += 1
+                return False
+            self._queued_bytes += frame_bytes
+            return True
+
+    def run(self):
+        while self.running or not self._queue.empty():
+            try:
+                item, frames, frame_bytes, on_done = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                self._write_record(item, frames)
+            except Exception as e:
+                print(f"Error writing session record: {e}", flush=True)
+            finally:
+                if on_done is not None:
+                    on_done()
+                with self._lock:
+                    self._queued_bytes -= frame_bytes
+        self._close_chunk()
+
+    def _write_record(self, item, frames):
+        payloads = []
+        frame_meta = []
+        for name, frame in frames.items():
+            data = encode_frame(frame, self.compression, self.jpeg_quality)
+            payloads.append(data)
+            frame_meta.append({
+                "name": name,
+                "encoding": self.compression or "raw",
+                "shape": list(frame.shape),
+                "dtype": str(frame.dtype),
+                "size": len(data),
+            })
+        item["frames"] = frame_meta
+        header = json.dumps(item, default=_json_default).encode("utf-8")
+        payload = b"".join(payloads)
+
+        if self._chunk_file is None or self._chunk_bytes >= self.chunk_size_bytes:
+            self._open_next_chunk()
+        self._chunk_file.write(RECORD_HEADER.pack(len(header), len(payload)))
+        self._chunk_file.write(header)
+        self._chunk_file.write(payload)
+        written = RECORD_HEADER.size + len(header) + len(payload)
+        self._chunk_bytes += written
+        self.bytes_written += written
+        self.recorded_count += 1
+
+    def _open_next_chunk(self):
+        self._close_chunk()
+        path = os.path.join(self.session_dir, f"chunk_{self._chunk_index:05d}.bin")
+        self._chunk_file = open(path, "ab")
+        self._chunk_index += 1
+        self._chunk_bytes = 0
+
+    def _close_chunk(self):
+        if self._chunk_file is not None:
+            self._chunk_file.close()
+            self._chunk_file = None
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "recorded": self.recorded_count,
+                "dropped": self.dropped_count,
+                "queued": self._queue.qsize(),
+                "queued_bytes": self._queued_bytes,
+                "bytes_written": self.bytes_written,
+                "chunks": self._chunk_index,
+            }
+
+    def stop(self):
+        """Stop accepting records, write everything still queued and close the chunk file."""
+        self.running = False
+        self.thread.join()
+
+def read_session(session_dir):
+    """
+    Iterate over the records of a session written by SessionRecorder, in order.
+
+    :return: Generator of (header dict, {frame name: np.ndarray}) tuples.
+    """
+    chunks = sorted(name for name in os.listdir(session_dir) if name.startswith("chunk_") and name.endswith(".bin"))
+    for chunk in chunks:
+        with open(os.path.join(session_dir, chunk), "rb") as f:
+            while True:
+                prefix = f.read(RECORD_HEADER.size)
+                if len(prefix) < RECORD_HEADER.size:
+                    break  # End of chunk (or a record cut short by a crash)
+                header_len, payload_len = RECORD_HEADER.unpack(prefix)
+                header_bytes = f.read(header_len)
+                payload = f.read(payload_len)
+                if len(header_bytes) < header_len or len(payload) < payload_len:
+                    break
+                header = json.loads(header_bytes)
+                frames = {}
+                offset = 0
+                for meta in header.get("frames", []):
+                    frames[meta["name"]] = decode_frame(payload[offset:offset + meta["size"]], meta)
+                    offset += meta["size"]
+                yield header, frames
@@ -1,3 +1,6 @@
+import numpy as np
+from e2e_ad.data.detection_batch import DetectionBatch
+
 class DistanceEstimator:
     def __init__(self, metrics):
         """
@@ -6,6 +9,12 @@ class DistanceEstimator:
         :param metrics: dict mapping labels to ObjectMetrics instances.
         """
         self.metrics = metrics
+        # Metrics as columns sorted by label, for process_batch
+        self._labels = np.array(sorted(metrics), dtype=str)
+        self._min_height_ratio = np.array([metrics[label].min_height_ratio for label in self._labels], dtype=np.float64)
+        self._max_height_ratio = np.array([metrics[label].max_height_ratio for label in self._labels], dtype=np.float64)
+        self._min_distance = np.array([metrics[label].estimated_min_distance for label in self._labels], dtype=np.float64)
+        self._max_distance = np.array([metrics[label].estimated_max_distance for label in self._labels], dtype=np.float64)
 
     def process_detections(self, detections):
         """
@@ -17,26 +26,72 @@ class DistanceEstimator:
                            - 'label': a string label for the detection.
                            - 'camera_height': the height of the camera frame.
         :return: The updated list of detection dictionaries.
+                 A DetectionBatch is updated in place, see process_batch.
         """
+        if isinstance(detections, DetectionBatch):
+            return self.process_batch(detections)
         for detection in detections:
             camera_height = detection.get("camera_height")
             label = detection.get("label")
             if label in self.metrics and camera_height:
-                m = self.metrics[label]
                 bbox = detection.get("bbox")
-                detection_height = bbox[3] - bbox[1]
-                observed_height_ratio = detection_height / camera_height
-
-                if observed_height_ratio <= m.min_height_ratio:
-                    detection["distance"] = m.estimated_max_distance
-                elif observed_height_ratio >= m.max_height_ratio:
-                    detection["distance"] = m.estimated_min_distance
-                else:
-                    detection["distance"] = m.estimated_min_distance + (
-                        m.estimated_max_distance - m.estimated_min_distance
-                    ) * (1 / observed_height_ratio - 1 / m.max_height_ratio) / (
-                        1 / m.min_height_ratio - 1 / m.max_height_ratio
-                    )
+                detection["distance"] = self._distance(self.metrics[label], bbox[3] - bbox[1], camera_height)
             else:
                 detection["distance"] = None
         return detections
+
+    @staticmethod
+    def _distance(m, detection_height, camera_height):
+        """Distance of one detection from its height, interpolated between the label's metrics."""
+        observed_height_ratio = detection_height / camera_height
+
+        if observed_height_ratio <= m.min_height_ratio:
+            return m.estimated_max_distance
+        if observed_height_ratio >= m.max_height_ratio:
+            return m.estimated_min_distance
+        return m.estimated_min_distance + (
+            m.estimated_max_distance - m.estimated_min_distance
+        ) * (1 / observed_height_ratio - 1 / m.max_height_ratio) / (
+            1 / m.min_height_ratio - 1 / m.max_height_ratio
+        )
+
+    def process_batch(self, batch: DetectionBatch) -> DetectionBatch:
+        """
+        Fill batch.distances for all detections at once, looking up the metrics of every label as columns.
+        Detections without metrics for their label get NaN.
+        """
+        return batch.dispatch(self._process_small_batch, self._process_large_batch)
+
+    def _process_large_batch(self, batch: DetectionBatch) -> DetectionBatch:
+        batch.distances[:] = np.nan
+        if not batch.camera_height or not len(batch) or not len(self._labels):
+            return batch
+        index = np.minimum(np.searchsorted(self._labels, batch.labels), len(self._labels) - 1)
+        known = self._labels[index] == batch.labels
+        index = index[known]
+        min_ratio, max_ratio = self._min_height_ratio[index], self._max_height_ratio[index]
+        min_distance, max_distance = self._min_distance[index], self._max_distance[index]
+
+        boxes = batch.boxes[known]
+        observed_height_ratio = (boxes[:, 3] - boxes[:, 1]) / batch.camera_height
+        with np.errstate(divide="ignore", invalid="ignore"):
+            interpolated = min_distance + (max_distance - min_distance) * (
+                1 / observed_height_ratio - 1 / max_ratio
+            ) / (1 / min_ratio - 1 / max_ratio)
+        batch.distances[known] = np.where(
+            observed_height_ratio <= min_ratio, max_distance,
+            np.where(observed_height_ratio >= max_ratio, min_distance, interpolated)
+        )
+        return batch
+
+    def _process_small_batch(self, batch: DetectionBatch) -> DetectionBatch:
+        """process_batch with a loop over the rows, cheaper than the column lookups for a few detections."""
+        distances = []
+        for label, bbox in zip(batch.labels.tolist(), batch.boxes.tolist()):
+            m = self.metrics.get(label)
+            if m is None or not batch.camera_height:
+                distances.append(np.nan)
+            else:
+                distances.append(self._distance(m, bbox[3] - bbox[1], batch.camera_height))
+        batch.distances[:] = distances
+        return batch
@@ -0,0 +1,96 @@
+import base64
+import threading
+import time
+from typing import Optional
+import cv2
+import numpy as np
+
+IMAGE_FORMATS = {"jpeg": ".jpg", "png": ".png"}
+
+class ImageEncoder:
+    def __init__(self, format: str = "jpeg", quality: int = 85, max_dimension: Optional[int] = None,
+                 png_compression: int = 1):
+        """
+        Encode NumPy frames to JPEG/PNG bytes in memory for the VLM requests.
+
+        Frames are downscaled and color converted into reused buffers before encoding, so no
+        temporary files or PIL images are needed.
+
+        :param format: "jpeg" or "png".
+        :param quality: JPEG quality (0-100).
+        :param max_dimension: Downscale so the longest side is at most this many pixels (None keeps the size).
+        :param png_compression: PNG compression level (0-9), low values encode faster.
+        """
+        if format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown image format '{format}', expected one of {', '.join(IMAGE_FORMATS)}")
+        self.format = format
+        self.quality = quality
+        self.max_dimension = max_dimension
+        if format == "jpeg":
+            self._params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+        else:
+            self._params = [cv2.IMWRITE_PNG_COMPRESSION, int(png_compression)]
+
+        self._lock = threading.Lock()
+        self._resized = None
+        self._bgr = None
+
+        # Statistics
+        self.encoded_count = 0
+        self.encoded_bytes = 0
+        self.encode_time = 0.0
+
+    def _target_size(self, frame: np.ndarray):
+        height, width = frame.shape[:2]
+        if self.max_dimension is None or max(height, width) <= self.max_dimension:
+            return None
+        scale = self.max_dimension / max(height, width)
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    @staticmethod
+    def _reuse(buffer: Optional[np.ndarray], shape, dtype) -> np.ndarray:
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            return np.empty(shape, dtype=dtype)
+        return buffer
+
+    def encode(self, frame: np.ndarray, is_rgb: bool = False) -> bytes:
+        """
+        Encode a frame and return the compressed image bytes.
+
+        :param frame: BGR frame, or an RGB model input when is_rgb is set.
+        :param is_rgb: The frame is RGB (e.g. from FrameCropper.crop_frames_for_model).
+        """
+        start = time.perf_counter()
+        with self._lock:
+            image = frame
+            size = self._target_size(frame)
+            if size is not None:
+                shape = (size[1], size[0]) + frame.shape[2:]
+                self._resized = self._reuse(self._resized, shape, frame.dtype)
+                cv2.resize(frame, size, dst=self._resized, interpolation=cv2.INTER_AREA)
+                image = self._resized
+            if is_rgb and image.ndim == 3:
+                # OpenCV encoders expect BGR
+                self._bgr = self._reuse(self._bgr, image.shape, image.dtype)
+                cv2.cvtColor(image, cv2.COLOR_RGB2BGR, dst=self._bgr)
+                image = self._bgr
+            ok, encoded = cv2.imencode(IMAGE_FORMATS[self.format], image, self._params)
+            if not ok:
+                raise RuntimeError(f"Failed to encode frame as {self.format}")
+            data = encoded.tobytes()
+
+            self.encoded_count += 1
+            self.encoded_bytes += len(data)
+            self.encode_time += time.perf_counter() - start
+        return data
+
+    def encode_base64(self, frame: np.ndarray, is_rgb: bool = False) -> str:
+        """Encode a frame and return it base64 encoded, as expected by the Ollama REST API."""
+        return base64.b64encode(self.encode(frame, is_rgb)).decode("ascii")
+
+    def get_stats(self):
+        return {
+            "encoded": self.encoded_count,
+            "mean_bytes": self.encoded_bytes / self.encoded_count if self.encoded_count else None,
+            "mean_encode_ms": self.encode_time / self.encoded_count * 1000 if self.encoded_count else None,
+        }
@@ -0,0 +1,99 @@
+import json
+import re
+from typing import Optional
+
+# The only commands a robot may output
+VALID_COMMANDS = ("forward", "left", "right", "stop")
+
+# JSON schema passed as Ollama's `format`, restricting the answer to {"command": <one of the commands>}
+COMMAND_SCHEMA = {
+    "type": "object",
+    "properties": {"command": {"type": "string", "enum": list(VALID_COMMANDS)}},
+    "required": ["command"],
+}
+
+# Prompt line asking for the answer COMMAND_SCHEMA enforces
+COMMAND_INSTRUCTION = (
+    'Answer only with JSON of the form {"command": "<command>"}, where <command> is one of: '
+    + ", ".join(VALID_COMMANDS) + "."
+)
+
+# Greedy decoding, capped to the few tokens the JSON answer needs
+COMMAND_OPTIONS = {
+    "temperature": 0,
+    "top_k": 1,
+    "seed": 0,
+    "num_predict": 12,
+}
+
+# Words models use instead of the exact command names
+_SYNONYMS = {
+    "ahead": "forward",
+    "straight": "forward",
+    "halt": "stop",
+}
+
+# Words that negate a command following within _NEGATION_WINDOW words ("don't go forward")
+_NEGATIONS = {"not", "no", "never", "don't", "dont", "avoid", "cannot", "can't", "shouldn't", "mustn't", "won't"}
+_NEGATION_WINDOW = 3
+
+_TOKEN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+_CLAUSE_PATTERN = re.compile(r"[^.,;:!?\n]+")
+# Flat JSON object inside a longer answer ('Sure: {"command": "left"}')
+_EMBEDDED_OBJECT = re.compile(r"\{[^{}]*\}")
+# Start of the structured answer up to the (partial) command value
+_STRUCTURED_PREFIX = re.compile(r'\s*\{\s*"command"\s*:\s*"([a-z]*)')
+
+def parse_command(text: str) -> Optional[str]:
+    """
+    Extract a navigation command from a model answer.
+
+    Accepts the structured {"command": ...} answer (also wrapped in prose), a bare command, or
+    free text such as "Turn left." In free text the last command word that is not negated wins,
+    so "Don't go forward, turn left" is "left". Returns None if no command is found.
+    """
+    if not text:
+        return None
+    text = text.strip()
+    try:
+        answer = json.loads(text)
+    except ValueError:
+        answer = None
+        for candidate in _EMBEDDED_OBJECT.findall(text):
+            try:
+                embedded = json.loads(candidate)
+            except ValueError:
+                continue
+            if isinstance(embedded, dict) and "command" in embedded:
+                answer = embedded
+                break
+    if isinstance(answer, dict):
+        text = str(answer.get("command", ""))
+    elif isinstance(answer, str):
+        text = answer
+
+    command = None
+    for clause in _CLAUSE_PATTERN.findall(text.lower().replace("\u2019", "'")):
+        tokens = _TOKEN_PATTERN.findall(clause)
+        for i, token in enumerate(tokens):
+            word = token if token in VALID_COMMANDS else _SYNONYMS.get(token)
+            if word is None:
+                continue
+            if any(previous in _NEGATIONS for previous in tokens[max(0, i - _NEGATION_WINDOW):i]):
+                continue
+            command = word
+    return command
+
+def parse_command_prefix(text: str) -> Optional[str]:
+    """
+    Extract a command from the beginning of a streamed answer, as soon as it is unambiguous.
+
+    In the structured answer the value can only be one of the commands, so its first letters
+    decide ('{"command": "l' is "left"). Free text can still negate or revise a command word
+    later on, so it is only parsed once complete (see parse_command). Returns None until then.
+    """
+    match = _STRUCTURED_PREFIX.match(text.lower())
+    if match:
+        candidates = [command for command in VALID_COMMANDS if command.startswith(match.group(1))]
+        return candidates[0] if len(candidates) == 1 else None
+    return None
@@ -0,0 +1,163 @@
+import os
+import time
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+def letterbox(frame: np.ndarray, canvas: np.ndarray, pad_value=114):
+    """
+    Resize frame into canvas keeping the aspect ratio and pad the rest, as Ultralytics does.
+
+    :param canvas: Preallocated (height, width, 3) uint8 target.
+    :return: (gain, left, top) to map boxes back to frame coordinates.
+    """
+    height, width = canvas.shape[:2]
+    frame_height, frame_width = frame.shape[:2]
+    gain = min(height / frame_height, width / frame_width)
+    new_width, new_height = round(frame_width * gain), round(frame_height * gain)
+    pad_x, pad_y = (width - new_width) / 2, (height - new_height) / 2
+    left, top = round(pad_x - 0.1), round(pad_y - 0.1)
+
+    canvas.fill(pad_value)
+    if (new_width, new_height) != (frame_width, frame_height):
+        frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    canvas[top:top + new_height, left:left + new_width] = frame
+    return gain, left, top
+
+def non_max_suppression(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float, max_detections: int) -> np.ndarray:
+    """Greedy NMS over xyxy boxes, returns the indices of the kept boxes by descending score."""
+    order = np.argsort(-scores, kind="stable")
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while order.size and len(keep) < max_detections:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        x_left = np.maximum(boxes[best, 0], boxes[rest, 0])
+        y_top = np.maximum(boxes[best, 1], boxes[rest, 1])
+        x_right = np.minimum(boxes[best, 2], boxes[rest, 2])
+        y_bottom = np.minimum(boxes[best, 3], boxes[rest, 3])
+        intersection = np.clip(x_right - x_left, 0, None) * np.clip(y_bottom - y_top, 0, None)
+        iou = intersection / (areas[best] + areas[rest] - intersection + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+def quantize_int8(model_path: str) -> str:
+    """Write an int8 weight-quantized copy next to the model once and return its path."""
+    root, ext = os.path.splitext(model_path)
+    quantized_path = f"{root}.int8{ext}"
+    if not os.path.exists(quantized_path) or os.path.getmtime(quantized_path) < os.path.getmtime(model_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        print(f"[INFO] Quantizing {model_path} to int8 weights.")
+        # ConvInteger only has unsigned 8-bit CPU kernels
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QUInt8)
+    return quantized_path
+
+class OnnxYoloBackend:
+    def __init__(self, model_path, num_threads=None, int8=False, conf_threshold=0.25, iou_threshold=0.7,
+                 max_detections=300):
+        """
+        CPU inference of an exported Ultralytics YOLO detection model (yolo export format=onnx) with ONNX Runtime.
+
+        Expects the raw head output (1, 4 + classes, anchors) of a model exported without nms,
+        with batch size 1. Input and output buffers are allocated once and bound to the session.
+
+        :param num_threads: Intra-op threads, None lets ONNX Runtime use all physical cores.
+        :param int8: Run an int8 weight-quantized copy of the model (created on first use).
+        :param conf_threshold: Minimum class score of a detection.
+        :param iou_threshold: IoU above which NMS drops the lower-scoring box of the same class.
+        :param max_detections: Maximum number of detections per frame.
+        """
+        self.model_path = quantize_int8(model_path) if int8 else model_path
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.max_detections = max_detections
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(self.model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        height, width = (dim if isinstance(dim, int) else 640 for dim in model_input.shape[2:])
+        self.input_size = (width, height)
+        self._canvas = np.empty((height, width, 3), dtype=np.uint8)
+        self._input = np.empty((1, 3, height, width), dtype=np.float32)
+
+        self._binding = self.session.io_binding()
+        self._binding.bind_cpu_input(model_input.name, self._input)
+        model_output = self.session.get_outputs()[0]
+        self._output = None
+        if all(isinstance(dim, int) for dim in model_output.shape):
+            self._output = np.empty(model_output.shape, dtype=np.float32)
+            self._binding.bind_output(model_output.name, "cpu", 0, np.float32, self._output.shape,
+                                      self._output.ctypes.data)
+        else:
+            self._binding.bind_output(model_output.name, "cpu")
+
+        # Statistics
+        self.frame_count = 0
+        self.preprocess_time = 0.0
+        self.inference_time = 0.0
+        self.postprocess_time = 0.0
+
+    def _preprocess(self, frame: np.ndarray):
+        gain, left, top = letterbox(frame, self._canvas)
+        # BGR HWC uint8 -> RGB CHW float in [0, 1], written into the bound input buffer
+        np.multiply(self._canvas[..., ::-1].transpose(2, 0, 1), 1 / 255, out=self._input[0], casting="unsafe")
+        return gain, left, top
+
+    def _postprocess(self, output: np.ndarray, gain, left, top, frame_shape):
+        predictions = output[0].T  # (anchors, 4 + classes)
+        class_scores = predictions[:, 4:]
+        cls = class_scores.argmax(axis=1)
+        conf = class_scores[np.arange(len(cls)), cls]
+        candidates = conf > self.conf_threshold
+        boxes, conf, cls = predictions[candidates, :4], conf[candidates], cls[candidates]
+
+        xyxy = np.empty_like(boxes)
+        xyxy[:, :2] = boxes[:, :2] - boxes[:, 2:] / 2
+        xyxy[:, 2:] = boxes[:, :2] + boxes[:, 2:] / 2
+        # Offset the boxes per class so NMS only suppresses boxes of the same class
+        keep = non_max_suppression(xyxy + cls[:, None] * 7680.0, conf, self.iou_threshold, self.max_detections)
+        xyxy, conf, cls = xyxy[keep], conf[keep], cls[keep]
+
+        # Undo the letterbox
+        xyxy -= (left, top, left, top)
+        xyxy /= gain
+        frame_height, frame_width = frame_shape[:2]
+        np.clip(xyxy[:, 0::2], 0, frame_width, out=xyxy[:, 0::2])
+        np.clip(xyxy[:, 1::2], 0, frame_height, out=xyxy[:, 1::2])
+        return xyxy, conf, cls
+
+    def predict(self, frame: np.ndarray):
+        """
+        Detect objects in a BGR frame.
+
+        :return: (xyxy, conf, cls) arrays in frame pixel coordinates, shapes (N, 4), (N,), (N,).
+        """
+        start = time.perf_counter()
+        gain, left, top = self._preprocess(frame)
+        preprocessed = time.perf_counter()
+        self.session.run_with_iobinding(self._binding)
+        output = self._output if self._output is not None else self._binding.copy_outputs_to_cpu()[0]
+        inferred = time.perf_counter()
+        result = self._postprocess(output, gain, left, top, frame.shape)
+
+        self.preprocess_time += preprocessed - start
+        self.inference_time += inferred - preprocessed
+        self.postprocess_time += time.perf_counter() - inferred
+        self.frame_count += 1
+        return result
+
+    def get_stats(self):
+        count = self.frame_count or 1
+        return {
+            "frames": self.frame_count,
+            "preprocess_ms": self.preprocess_time / count * 1000,
+            "inference_ms": self.inference_time / count * 1000,
+            "postprocess_ms": self.postprocess_time / count * 1000,
+        }
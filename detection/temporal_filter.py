@@ -0,0 +1,242 @@
+import numpy as np
+
+# Frames with up to this many detections are filtered with a per-detection loop; the IoU matrices
+# only win above ~16 detections with a 10-frame history, ~20 with a 5-frame one
+SMALL_FRAME_SIZE = 16
+
+def _iou(bbox1, bbox2) -> float:
+    x_left = max(bbox1[0], bbox2[0])
+    y_top = max(bbox1[1], bbox2[1])
+    x_right = min(bbox1[2], bbox2[2])
+    y_bottom = min(bbox1[3], bbox2[3])
+    if x_right < x_left or y_bottom < y_top:
+        return 0.0
+    intersection_area = (x_right - x_left) * (y_bottom - y_top)
+    area1 = (bbox1[2] - bbox1[0]) * (bbox1[3] - bbox1[1])
+    area2 = (bbox2[2] - bbox2[0]) * (bbox2[3] - bbox2[1])
+    union_area = area1 + area2 - intersection_area
+    if union_area == 0:
+        return 0.0
+    return intersection_area / union_area
+
+def iou_matrix(boxes1: np.ndarray, boxes2: np.ndarray) -> np.ndarray:
+    """
+    IoU between every box in boxes1 (..., N, 4) and boxes2 (..., M, 4), shape (..., N, M).
+
+    Same arithmetic as _iou, including 0.0 for disjoint boxes and empty unions.
+    """
+    a = boxes1[..., :, None, :]
+    b = boxes2[..., None, :, :]
+    x_left = np.maximum(a[..., 0], b[..., 0])
+    y_top = np.maximum(a[..., 1], b[..., 1])
+    x_right = np.minimum(a[..., 2], b[..., 2])
+    y_bottom = np.minimum(a[..., 3], b[..., 3])
+    intersection = (x_right - x_left) * (y_bottom - y_top)
+    area1 = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area2 = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area1 + area2 - intersection
+    overlap = (x_right >= x_left) & (y_bottom >= y_top) & (union != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(overlap, intersection / np.where(overlap, union, 1.0), 0.0)
+
+class DetectionHistory:
+    def __init__(self, memory_size: int, capacity: int = 16):
+        """
+        Ring buffer of the last memory_size frames of one camera, stored as arrays.
+
+        :param memory_size: Number of frames kept.
+        :param capacity: Initial number of detections per frame, grows when a frame has more.
+        """
+        self.memory_size = memory_size
+        self.boxes = np.zeros((memory_size, capacity, 4), dtype=np.float64)
+        self.labels = np.full((memory_size, capacity), -1, dtype=np.int64)  # -1 marks an empty slot
+        self.counts = np.zeros(memory_size, dtype=np.int64)
+        self.length = 0
+        self._next = 0
+
+    def _grow(self, capacity):
+        boxes = np.zeros((self.memory_size, capacity, 4), dtype=np.float64)
+        labels = np.full((self.memory_size, capacity), -1, dtype=np.int64)
+        boxes[:, :self.boxes.shape[1]] = self.boxes
+        labels[:, :self.labels.shape[1]] = self.labels
+        self.boxes, self.labels = boxes, labels
+
+    def push(self, boxes: np.ndarray, labels: np.ndarray) -> int:
+        """Store a frame, overwriting the oldest one when full. Returns its slot."""
+        if len(boxes) > self.boxes.shape[1]:
+            self._grow(max(len(boxes), 2 * self.boxes.shape[1]))
+        slot = self._next
+        self.boxes[slot, :len(boxes)] = boxes
+        self.labels[slot] = -1
+        self.labels[slot, :len(labels)] = labels
+        self.counts[slot] = len(labels)
+        self._next = (slot + 1) % self.memory_size
+        self.length = min(self.length + 1, self.memory_size)
+        return slot
+
+    def past_slots(self) -> np.ndarray:
+        """Slots of the stored frames before the newest one, oldest first."""
+        newest = (self._next - 1) % self.memory_size
+        return np.array([(newest - age) % self.memory_size for age in range(self.length - 1, 0, -1)], dtype=np.int64)
+
+class TemporalConsistencyFilter:
+    def __init__(self, detection_memory_size=5, memory_threshold=2, iou_threshold=0.3):
+        """
+        Keep detections that also appeared in recent frames and smooth their box size.
+
+        A detection is kept once the history is full and at least memory_threshold earlier frames
+        contain a detection of the same label with IoU >= iou_threshold. Its width and height are
+        then averaged over the first such match of every frame in the history (including the
+        current one), keeping the current center. Matching uses IoU matrices over array-backed
+        per-camera histories, or a per-detection loop for frames of up to SMALL_FRAME_SIZE detections.
+
+        :param detection_memory_size: Number of frames to remember for temporal smoothing.
+        :param memory_threshold: Minimum number of past frames in which a similar detection must appear.
+        :param iou_threshold: IoU threshold to consider two detections as matching.
+        """
+        self.detection_memory_size = detection_memory_size
+        self.memory_threshold = memory_threshold
+        self.iou_threshold = iou_threshold
+        self.histories = {}
+        self._label_ids = {}
+
+    def _label_array(self, labels) -> np.ndarray:
+        return np.array([self._label_ids.setdefault(label, len(self._label_ids)) for label in labels], dtype=np.int64)
+
+    def filter_arrays(self, camera_id, boxes: np.ndarray, label_ids: np.ndarray):
+        """
+        Array version of filter(): boxes (N, 4) float64, label_ids (N,) non-negative ints.
+
+        :return: (indices of the kept detections, their smoothed boxes), or (None, boxes) while
+                 the history is still filling up and every detection is returned unchanged.
+        """
+        history = self.histories.get(camera_id)
+        if history is None:
+            history = self.histories[camera_id] = DetectionHistory(self.detection_memory_size)
+        slot = history.push(boxes, label_ids)
+        if history.length < self.detection_memory_size:
+            return None, boxes
+
+        count = len(boxes)
+        if count == 0:
+            return np.empty(0, dtype=np.int64), boxes
+        if count <= SMALL_FRAME_SIZE:
+            return self._filter_small(history, slot, boxes, label_ids)
+        past = history.past_slots()
+        width = max(history.counts[past].max(initial=0), 1)
+        past_boxes = history.boxes[past, :width]    # (F, K, 4)
+        past_labels = history.labels[past, :width]  # (F, K)
+
+        # (F, N, K): detection n matches slot k of past frame f
+        matches = (iou_matrix(boxes, past_boxes) >= self.iou_threshold) & (
+            label_ids[None, :, None] == past_labels[:, None, :])
+        matched_frames = matches.any(axis=2)  # (F, N)
+        keep = np.flatnonzero(matched_frames.sum(axis=0) >= self.memory_threshold)
+
+        # First match per past frame, as the original loop breaks on the first one
+        first = matches.argmax(axis=2)  # (F, N)
+        first_boxes = np.take_along_axis(past_boxes, first[:, :, None], axis=1)  # (F, N, 4)
+        past_widths = first_boxes[..., 2] - first_boxes[..., 0]
+        past_heights = first_boxes[..., 3] - first_boxes[..., 1]
+
+        # Boxes of the current frame change while it is processed: kept detections are smoothed in
+        # order, and later detections compare against the smoothed boxes of earlier ones. Detection i
+        # only depends on detections before it, so recomputing all of them from the previous estimate
+        # settles after at most one round per link in the longest such chain, usually two rounds.
+        kept = np.zeros(count, dtype=bool)
+        kept[keep] = True
+        same_label = label_ids[:, None] == label_ids[None, :]
+        earlier_kept = np.tril(np.ones((count, count), dtype=bool), k=-1) & kept[None, :] & same_label
+        chained = earlier_kept.any()
+        original_iou = iou_matrix(boxes, boxes)
+        center_x = (boxes[:, 0] + boxes[:, 2]) / 2
+        center_y = (boxes[:, 1] + boxes[:, 3]) / 2
+        rows = np.arange(count)
+        current = boxes
+        for _ in range(count + 1):
+            state_iou = np.where(earlier_kept, iou_matrix(boxes, current), original_iou) if chained else original_iou
+            current_matches = (state_iou >= self.iou_threshold) & same_label
+            match = current_matches.argmax(axis=1)
+            match_boxes = np.where(earlier_kept[rows, match][:, None], current[match], boxes[match])
+
+            # Same order as the original loop: past frames oldest first, then the current frame.
+            # cumsum adds left to right like sum(), so the averages are bit-identical.
+            frames = np.concatenate([matched_frames, current_matches.any(axis=1)[None]])
+            widths = np.concatenate([past_widths, (match_boxes[:, 2] - match_boxes[:, 0])[None]])
+            heights = np.concatenate([past_heights, (match_boxes[:, 3] - match_boxes[:, 1])[None]])
+            matched = frames.sum(axis=0)
+            smooth = kept & (matched > 0)
+            divisor = np.maximum(matched, 1)
+            avg_width = np.cumsum(np.where(frames, widths, 0.0), axis=0)[-1] / divisor
+            avg_height = np.cumsum(np.where(frames, heights, 0.0), axis=0)[-1] / divisor
+            smoothed = np.stack([center_x - avg_width / 2, center_y - avg_height / 2,
+                                 center_x + avg_width / 2, center_y + avg_height / 2], axis=1)
+            updated = np.where(smooth[:, None], smoothed, boxes)
+            converged = not chained or np.array_equal(updated, current)
+            current = updated
+            if converged:
+                break
+
+        # Later frames match against the smoothed boxes
+        history.boxes[slot, :count] = current
+        return keep, current[keep]
+
+    def _filter_small(self, history, slot, boxes, label_ids):
+        """Per-detection loop over the history with the same results as the IoU matrices."""
+        past = history.past_slots()
+        past_counts = history.counts[past].tolist()
+        width = max(past_counts, default=0)
+        past_boxes = history.boxes[past, :width].tolist()
+        past_labels = history.labels[past, :width].tolist()
+        current = boxes.tolist()
+        labels = label_ids.tolist()
+        keep = []
+        for i, label in enumerate(labels):
+            box = current[i]
+            widths = []
+            heights = []
+            for frame_count, frame_boxes, frame_labels in zip(past_counts, past_boxes, past_labels):
+                for k in range(frame_count):
+                    if frame_labels[k] == label and _iou(box, frame_boxes[k]) >= self.iou_threshold:
+                        widths.append(frame_boxes[k][2] - frame_boxes[k][0])
+                        heights.append(frame_boxes[k][3] - frame_boxes[k][1])
+                        break
+            if len(widths) < self.memory_threshold:
+                continue
+            # The current frame, with the smoothed boxes of the detections kept before this one
+            for other_box, other_label in zip(current, labels):
+                if other_label == label and _iou(box, other_box) >= self.iou_threshold:
+                    widths.append(other_box[2] - other_box[0])
+                    heights.append(other_box[3] - other_box[1])
+                    break
+            keep.append(i)
+            if widths:
+                center_x = (box[0] + box[2]) / 2
+                center_y = (box[1] + box[3]) / 2
+                avg_width = sum(widths) / len(widths)
+                avg_height = sum(heights) / len(heights)
+                current[i] = [center_x - avg_width / 2, center_y - avg_height / 2,
+                              center_x + avg_width / 2, center_y + avg_height / 2]
+
+        smoothed = np.array(current, dtype=np.float64)
+        # Later frames match against the smoothed boxes
+        history.boxes[slot, :len(current)] = smoothed
+        keep = np.array(keep, dtype=np.int64)
+        return keep, smoothed[keep]
+
+    def filter(self, camera_id, detections):
+        """
+        Filter a list of detection dicts ("label", "bbox", ...) of one camera.
+
+        Kept detections get the smoothed bbox; while the history fills up all detections are returned.
+        """
+        boxes = np.array([det["bbox"] for det in detections], dtype=np.float64).reshape(-1, 4)
+        keep, smoothed = self.filter_arrays(camera_id, boxes, self._label_array(det["label"] for det in detections))
+        if keep is None:
+            return detections
+        filtered = []
+        for index, box in zip(keep, smoothed):
+            detection = detections[index]
+            detection["bbox"] = box.tolist()
+            filtered.append(detection)
+        return filtered
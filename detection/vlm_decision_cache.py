@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+def perceptual_hash(frame: np.ndarray, is_rgb: bool = False) -> int:
+    """64-bit DCT perceptual hash: sign of the low-frequency DCT coefficients against their median."""
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY if is_rgb else cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(frame, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    bits = low > np.median(low[1:])  # The DC term only carries overall brightness
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+class CachedVlmDetector:
+    def __init__(self, detector, max_distance=6, max_entries=64, ttl=2.0):
+        """
+        LRU cache with TTL in front of a VLM detector, keyed by a perceptual hash of the frame.
+
+        A frame whose hash is within max_distance bits of a cached, unexpired entry reuses that
+        entry's decision instead of querying the detector.
+
+        :param detector: Detector with try_process(frame, is_rgb) and try_process_stereo methods that
+                         return None when no decision was made (e.g. VlmDetector2). Only decisions
+                         are cached, failures fall back to "stop" uncached.
+        :param max_distance: Maximum Hamming distance (0-64, 0-128 for stereo) between hashes that
+                             counts as the same view.
+        :param max_entries: Maximum number of cached decisions, the least recently used is evicted.
+        :param ttl: Seconds a decision may be reused.
+        """
+        self.detector = detector
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # hash -> (direction, time stored)
+
+        # Statistics
+        self.hit_count = 0
+        self.miss_count = 0
+        self.evicted_count = 0
+        self.expired_count = 0
+        self.failed_count = 0
+        self.miss_time = 0.0
+        self.last_distance = None
+
+    def _lookup(self, key, now):
+        # Called with self._lock held
+        for cached_key in [k for k, (_, stored) in self._entries.items() if now - stored > self.ttl]:
+            del self._entries[cached_key]
+            self.expired_count += 1
+
+        best_key, best_distance = None, None
+        for cached_key in self._entries:
+            distance = bin(cached_key ^ key).count("1")
+            if best_distance is None or distance < best_distance:
+                best_key, best_distance = cached_key, distance
+        self.last_distance = best_distance
+        if best_key is None or best_distance > self.max_distance:
+            return None
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key][0]
+
+    def _store(self, key, direction, now):
+        # Called with self._lock held
+        self._entries[key] = (direction, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted_count += 1
+
+    def process(self, frame, is_rgb=False):
+        if frame is None:
+            return self.detector.process(frame)
+        return self._cached(perceptual_hash(frame, is_rgb), self.detector.try_process, frame, is_rgb=is_rgb)
+
+    def process_stereo(self, left_frame, right_frame, is_rgb=False):
+        if left_frame is None or right_frame is None:
+            return self.detector.process_stereo(left_frame, right_frame, is_rgb=is_rgb)
+        # 128-bit key; max_distance applies to both views together
+        key = (perceptual_hash(left_frame, is_rgb) << 64) | perceptual_hash(right_frame, is_rgb)
+        return self._cached(key, self.detector.try_process_stereo, left_frame, right_frame, is_rgb=is_rgb)
+
+    def _cached(self, key, detect, *frames, is_rgb=False):
+        with self._lock:
+            direction = self._lookup(key, time.monotonic())
+            if direction is not None:
+                self.hit_count += 1
+                return direction
+
+        start = time.perf_counter()
+        direction = detect(*frames, is_rgb=is_rgb)
+        elapsed = time.perf_counter() - start
+        if direction is None:
+            # Errors and unparsable answers must not be reused for similar views
+            with self._lock:
+                self.failed_count += 1
+            return "stop"
+        with self._lock:
+            self.miss_count += 1
+            self.miss_time += elapsed
+            # Entries are only valid for ttl after the decision was made
+            self._store(key, direction, time.monotonic())
+        return direction
+
+    def warm_up(self):
+        return self.detector.warm_up()
+
+    def get_stats(self):
+        with self._lock:
+            total = self.hit_count + self.miss_count
+            mean_miss_time = self.miss_time / self.miss_count if self.miss_count else 0.0
+            return {
+                "hits": self.hit_count,
+                "misses": self.miss_count,
+                "hit_rate": self.hit_count / total if total else 0.0,
+                "evicted": self.evicted_count,
+                "expired": self.expired_count,
+                "failed": self.failed_count,
+                "entries": len(self._entries),
+                "time_saved_s": self.hit_count * mean_miss_time,
+                "last_distance": self.last_distance,
+            }
+
+    def cleanup(self):
+        with self._lock:
+            self._entries.clear()
+        self.detector.cleanup()
@@ -1,72 +1,149 @@
-import cv2
+import threading
 import numpy as np
-from PIL import Image
-import tempfile
-import ollama
+from e2e_ad.config import VLM_IMAGE_FORMAT, VLM_IMAGE_QUALITY, VLM_IMAGE_MAX_DIMENSION, OLLAMA_HOST, OLLAMA_KEEP_ALIVE
+from e2e_ad.detection.image_encoder import ImageEncoder
+from e2e_ad.detection.navigation_command import VALID_COMMANDS, COMMAND_INSTRUCTION, COMMAND_SCHEMA, COMMAND_OPTIONS, parse_command, parse_command_prefix
+from e2e_ad.network.ollama_client import OllamaClient
+
+STEREO_LAYOUTS = ("side_by_side", "multi_image")
 
 
 class VlmDetector2:
-    def __init__(self, model_name="moondream"):
+    def __init__(self, model_name="moondream", encoder: ImageEncoder = None, client: OllamaClient = None,
+                 stereo_layout="side_by_side", streaming=False):
         """
         Initialize the VLM processor using Ollama with Moondream model.
+
+        :param encoder: In-memory image encoder, defaults to the VLM_IMAGE_* settings from config.
+        :param client: Shared Ollama client, defaults to one for OLLAMA_HOST with OLLAMA_KEEP_ALIVE.
+        :param stereo_layout: How process_stereo sends both views in one request: "side_by_side"
+                              (one composite image) or "multi_image" (two images in one message).
+        :param streaming: Stream the answer and stop generating as soon as a command is recognized.
         """
+        if stereo_layout not in STEREO_LAYOUTS:
+            raise ValueError(f"Unknown stereo layout '{stereo_layout}', expected one of {', '.join(STEREO_LAYOUTS)}")
         self.model_name = model_name
+        self.stereo_layout = stereo_layout
+        self.streaming = streaming
+        self._stereo_frame = None  # Reused side-by-side composite
+        self._stereo_lock = threading.Lock()
+        self._owns_client = client is None
+        self.client = client or OllamaClient(host=OLLAMA_HOST, keep_alive=OLLAMA_KEEP_ALIVE)
+        self.encoder = encoder or ImageEncoder(
+            format=VLM_IMAGE_FORMAT, quality=VLM_IMAGE_QUALITY, max_dimension=VLM_IMAGE_MAX_DIMENSION
+        )
         self.prompt = (
             "You are a robot that can see using a camera.\n"
             "Your task is to move around the world.\n"
             "DO NOT collide with any objects.\n"
             "Stay away from walls.\n"
-            "Strictly only output one of the following commands:\n"
-            "{forward}, {left}, {right}, {stop}"
+            + COMMAND_INSTRUCTION
         )
-        self.valid_commands = {"forward", "left", "right", "stop"}
-
-    def _frame_to_pil(self, frame: np.ndarray) -> Image.Image:
-        """Convert OpenCV BGR frame to PIL Image."""
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        return Image.fromarray(rgb_frame)
-
-    def _validate_command(self, command: str) -> str:
-        """Validate and normalize the model's output command."""
-        command = command.strip().lower()
-        return command if command in self.valid_commands else "stop"
-
-    def _query_ollama(self, image: Image.Image) -> str:
-        """Send image and prompt to Ollama and get a valid command."""
-        with tempfile.NamedTemporaryFile(suffix=".jpg") as temp_file:
-            image.save(temp_file.name, format="JPEG")
-            response = ollama.chat(
-                model=self.model_name,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": self.prompt,
-                        "images": [temp_file.name],
-                    }
-                ],
+        self.stereo_prompts = {
+            "side_by_side": "The left half of the image is your left camera, the right half your right camera.\n",
+            "multi_image": "The first image is your left camera, the second image your right camera.\n",
+        }
+        self.valid_commands = set(VALID_COMMANDS)
+
+    def _validate_command(self, command: str):
+        """Validate and normalize the model's output command, None if it is not a valid one."""
+        command = parse_command(command)
+        return command if command in self.valid_commands else None
+
+    def _query_ollama(self, images, prompt=None) -> str:
+        """Send the encoded images and prompt to Ollama and get a valid command."""
+        messages = [
+            {
+                "role": "user",
+                "content": prompt or self.prompt,
+                "images": images,
+            }
+        ]
+        # Constrain the answer to the four commands with a few greedy tokens
+        if self.streaming:
+            command, text = self.client.chat_until(
+                self.model_name, messages, parse_command_prefix, format=COMMAND_SCHEMA, options=COMMAND_OPTIONS
             )
+            # After an early stop the text is cut off mid-answer, the command was already decided
+            return command if command is not None else text
+        response = self.client.chat(
+            model=self.model_name,
+            messages=messages,
+            format=COMMAND_SCHEMA,
+            options=COMMAND_OPTIONS,
+        )
         return response["message"]["content"]
 
-    def process(self, frame):
+    def process(self, frame, is_rgb=False):
         """
         Process frames using Ollama and update sensor data with navigation direction.
         Uses the left frame for decision making.
+
+        :param is_rgb: The frame is an RGB model input from FrameCropper.crop_frames_for_model.
         """
+        action = self.try_process(frame, is_rgb)
+        return action if action is not None else "stop"
+
+    def try_process(self, frame, is_rgb=False):
+        """Like process, but return None instead of "stop" when the request failed or the answer was no command."""
         if frame is None:
-            return "stop"
+            return None
 
         try:
-            pil_image = self._frame_to_pil(frame)
-            response = self._query_ollama(pil_image)
+            image = self.encoder.encode(frame, is_rgb)
+            response = self._query_ollama([image])
             action = self._validate_command(response)
             print(f"[DEBUG] VLM Response: {response}", flush=True)
             return action
         except Exception as e:
             print(f"Error in VLM processing: {e}", flush=True)
-            action = "stop"
+            return None
+
+    def _compose_side_by_side(self, left_frame: np.ndarray, right_frame: np.ndarray) -> np.ndarray:
+        height, width = left_frame.shape[:2]
+        shape = (height, width + right_frame.shape[1]) + left_frame.shape[2:]
+        if self._stereo_frame is None or self._stereo_frame.shape != shape or self._stereo_frame.dtype != left_frame.dtype:
+            self._stereo_frame = np.empty(shape, dtype=left_frame.dtype)
+        self._stereo_frame[:, :width] = left_frame
+        self._stereo_frame[:, width:] = right_frame
+        return self._stereo_frame
+
+    def process_stereo(self, left_frame, right_frame, is_rgb=False):
+        """
+        Decide on a navigation direction from both camera views in a single Ollama request.
+
+        :param is_rgb: The frames are RGB model inputs from FrameCropper.crop_frames_for_model.
+        """
+        action = self.try_process_stereo(left_frame, right_frame, is_rgb)
+        return action if action is not None else "stop"
+
+    def try_process_stereo(self, left_frame, right_frame, is_rgb=False):
+        """Like process_stereo, but return None instead of "stop" when no command was obtained."""
+        if left_frame is None or right_frame is None:
+            return self.try_process(left_frame if left_frame is not None else right_frame, is_rgb)
+
+        try:
+            if self.stereo_layout == "side_by_side":
+                with self._stereo_lock:
+                    images = [self.encoder.encode(self._compose_side_by_side(left_frame, right_frame), is_rgb)]
+            else:
+                images = [self.encoder.encode(left_frame, is_rgb), self.encoder.encode(right_frame, is_rgb)]
+            response = self._query_ollama(images, self.stereo_prompts[self.stereo_layout] + self.prompt)
+            action = self._validate_command(response)
+            print(f"[DEBUG] VLM Response (stereo): {response}", flush=True)
+            return action
+        except Exception as e:
+            print(f"Error in stereo VLM processing: {e}", flush=True)
+            return None
+
+    def warm_up(self):
+        """Load the model on the Ollama server before the first decision."""
+        return self.client.warm_up(self.model_name)
 
-        return action
+    def get_stats(self):
+        return self.client.get_stats()
 
     def cleanup(self):
-        """Clean up resources (no-op for Ollama)."""
-        pass
+        """Close the Ollama connection if this detector created it."""
+        if self._owns_client:
+            self.client.close()
@@ -1,13 +1,25 @@
 from transformers import AutoModelForCausalLM, AutoTokenizer
+import textwrap
+import time
 import cv2
 import numpy as np
 from PIL import Image
 from e2e_ad.data.sensor_data import SensorData
 
 class VlmDetector2:
-    def __init__(self, model_name="moondream/moondream-2b-2025-04-14-4bit"):
+    def __init__(self, model_name="moondream/moondream-2b-2025-04-14-4bit", compact_prompt=True, greedy_answer=False,
+                 max_answer_tokens=8, detect_objects=(), point_objects=()):
         """
         Initialize the VLM processor with Moondream model.
+
+        :param compact_prompt: Send the navigation prompt with its whitespace collapsed, prepared once.
+        :param greedy_answer: Answer the navigation prompt with temperature 0 and at most
+                              max_answer_tokens tokens instead of Moondream's default sampling.
+        :param max_answer_tokens: Maximum number of answer tokens when greedy_answer is on.
+        :param detect_objects: Object names passed to model.detect on every frame (e.g. "wall"),
+                               results go to sensor_data.vlm_detections.
+        :param point_objects: Object names passed to model.point on every frame (e.g. "robot"),
+                              results go to sensor_data.vlm_points.
         """
         self.model = AutoModelForCausalLM.from_pretrained(
             model_name,
@@ -29,6 +41,43 @@ class VlmDetector2:
         # Valid commands that the model can output
         self.valid_commands = {'forward', 'left', 'right', 'stop'}
 
+        self.max_answer_tokens = max_answer_tokens
+        self.greedy_answer = greedy_answer
+        self.compact_prompt = compact_prompt
+        self.detect_objects = list(detect_objects)
+        self.point_objects = list(point_objects)
+
+        # Image embedding of the current frame only, replaced when the next frame arrives
+        self._encoded = None
+        self._encoded_key = None
+
+        # Statistics
+        self.call_count = 0
+        self.call_time = 0.0
+        self.encode_count = 0
+        self.encode_time = 0.0
+        self.encode_reused_count = 0
+
+    @property
+    def compact_prompt(self) -> bool:
+        return self._compact_prompt
+
+    @compact_prompt.setter
+    def compact_prompt(self, enabled: bool):
+        # Moondream puts the image tokens before the question, so its attention cache depends on the
+        # image and cannot be reused across frames. Only the prompt text is prepared once; the
+        # indentation of the literal above otherwise costs prefill tokens on every frame.
+        self._compact_prompt = enabled
+        self._query_prompt = " ".join(textwrap.dedent(self.prompt).split()) if enabled else self.prompt
+        self.call_count = 0
+        self.call_time = 0.0
+
+    @property
+    def _query_settings(self):
+        if not self.greedy_answer:
+            return None
+        return {"temperature": 0.0, "max_tokens": self.max_answer_tokens}
+
     def _frame_to_pil(self, frame: np.ndarray) -> Image.Image:
         """Convert OpenCV BGR frame to PIL Image."""
         # Convert BGR to RGB
@@ -42,6 +91,55 @@ class VlmDetector2:
             return 'stop'  # Default to stop if invalid command
         return command
 
+    def encode_frame(self, image: Image.Image, frame_key=None):
+        """
+        Return the Moondream image embedding of a frame, encoding it only once per frame.
+
+        Only the embedding of the most recent frame is kept; a new frame_key frees the previous one.
+
+        :param frame_key: Identifies the frame (e.g. its capture timestamp), None always encodes.
+        """
+        if frame_key is not None and frame_key == self._encoded_key and self._encoded is not None:
+            self.encode_reused_count += 1
+            return self._encoded
+
+        # Drop the previous frame's embedding before allocating the next one
+        self._encoded = None
+        self._encoded_key = None
+        start = time.perf_counter()
+        encoded = self.model.encode_image(image)
+        self.encode_time += time.perf_counter() - start
+        self.encode_count += 1
+        if frame_key is not None:
+            self._encoded, self._encoded_key = encoded, frame_key
+        return encoded
+
+    def run_queries(self, image: Image.Image, queries, frame_key=None) -> dict:
+        """
+        Run several Moondream skills against a single image embedding.
+
+        :param image: Frame as PIL Image.
+        :param queries: List of (name, skill, argument) with skill "query" (argument: question),
+                        "detect" or "point" (argument: object name).
+        :param frame_key: See encode_frame; later calls with the same key reuse the embedding.
+        :return: dict mapping each name to the answer text, the objects or the points.
+        """
+        encoded = self.encode_frame(image, frame_key)
+        results = {}
+        for name, skill, argument in queries:
+            if skill == "query":
+                if argument == self._query_prompt and self._query_settings is not None:
+                    results[name] = self.model.query(encoded, argument, settings=self._query_settings)["answer"]
+                else:
+                    results[name] = self.model.query(encoded, argument)["answer"]
+            elif skill == "detect":
+                results[name] = self.model.detect(encoded, argument)["objects"]
+            elif skill == "point":
+                results[name] = self.model.point(encoded, argument)["points"]
+            else:
+                raise ValueError(f"Unknown Moondream skill '{skill}'")
+        return results
+
     def process(self, sensor_data: SensorData) -> SensorData:
         """
         Process frames using Moondream and update sensor data with navigation direction.
@@ -51,15 +149,40 @@ class VlmDetector2:
             return sensor_data
 
         try:
-            # Convert frame to PIL Image
-            pil_image = self._frame_to_pil(sensor_data.left_frame)
-            
-            # Get model's response
-            response = self.model.query(pil_image, self.prompt)
-            command = self._validate_command(response["answer"])
+            # Convert frame to PIL Image, preferring the model-ready RGB input from the cropper
+            if sensor_data.left_model_input is not None:
+                pil_image = Image.fromarray(sensor_data.left_model_input)
+            else:
+                pil_image = self._frame_to_pil(sensor_data.left_frame)
+
+            queries = [("direction", "query", self._query_prompt)]
+            queries += [(f"detect:{name}", "detect", name) for name in self.detect_objects]
+            queries += [(f"point:{name}", "point", name) for name in self.point_objects]
+
+            # Get model's responses, all from one image embedding
+            start = time.perf_counter()
+            results = self.run_queries(pil_image, queries, frame_key=sensor_data.timestamp)
+            self.call_time += time.perf_counter() - start
+            self.call_count += 1
+            command = self._validate_command(results["direction"])
             
             # Update sensor data with the direction
             sensor_data.vlm_direction = command
+
+            height, width = sensor_data.left_frame.shape[:2]
+            for name in self.detect_objects:
+                for obj in results[f"detect:{name}"]:
+                    # Moondream returns normalized coordinates
+                    sensor_data.vlm_detections.append({
+                        "label": name,
+                        "bbox": [obj["x_min"] * width, obj["y_min"] * height, obj["x_max"] * width, obj["y_max"] * height],
+                        "confidence": None,
+                        "camera_width": width,
+                        "camera_height": height,
+                    })
+            for name in self.point_objects:
+                for point in results[f"point:{name}"]:
+                    sensor_data.vlm_points.append({"label": name, "x": point["x"] * width, "y": point["y"] * height})
             
         except Exception as e:
             print(f"Error in VLM processing: {e}")
@@ -67,7 +190,20 @@ class VlmDetector2:
             
         return sensor_data
 
+    def get_stats(self):
+        """Per-call query latency since compact_prompt was last switched on or off."""
+        return {
+            "compact_prompt": self.compact_prompt,
+            "greedy_answer": self.greedy_answer,
+            "calls": self.call_count,
+            "mean_query_ms": self.call_time / self.call_count * 1000 if self.call_count else None,
+            "encoded": self.encode_count,
+            "encode_reused": self.encode_reused_count,
+            "mean_encode_ms": self.encode_time / self.encode_count * 1000 if self.encode_count else None,
+        }
+
     def cleanup(self):
         """Clean up model resources."""
+        self._encoded = None
         if hasattr(self, 'model'):
             del self.model 
\ No newline at end of file
@@ -1,12 +1,12 @@
-import cv2
 import numpy as np
 from PIL import Image
-import ollama
-import tempfile
+from typing import Union
+from e2e_ad.config import OLLAMA_HOST, OLLAMA_KEEP_ALIVE
+from e2e_ad.data.sensor_data import SensorData
 from e2e_ad.data.sensor_data_hub import SensorDataHub
-
-
-VALID_COMMANDS = {"forward", "left", "right", "stop"}
+from e2e_ad.detection.image_encoder import ImageEncoder
+from e2e_ad.detection.navigation_command import VALID_COMMANDS, COMMAND_INSTRUCTION, COMMAND_SCHEMA, COMMAND_OPTIONS, parse_command, parse_command_prefix
+from e2e_ad.network.ollama_client import OllamaClient
 
 
 def build_prompt() -> str:
@@ -15,43 +15,62 @@ def build_prompt() -> str:
         "Your task is to move around the world.\n"
         "DO NOT collide with any objects.\n"
         "Stay away from walls.\n"
-        "Strictly only output one of the following commands:\n"
-        "{forward}, {left}, {right}, {stop}"
+        + COMMAND_INSTRUCTION
     )
 
 
-def _frame_to_pil(frame: np.ndarray) -> Image.Image:
-    """Convert OpenCV BGR frame to a PIL RGB Image."""
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    return Image.fromarray(rgb_frame)
+_default_encoder = None
+_default_client = None
 
 
-def get_robot_command(image: Image.Image, model_name: str = "qwen2.5vl:3b") -> str:
+def get_robot_command(image: Union[np.ndarray, Image.Image], model_name: str = "qwen2.5vl:3b",
+                      encoder: ImageEncoder = None, stream: bool = False, client: OllamaClient = None) -> str:
     """
-    Sends a PIL image and prompt to the Ollama model and returns one valid command.
+    Sends an image and prompt to the Ollama model and returns one valid command.
+
+    The image is a BGR frame or a PIL RGB image; it is encoded in memory and sent as bytes.
+    With stream set, generation is aborted as soon as the answer names a command.
+    Requests go through the given OllamaClient, or a shared one for OLLAMA_HOST with OLLAMA_KEEP_ALIVE.
     """
+    global _default_encoder, _default_client
+    if encoder is None:
+        if _default_encoder is None:
+            _default_encoder = ImageEncoder()
+        encoder = _default_encoder
+    if client is None:
+        if _default_client is None:
+            _default_client = OllamaClient(host=OLLAMA_HOST, keep_alive=OLLAMA_KEEP_ALIVE)
+        client = _default_client
     prompt_text = build_prompt()
 
-    # Save the image temporarily (Ollama currently supports image file paths, not PIL objects)
-    with tempfile.NamedTemporaryFile(suffix=".jpg") as temp:
-        image.save(temp.name, format="JPEG")
-
-        response = ollama.chat(
-            model=model_name,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt_text,
-                    "images": [temp.name],  # Provide path to JPEG
-                }
-            ],
+    if isinstance(image, Image.Image):
+        image_bytes = encoder.encode(np.asarray(image.convert("RGB")), is_rgb=True)
+    else:
+        image_bytes = encoder.encode(image)
+
+    messages = [
+        {
+            "role": "user",
+            "content": prompt_text,
+            "images": [image_bytes],
+        }
+    ]
+
+    if stream:
+        command, answer = client.chat_until(
+            model_name, messages, parse_command_prefix, format=COMMAND_SCHEMA, options=COMMAND_OPTIONS
         )
-
-    command = response["message"]["content"].strip().lower()
-
-    if command not in VALID_COMMANDS:
+        if command is None:
+            # Free-text answers are only decided once complete
+            command = parse_command(answer)
+    else:
+        response = client.chat(model_name, messages, format=COMMAND_SCHEMA, options=COMMAND_OPTIONS)
+        answer = response["message"]["content"]
+        command = parse_command(answer)
+
+    if command is None:
         raise ValueError(
-            f"Ollama returned invalid command '{command}'. "
+            f"Ollama returned invalid command '{answer.strip()}'. "
             f"Expected one of {', '.join(sorted(VALID_COMMANDS))}."
         )
     return command
@@ -59,23 +78,28 @@ def get_robot_command(image: Image.Image, model_name: str = "qwen2.5vl:3b") -> s
 
 class VlmDetector:
     """
-    Detector using Ollama with PIL Images instead of base64.
+    Detector using Ollama with in-memory encoded images.
     """
 
-    def __init__(self, model_name: str, hub: SensorDataHub):
+    def __init__(self, model_name: str, hub: SensorDataHub, encoder: ImageEncoder = None, client: OllamaClient = None):
         self.model_name = model_name
         self.hub = hub
+        self.encoder = encoder or ImageEncoder()
+        self.client = client or OllamaClient(host=OLLAMA_HOST, keep_alive=OLLAMA_KEEP_ALIVE)
 
     def detect(self, frame, camera_id: str):
         """
-        Accepts an OpenCV frame, converts to PIL, and queries Ollama for movement command.
+        Accepts an OpenCV frame, encodes it in memory, and queries Ollama for movement command.
         """
         try:
-            pil_image = _frame_to_pil(frame)
-            action = get_robot_command(pil_image, model_name=self.model_name)
+            action = get_robot_command(frame, model_name=self.model_name, encoder=self.encoder, client=self.client)
         except Exception as e:
             print(f"Ollama error: {e}")
             action = "stop"
 
-        self.hub.update({"direction": action})
+        self.hub.update(SensorData(vlm_direction=action))
         return []
+
+    def get_stats(self):
+        """Return the Ollama latency statistics (see OllamaClient.get_stats)."""
+        return self.client.get_stats()
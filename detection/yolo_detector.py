@@ -1,25 +1,73 @@
-from ultralytics import YOLO
+import numpy as np
 from e2e_ad.config import CLASS_MAPPING
+from e2e_ad.data.detection_batch import DetectionBatch
+from e2e_ad.detection.temporal_filter import TemporalConsistencyFilter
 
 class YoloDetector:
-    def __init__(self, model_path, detection_memory_size=5, memory_threshold=2, iou_threshold=0.3):
+    def __init__(self, model_path, detection_memory_size=5, memory_threshold=2, iou_threshold=0.3,
+                 num_threads=None, int8=False, columnar=False):
         """
+        :param model_path: Ultralytics model (e.g. a TensorRT .engine, run on CUDA), or an exported
+                           .onnx model, run on the CPU with ONNX Runtime.
         :param detection_memory_size: Number of frames to remember for temporal smoothing.
         :param memory_threshold: Minimum number of past frames in which a similar detection must appear.
         :param iou_threshold: IoU threshold to consider two detections as matching.
+        :param num_threads: ONNX Runtime intra-op threads, None uses all physical cores.
+        :param int8: Run the .onnx model with int8-quantized weights.
+        :param columnar: Return a DetectionBatch from detect and detect_batch instead of a list of dictionaries.
         """
-        self.model = YOLO(model_path, task='detect')
-        # Maintain separate detection histories per camera (e.g., 'left' and 'right')
-        self.detection_history = {}
+        self.onnx = model_path.endswith('.onnx')
+        if self.onnx:
+            # Imported here, so CPU-only nodes need neither ultralytics nor torch
+            from e2e_ad.detection.onnx_yolo_backend import OnnxYoloBackend
+            self.model = OnnxYoloBackend(model_path, num_threads=num_threads, int8=int8)
+        else:
+            from ultralytics import YOLO
+            self.model = YOLO(model_path, task='detect')
+        # Maintains separate detection histories per camera (e.g., 'left' and 'right')
+        self.temporal_filter = TemporalConsistencyFilter(detection_memory_size, memory_threshold, iou_threshold)
         self.detection_memory_size = detection_memory_size
         self.memory_threshold = memory_threshold
         self.iou_threshold = iou_threshold
+        # Cleared when the model rejects batches (e.g. a TensorRT engine exported with a static batch size of 1)
+        self.batch_supported = not self.onnx
+        self.columnar = columnar
+        # Label per class id, extended when the model reports ids beyond CLASS_MAPPING
+        self._labels = np.array([CLASS_MAPPING.get(i, str(i)) for i in range(max(CLASS_MAPPING, default=-1) + 1)])
 
     def predict(self, frame):
-        """Run inference on a frame."""
+        """Run inference on a frame, or on a list of frames in one batch."""
+        if self.onnx:
+            # Batch size 1, returns an (xyxy, conf, cls) tuple
+            return [self.model.predict(frame)]
         return self.model.predict(frame, stream=False, device='cuda', verbose=False)
 
-    def extract_detections(self, frame, predictions):
+    def predict_batch(self, frames):
+        """Run inference on a list of frames, in one batch if the model allows it. Returns one result per frame."""
+        if self.batch_supported and len(frames) > 1:
+            try:
+                return self.predict(list(frames))
+            except Exception as e:
+                print(f"[Warning] Batched YOLO inference failed ({e}), predicting frames one by one.")
+                self.batch_supported = False
+        return [self.predict(frame)[0] for frame in frames]
+
+    @staticmethod
+    def prediction_arrays(predictions):
+        """
+        Copy the boxes of a YOLO result to the host in one transfer.
+        :return: (xyxy, conf, cls) arrays of shapes (N, 4) float32, (N,) float32 and (N,) int64.
+        """
+        if isinstance(predictions, tuple):
+            # ONNX backend result, already on the host
+            return predictions
+        if not hasattr(predictions, 'boxes') or predictions.boxes is None:
+            return np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        # Rows are [x1, y1, x2, y2, (track id,) conf, cls]
+        data = predictions.boxes.data.cpu().numpy()
+        return data[:, :4], data[:, -2], data[:, -1].astype(np.int64)
+
+    def extract_detections(self, frame, predictions, as_arrays=False):
         """
         Given a YOLO result as predictions, extract a list of dictionaries for each detection.
         Each dictionary contains:
@@ -27,107 +75,70 @@ class YoloDetector:
         - bbox: [x1, y1, x2, y2] (in pixels)
         - confidence: confidence score (float)
         - camera_width, camera_height: for computing relative area
+        :param as_arrays: Return the (xyxy, conf, cls) arrays of prediction_arrays instead of dictionaries.
         """
-        detections = []
-        if not hasattr(predictions, 'boxes') or predictions.boxes is None:
-            return detections
+        arrays = self.prediction_arrays(predictions)
+        if as_arrays:
+            return arrays
+        return self.detections_from_arrays(frame, *arrays)
 
+    @staticmethod
+    def detections_from_arrays(frame, xyxy, conf, cls):
+        """Build the extract_detections dictionaries from (N, 4) boxes, (N,) confidences and (N,) class ids."""
         frame_width = frame.shape[1]
         frame_height = frame.shape[0]
-
-        for box in predictions.boxes:
-            xyxy = box.xyxy[0].cpu().numpy().tolist()  # [x1, y1, x2, y2]
-            conf = float(box.conf[0])
-            cls_id = int(box.cls[0])
-            label = CLASS_MAPPING.get(cls_id, str(cls_id))
-
-            detections.append({
-                "label": label,
-                "bbox": xyxy,
-                "confidence": conf,
+        return [
+            {
+                "label": CLASS_MAPPING.get(cls_id, str(cls_id)),
+                "bbox": bbox,
+                "confidence": confidence,
                 "camera_width": frame_width,
                 "camera_height": frame_height
-            })
-        return detections
+            }
+            for bbox, confidence, cls_id in zip(xyxy.tolist(), conf.tolist(), cls.tolist())
+        ]
 
-    @staticmethod
-    def compute_iou(bbox1, bbox2):
-        x_left = max(bbox1[0], bbox2[0])
-        y_top = max(bbox1[1], bbox2[1])
-        x_right = min(bbox1[2], bbox2[2])
-        y_bottom = min(bbox1[3], bbox2[3])
-        if x_right < x_left or y_bottom < y_top:
-            return 0.0
-        intersection_area = (x_right - x_left) * (y_bottom - y_top)
-        area1 = (bbox1[2] - bbox1[0]) * (bbox1[3] - bbox1[1])
-        area2 = (bbox2[2] - bbox2[0]) * (bbox2[3] - bbox2[1])
-        union_area = area1 + area2 - intersection_area
-        if union_area == 0:
-            return 0.0
-        return intersection_area / union_area
+    def labels(self, cls):
+        """Labels of an array of class ids, as mapped by CLASS_MAPPING."""
+        if len(cls) and cls.max() >= len(self._labels):
+            self._labels = np.array([CLASS_MAPPING.get(i, str(i)) for i in range(cls.max() + 1)])
+        return self._labels[cls]
 
-    def smooth_box_size(self, detection, history):
+    def _filter(self, frame, prediction, camera_id, as_arrays):
         """
-        Smooth only the size of the bbox (width and height) by averaging over matching detections 
-        in the history, while keeping the current center intact.
+        Filter detections based on temporal consistency for this camera,
+        returning the current detections for the initial frames to bootstrap memory.
         """
-        x1, y1, x2, y2 = detection["bbox"]
-        center = [(x1 + x2) / 2, (y1 + y2) / 2]
-        widths = []
-        heights = []
-        for frame in history:
-            for det in frame:
-                if det["label"] == detection["label"]:
-                    if self.compute_iou(detection["bbox"], det["bbox"]) >= self.iou_threshold:
-                        bw = det["bbox"][2] - det["bbox"][0]
-                        bh = det["bbox"][3] - det["bbox"][1]
-                        widths.append(bw)
-                        heights.append(bh)
-                        break  # Only one match per frame.
-        if widths and heights:
-            avg_width = sum(widths) / len(widths)
-            avg_height = sum(heights) / len(heights)
-            new_x1 = center[0] - avg_width / 2
-            new_y1 = center[1] - avg_height / 2
-            new_x2 = center[0] + avg_width / 2
-            new_y2 = center[1] + avg_height / 2
-            return [new_x1, new_y1, new_x2, new_y2]
-        return detection["bbox"]
+        if not as_arrays and not self.columnar:
+            return self.temporal_filter.filter(camera_id, self.extract_detections(frame, prediction))
+        xyxy, conf, cls = self.prediction_arrays(prediction)
+        keep, boxes = self.temporal_filter.filter_arrays(camera_id, xyxy.astype(np.float64), cls)
+        if keep is not None:
+            conf, cls = conf[keep], cls[keep]
+        if as_arrays:
+            return boxes, conf, cls
+        return DetectionBatch(boxes, self.labels(cls), conf, camera_width=frame.shape[1], camera_height=frame.shape[0])
 
-    def detect(self, frame, camera_id):
+    def detect(self, frame, camera_id, as_arrays=False):
         """
         Detect objects in a given frame from a specific camera.
         :param frame: Input image frame.
         :param camera_id: Identifier for the camera (e.g., 'left' or 'right').
+        :param as_arrays: Return (xyxy, conf, cls) arrays instead of dictionaries. The temporal
+                          history then matches class ids instead of labels, so use one form per camera.
+        :return: List of detection dictionaries, or a DetectionBatch when columnar.
         """
         predictions = self.predict(frame)
-        current_detections = self.extract_detections(frame, predictions[0])
-        
-        # Initialize history for camera if not present
-        if camera_id not in self.detection_history:
-            self.detection_history[camera_id] = []
-        
-        # Update detection history for this camera
-        self.detection_history[camera_id].append(current_detections)
-        if len(self.detection_history[camera_id]) > self.detection_memory_size:
-            self.detection_history[camera_id].pop(0)
-        
-        # For initial frames, return current detections to bootstrap memory.
-        if len(self.detection_history[camera_id]) < self.detection_memory_size:
-            return current_detections
-        
-        # Filter detections based on temporal consistency for this camera.
-        filtered_detections = []
-        for det in current_detections:
-            consistent_count = 0
-            for past_frame in self.detection_history[camera_id][:-1]:
-                for past_det in past_frame:
-                    if past_det["label"] == det["label"]:
-                        if self.compute_iou(det["bbox"], past_det["bbox"]) >= self.iou_threshold:
-                            consistent_count += 1
-                            break  # Only count one match per past frame.
-            if consistent_count >= self.memory_threshold:
-                # Only smooth the box size while keeping the current center.
-                det["bbox"] = self.smooth_box_size(det, self.detection_history[camera_id])
-                filtered_detections.append(det)
-        return filtered_detections
+        return self._filter(frame, predictions[0], camera_id, as_arrays)
+
+    def detect_batch(self, frames, camera_ids, as_arrays=False):
+        """
+        Detect objects in one frame per camera with a single inference call.
+        :param frames: Input image frames, one per camera.
+        :param camera_ids: Camera identifiers in the same order (e.g., ['left', 'right']).
+        :param as_arrays: See detect.
+        :return: List of filtered detections per camera, in the order of camera_ids.
+        """
+        predictions = self.predict_batch(frames)
+        return [self._filter(frame, prediction, camera_id, as_arrays)
+                for frame, prediction, camera_id in zip(frames, predictions, camera_ids)]
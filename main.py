@@ -1,23 +1,36 @@
+import functools
+import json
 import os
 import sys
 import cv2
 import threading
 import time
 
-from e2e_ad.config import DISTANCES_PATH, MODEL_PATH, CROP_PATH
+from e2e_ad.config import DISTANCES_PATH, MODEL_PATH, CROP_PATH, STEREO_SYNC_TOLERANCE, VLM_INPUT_SIZE, MULTIPROCESS_PIPELINE
+from e2e_ad.config import VLM_ASYNCHRONOUS, VLM_MAX_IN_FLIGHT, VLM_MAX_DECISION_AGE
+from e2e_ad.config import VLM_CACHE_SIZE, VLM_CACHE_TTL, VLM_CACHE_MAX_DISTANCE, VLM_STEREO, VLM_STEREO_LAYOUT
+from e2e_ad.config import VLM_CASCADE, VLM_STREAMING, YOLO_NUM_THREADS, YOLO_INT8, YOLO_COLUMNAR
 from e2e_ad.camera.dual_camera_capture import DualCameraCapture
-from e2e_ad.camera.frame_cropper_pytorch import FrameCropper
+from e2e_ad.camera.stereo_synchronizer import StereoSynchronizer
+from e2e_ad.camera.frame_cropper_factory import create_frame_cropper
 from e2e_ad.data.metrics_loader import MetricsLoader
 from e2e_ad.data.sensor_data_hub import SensorDataHub
+from e2e_ad.data.session_recorder import SessionRecorder
 from e2e_ad.detection.distance_estimator import DistanceEstimator
 #from e2e_ad.detection.yolo_detector import YoloDetector
 from e2e_ad.detection.vlm_detector2 import VlmDetector2
+from e2e_ad.detection.vlm_decision_cache import CachedVlmDetector
 from e2e_ad.visualizing.frame_visualizer import FrameVisualizer
 from e2e_ad.processing.processing_pipeline_manager import ProcessingPipelineManager
 from e2e_ad.processing.vlm_detection_processor import VmlDetectionProcessor
 from e2e_ad.processing.distance_estimation_processor import DistanceEstimationProcessor
+from e2e_ad.processing.detection_processor import DetectionProcessor
+from e2e_ad.processing.cascade_processor import CascadeProcessor
 from e2e_ad.processing.tracking_processor import TrackingProcessor
 from e2e_ad.processing.visualizing_processor import VisualizingProcessor
+from e2e_ad.processing.recording_processor import RecordingProcessor
+from e2e_ad.processing.change_detection_processor import ChangeDetectionProcessor, SceneChangeDetector
+from e2e_ad.processing.multiprocess_pipeline import MultiProcessPipeline
 from e2e_ad.network.websocket_client import WebSocketClient
 from e2e_ad.navigation.autonomous_navigator import AutonomousNavigator
 from e2e_ad.navigation.vlm_behavior_strategy import VlmBehaviorStrategy
@@ -25,19 +38,66 @@ from e2e_ad.rendering.dual_camera_renderer import DualCameraRenderer
 from e2e_ad.rendering.sensor_data_renderer import SensorDataRenderer
 #from e2e_ad.tracking.deepsort_tracker import DeepSortTracker
 
-def frame_processing_loop(capture, processing_pipeline_manager: ProcessingPipelineManager, frame_cropper, stop_event):
-    """Continuously process frames and update the SensorDataHub."""
+def build_vlm_modules(vlm_detector=None):
+    """Create the expensive processing modules (also called inside the multi-process worker)."""
+    vlm_detector = vlm_detector or VlmDetector2(stereo_layout=VLM_STEREO_LAYOUT, streaming=VLM_STREAMING)
+    # Load the model before the navigator can be enabled, so the first decisions are not cold starts
+    vlm_detector.warm_up()
+    if VLM_CACHE_SIZE:
+        # Near-duplicate views reuse a recent decision
+        vlm_detector = CachedVlmDetector(
+            vlm_detector, max_distance=VLM_CACHE_MAX_DISTANCE, max_entries=VLM_CACHE_SIZE, ttl=VLM_CACHE_TTL
+        )
+    # Skip the VLM while the scene is static, for at most a second. Asynchronously this gates the
+    # submissions, since the decision attached to a frame comes from an earlier one anyway.
+    change_detector = SceneChangeDetector(max_reuse_age=1.0) if VLM_ASYNCHRONOUS else None
+    vlm_processor = VmlDetectionProcessor(
+        vlm_detector, asynchronous=VLM_ASYNCHRONOUS,
+        max_in_flight=VLM_MAX_IN_FLIGHT, max_decision_age=VLM_MAX_DECISION_AGE, stereo=VLM_STEREO,
+        change_detector=change_detector
+    )
+    if VLM_CASCADE:
+        # Imported here, ultralytics is only needed for the cascade
+        from e2e_ad.detection.yolo_detector import YoloDetector
+        metrics = MetricsLoader(DISTANCES_PATH).load_metrics()
+        cheap_modules = [
+            DetectionProcessor(YoloDetector(MODEL_PATH, num_threads=YOLO_NUM_THREADS, int8=YOLO_INT8, columnar=YOLO_COLUMNAR)),
+            DistanceEstimationProcessor(DistanceEstimator(metrics)),
+        ]
+        vlm_processor = CascadeProcessor(cheap_modules, vlm_processor)
+    if VLM_ASYNCHRONOUS:
+        return [vlm_processor]
+    # Synchronously, the last decision is reused while the scene is static
+    return [ChangeDetectionProcessor([vlm_processor], max_reuse_age=1.0)]
+
+def frame_processing_loop(synchronizer, processing_pipeline_manager: ProcessingPipelineManager, frame_cropper, frame_pool, stop_event):
+    """Process every new, time-matched frame pair and update the SensorDataHub."""
     while not stop_event.is_set():
         try:
-            left_frame = capture.frames.get(0)
-            right_frame = capture.frames.get(1)
-
-            if left_frame is not None and right_frame is not None:
-                left_frame, right_frame = frame_cropper.crop_frames(left_frame, right_frame)
-                if left_frame is not None and right_frame is not None:
-                    processing_pipeline_manager.process_and_update(left_frame, right_frame)
-            else:
-                time.sleep(0.01)
+            # Wake up as soon as a new stereo pair within the skew tolerance is available
+            pair = synchronizer.wait_for_pair(timeout=0.5)
+            if pair is None:
+                continue
+            left_entry, right_entry = pair
+
+            try:
+                # Cropped frames and VLM inputs (resize + BGR->RGB, derived from the same read of the raw frames)
+                # live in pooled buffers that are shared with the hub, renderer, recorder and the async VLM stage
+                left_buffer, right_buffer, left_input, right_input = frame_cropper.crop_frames_with_model_input(
+                    left_entry.frame, right_entry.frame, frame_pool
+                )
+            finally:
+                left_entry.release()
+                right_entry.release()
+
+            if left_buffer is not None and right_buffer is not None:
+                buffers = [buffer for buffer in (left_buffer, right_buffer, left_input, right_input) if buffer is not None]
+                processing_pipeline_manager.process_and_update(
+                    left_buffer.array, right_buffer.array,
+                    left_input.array if left_input is not None else None,
+                    right_input.array if right_input is not None else None,
+                    buffers=buffers, timestamp=left_entry.timestamp
+                )
         
         except Exception as e:
             print(f"Error in processing loop: {e}")
@@ -48,6 +108,7 @@ def main():
     robot_ip = sys.argv[1] if len(sys.argv) > 1 else "192.168.43.199"
     stream_port = int(sys.argv[2]) if len(sys.argv) > 2 else 8554
     ws_port = int(sys.argv[3]) if len(sys.argv) > 3 else 8000
+    record_dir = sys.argv[4] if len(sys.argv) > 4 else None
 
     stop_event = threading.Event()
 
@@ -59,14 +120,9 @@ def main():
     #detector = YoloDetector(MODEL_PATH)
     #distance_estimator = DistanceEstimator(metrics)
 
-    # Initialize camera capture
+    # Camera streams
     stream1_url = f"rtsp://{robot_ip}:{stream_port}/cam0"
     stream2_url = f"rtsp://{robot_ip}:{stream_port}/cam1"
-    capture = DualCameraCapture(stream1_url, stream2_url)
-    capture.start()
-
-    # Initialize frame cropper
-    cropper = FrameCropper(CROP_PATH)
 
     # Initialize frame visualizer
     visualizer = FrameVisualizer()
@@ -74,23 +130,64 @@ def main():
     # Create a shared sensor data hub
     sensor_data_hub = SensorDataHub()
 
-    # Initialize VLM processor
-    vlm_detector = VlmDetector2()
+    # Optionally record the session; the recorder writes from a background thread
+    recorder = SessionRecorder(record_dir, compression="jpeg") if record_dir else None
+
+    if MULTIPROCESS_PIPELINE:
+        # Capture/cropping and the VLM run in their own processes, frames travel via shared memory
+        with open(CROP_PATH, "r") as f:
+            crop_config = json.load(f)
+        crop_bytes = crop_config["crop_width"] * crop_config["crop_height"] * 3
+        model_input_bytes = VLM_INPUT_SIZE[0] * VLM_INPUT_SIZE[1] * 3
+        processing_pipeline_manager = MultiProcessPipeline(
+            sensor_data_hub,
+            capture_factory=functools.partial(DualCameraCapture, stream1_url, stream2_url),
+            cropper_factory=functools.partial(create_frame_cropper, CROP_PATH, backend="auto", model_input_size=VLM_INPUT_SIZE),
+            worker_module_factory=build_vlm_modules,
+            slot_size=2 * crop_bytes + 2 * model_input_bytes + 1024,
+            sync_tolerance=STEREO_SYNC_TOLERANCE,
+        )
+        capture = synchronizer = cropper = vlm_detector = vlm_processor = cascade = change_detection = processing_thread = None
+    else:
+        # Initialize camera capture
+        capture = DualCameraCapture(stream1_url, stream2_url)
+        capture.start()
+
+        # Pair left/right frames by capture timestamp
+        synchronizer = StereoSynchronizer.from_capture(capture, tolerance=STEREO_SYNC_TOLERANCE)
+
+        # Initialize frame cropper, picking the fastest backend available on this machine
+        cropper = create_frame_cropper(CROP_PATH, backend="auto", model_input_size=VLM_INPUT_SIZE)
+
+        # Initialize VLM processor
+        vlm_detector = VlmDetector2(stereo_layout=VLM_STEREO_LAYOUT, streaming=VLM_STREAMING)
+
+        # Initialize Processing Pipeline Manager
+        processing_pipeline_manager = ProcessingPipelineManager(sensor_data_hub)
+        vlm_processor, = build_vlm_modules(vlm_detector)
+        processing_pipeline_manager.register_module(vlm_processor)
+        change_detection = cascade = None
+        if isinstance(vlm_processor, ChangeDetectionProcessor):
+            change_detection, (vlm_processor,) = vlm_processor, vlm_processor.modules
+        if isinstance(vlm_processor, CascadeProcessor):
+            cascade, vlm_processor = vlm_processor, vlm_processor.vlm_module
+        #processing_pipeline_manager.register_module(DistanceEstimationProcessor(distance_estimator))
+        #processing_pipeline_manager.register_module(VlmProcessor(vlm_processor))
 
-    # Initialize Processing Pipeline Manager
-    processing_pipeline_manager = ProcessingPipelineManager(sensor_data_hub)
-    processing_pipeline_manager.register_module(VmlDetectionProcessor(vlm_detector))
-    #processing_pipeline_manager.register_module(DistanceEstimationProcessor(distance_estimator))
-    #processing_pipeline_manager.register_module(VlmProcessor(vlm_processor))
     processing_pipeline_manager.register_module(VisualizingProcessor(visualizer))
+    if recorder is not None:
+        processing_pipeline_manager.register_module(RecordingProcessor(recorder))
 
-    # Start frame processing in a separate thread
-    processing_thread = threading.Thread(
-        target=frame_processing_loop,
-        args=(capture, processing_pipeline_manager, cropper, stop_event),
-        daemon=True
-    )
-    processing_thread.start()
+    if MULTIPROCESS_PIPELINE:
+        processing_pipeline_manager.start()
+    else:
+        # Start frame processing in a separate thread
+        processing_thread = threading.Thread(
+            target=frame_processing_loop,
+            args=(synchronizer, processing_pipeline_manager, cropper, capture.pool, stop_event),
+            daemon=True
+        )
+        processing_thread.start()
 
     # Initialize the renderer
     dual_camera_renderer = DualCameraRenderer(window_name="Robot Navigation")
@@ -105,7 +202,7 @@ def main():
     strategy = VlmBehaviorStrategy()
 
     # Initialize Autonomous Navigator
-    navigator = AutonomousNavigator(sensor_data_hub, ws_client, strategy, decision_interval=0.5)
+    navigator = AutonomousNavigator(sensor_data_hub, ws_client, strategy, decision_interval=0.5, recorder=recorder)
 
     print("Press ESC to exit.")
     print("Press SPACE to toggle autonomous driving on/off.")
@@ -127,29 +224,58 @@ def main():
                 renderer.render_enriched = not renderer.render_enriched
                 print("Display mode:", "ENRICHED" if renderer.render_enriched else "RAW")
 
-            sensor_data = sensor_data_hub.get_latest()
+            # Keep the pooled frames alive while rendering
+            sensor_data = sensor_data_hub.acquire_latest()
             if sensor_data is not None:
-                renderer.show(sensor_data)
-            else:
-                dual_camera_renderer.show(capture.frames)
+                try:
+                    renderer.show(sensor_data)
+                finally:
+                    sensor_data.release()
+            elif capture is not None:
+                # Nothing processed yet: show the raw frames, again retained while on screen
+                raw_data = capture.acquire_latest()
+                if raw_data is not None:
+                    try:
+                        dual_camera_renderer.show({0: raw_data.left_frame, 1: raw_data.right_frame})
+                    finally:
+                        raw_data.release()
 
     except KeyboardInterrupt:
         print("Keyboard interrupt received, shutting down.")
     finally:
         # Signal the processing thread to stop
         stop_event.set()
-        # Wait for the processing thread to finish
-        if processing_thread.is_alive():
-            processing_thread.join(timeout=2.0)
-        # Clean up resources
-        cropper.cleanup()
-        vlm_detector.cleanup()
+        if MULTIPROCESS_PIPELINE:
+            processing_pipeline_manager.stop()
+            print(f"Multi-process pipeline stats: {processing_pipeline_manager.get_stats()}")
+        else:
+            # Wait for the processing thread to finish
+            if processing_thread.is_alive():
+                processing_thread.join(timeout=2.0)
+            # Clean up resources
+            cropper.cleanup()
+            vlm_processor.stop()
+            print(f"VLM stage stats: {vlm_processor.get_stats()}")
+            if cascade is not None:
+                print(f"Cascade stats: {cascade.get_stats()}")
+            print(f"VLM latency stats: {vlm_detector.get_stats()}")
+            if vlm_processor.detector is not vlm_detector:
+                print(f"VLM cache stats: {vlm_processor.detector.get_stats()}")
+            vlm_detector.cleanup()
 
         ws_client.send_command(0, 0)
         # If the navigator was started, stop it.
         if 'navigator' in locals():
             navigator.stop()
-        capture.stop()
+        if capture is not None:
+            capture.stop()
+            print(f"Capture stats: {capture.get_stats()}")
+            if change_detection is not None:
+                print(f"Change detection stats: {change_detection.get_stats()}")
+            print(f"Stereo sync stats: {synchronizer.get_stats()}")
+        if recorder is not None:
+            recorder.stop()
+            print(f"Recorder stats: {recorder.get_stats()}")
         ws_client.close()
         cv2.destroyAllWindows()
         print("System closed.")
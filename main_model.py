@@ -2,9 +2,7 @@ import ollama
 import os
 import sys
 import argparse
-
-# The only commands a robot may output
-VALID_COMMANDS = {'forward', 'left', 'right', 'stop'}
+from e2e_ad.detection.navigation_command import VALID_COMMANDS, COMMAND_INSTRUCTION, COMMAND_SCHEMA, COMMAND_OPTIONS, parse_command
 
 
 def build_prompt() -> str:
@@ -17,8 +15,7 @@ def build_prompt() -> str:
         "Your tasks is to move around the world.\n"
         "DO NOT collide with any objects.\n"
         "Stay away from walls.\n"
-        "Strictly only output one of the following commands:\n"
-        "{forward}, {left}, {right}, {stop}"
+        + COMMAND_INSTRUCTION
     )
 
 
@@ -41,15 +38,19 @@ def get_robot_command(image_path: str, model_name: str = "qwen2.5vl:3b") -> str:
                 "images": [image_path],
             }
         ],
+        # Structured answer restricted to the valid commands, a few greedy tokens
+        format=COMMAND_SCHEMA,
+        options=COMMAND_OPTIONS,
     )
 
     # Normalise and validate response
-    command = response["message"]["content"].strip().lower()
-    print(f"Model raw response: {command}")
+    answer = response["message"]["content"]
+    print(f"Model raw response: {answer}")
+    command = parse_command(answer)
 
-    if command not in VALID_COMMANDS:
+    if command is None:
         raise ValueError(
-            f"Model returned invalid command '{command}'. "
+            f"Model returned invalid command '{answer.strip()}'. "
             f"Expected one of {', '.join(sorted(VALID_COMMANDS))}."
         )
 
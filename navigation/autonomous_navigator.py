@@ -2,17 +2,19 @@ import threading
 import time
 
 class AutonomousNavigator:
-    def __init__(self, sensor_data_hub, ws_client, strategy, decision_interval=0.2):
+    def __init__(self, sensor_data_hub, ws_client, strategy, decision_interval=0.2, recorder=None):
         """
         :param sensor_data_hub: Shared hub from which to retrieve the latest SensorData.
         :param ws_client: Instance of WebSocketClient.
         :param strategy: An instance of NavigationStrategy.
         :param decision_interval: Time (in seconds) between decision updates.
+        :param recorder: Optional SessionRecorder that records the motor commands sent.
         """
         self.sensor_data_hub = sensor_data_hub
         self.ws_client = ws_client
         self.strategy = strategy
         self.decision_interval = decision_interval
+        self.recorder = recorder
         self.running = True
         self.enabled = False  # Autonomous driving is off by default.
         self.thread = threading.Thread(target=self.run, daemon=True)
@@ -28,6 +30,8 @@ class AutonomousNavigator:
             left_speed, right_speed = self.strategy.decide(sensor_data)
             if self.enabled:
                 self.ws_client.send_command(left_speed, right_speed)
+                if self.recorder is not None:
+                    self.recorder.record_command(left_speed, right_speed)
             time.sleep(self.decision_interval)
 
     def stop(self):
@@ -1,20 +1,29 @@
+import math
 from time import sleep
 from e2e_ad.navigation.navigation_strategy import NavigationStrategy
 from e2e_ad.data.sensor_data import SensorData
+from e2e_ad.data.detection_batch import DetectionBatch
 
 # Define critical thresholds.
 SAFE_DISTANCE = 0.15  # Minimum safe distance in meters
 
 class ReactiveBehaviorStrategy(NavigationStrategy):
 
+    @staticmethod
+    def _distances(detections):
+        """Distances of a detection list, or the known distances of a DetectionBatch."""
+        if isinstance(detections, DetectionBatch):
+            return [distance for distance in detections.distances.tolist() if not math.isnan(distance)]
+        return [det["distance"] for det in detections]
+
     def decide(self, sensor_data: SensorData) -> tuple[float, float]:
         # Default: STOP the robot when no detections available or no decision can be made:
         left_cmd = 0.0
         right_cmd = 0.0
 
         # Extract detected distances
-        left_distances = [det["distance"] for det in sensor_data.left_detections]
-        right_distances = [det["distance"] for det in sensor_data.right_detections]
+        left_distances = self._distances(sensor_data.left_detections)
+        right_distances = self._distances(sensor_data.right_detections)
 
         # Get the closest obstacle on each side
         min_left_distance = min(left_distances, default=float('inf'))
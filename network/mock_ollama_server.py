@@ -0,0 +1,332 @@
+import argparse
+import base64
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+import numpy as np
+from e2e_ad.detection.navigation_command import VALID_COMMANDS
+
+def make_sampler(spec, rng: random.Random):
+    """
+    Build a function returning latency samples in seconds.
+
+    :param spec: A number (constant), ("uniform", low, high), ("normal", mean, std),
+                 ("lognormal", mu, sigma) or a list of recorded samples to draw from.
+    :param rng: Random generator, seeded for reproducible runs.
+    """
+    if spec is None:
+        return lambda: 0.0
+    if isinstance(spec, (int, float)):
+        return lambda: float(spec)
+    if isinstance(spec, (list, tuple)) and spec and isinstance(spec[0], str):
+        kind, a, b = spec
+        if kind == "uniform":
+            return lambda: rng.uniform(a, b)
+        if kind == "normal":
+            return lambda: max(0.0, rng.gauss(a, b))
+        if kind == "lognormal":
+            return lambda: rng.lognormvariate(a, b)
+        raise ValueError(f"Unknown latency distribution '{kind}'")
+    samples = [float(s) for s in spec]
+    if not samples:
+        raise ValueError("Empty list of latency samples")
+    return lambda: rng.choice(samples)
+
+class LatencyProfile:
+    def __init__(self, load=0.0, ttft=0.0, per_token=0.0, keep_alive=300.0, seed=None):
+        """
+        Latency injected by MockOllamaServer, see make_sampler for the accepted specs.
+
+        :param load: Model load time, paid by the first request and after the model was idle for keep_alive.
+        :param ttft: Time to first token of a loaded model (prompt and image processing).
+        :param per_token: Time per generated token after the first.
+        :param keep_alive: Default idle time in seconds before the mock "unloads" the model.
+        :param seed: Seed for the samplers.
+        """
+        self.spec = {"load": load, "ttft": ttft, "per_token": per_token, "keep_alive": keep_alive}
+        self.keep_alive = keep_alive
+        rng = random.Random(seed)
+        self.load = make_sampler(load, rng)
+        self.ttft = make_sampler(ttft, rng)
+        self.per_token = make_sampler(per_token, rng)
+
+    @classmethod
+    def from_file(cls, path, seed=None):
+        """Load a profile from JSON, e.g. {"load": 2.4, "ttft": [0.21, 0.25, ...], "per_token": [0.011, ...]}."""
+        with open(path, "r") as f:
+            spec = json.load(f)
+        return cls(seed=seed, **spec)
+
+# Rough figures for a local GPU and a CPU-only laptop; use LatencyProfile.from_file for recorded ones.
+LATENCY_PROFILES = {
+    "instant": {},
+    "moondream-gpu": {"load": 2.5, "ttft": ("normal", 0.25, 0.03), "per_token": ("normal", 0.012, 0.002)},
+    "moondream-cpu": {"load": 6.0, "ttft": ("lognormal", 0.2, 0.25), "per_token": ("normal", 0.06, 0.01)},
+    "qwen2.5vl-3b-gpu": {"load": 4.0, "ttft": ("normal", 0.45, 0.05), "per_token": ("normal", 0.02, 0.003)},
+}
+
+class ScriptedResponder:
+    def __init__(self, commands=("forward",), loop=True):
+        """Answer with a fixed sequence of commands, repeating it if loop is set (then 'stop')."""
+        self._commands = itertools.cycle(commands) if loop else iter(commands)
+        self._lock = threading.Lock()
+
+    def __call__(self, request, images):
+        with self._lock:
+            return next(self._commands, "stop")
+
+class RuleBasedResponder:
+    def __init__(self, dark_threshold=40.0, balance_threshold=15.0):
+        """
+        Pick a command from the last image: stop when it is dark (blocked view), turn towards
+        the brighter half when the halves differ, otherwise drive forward.
+        """
+        self.dark_threshold = dark_threshold
+        self.balance_threshold = balance_threshold
+
+    def __call__(self, request, images):
+        if not images:
+            return "stop"
+        data = np.frombuffer(base64.b64decode(images[-1]), dtype=np.uint8)
+        image = cv2.imdecode(data, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            return "stop"
+        if image.mean() < self.dark_threshold:
+            return "stop"
+        half = image.shape[1] // 2
+        difference = float(image[:, :half].mean()) - float(image[:, half:].mean())
+        if abs(difference) > self.balance_threshold:
+            return "left" if difference > 0 else "right"
+        return "forward"
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]+|\s+")
+
+def _now():
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+class MockOllamaServer:
+    def __init__(self, host="127.0.0.1", port=0, responder=None, latency: LatencyProfile = None):
+        """
+        Local stand-in for the Ollama HTTP API (/api/chat with and without streaming, /api/tags,
+        /api/version), so the VLM path can be tested and benchmarked without a model.
+
+        The answer follows the request: the structured {"command": ...} JSON when a format is
+        requested, the bare command otherwise. Responses carry load_duration, eval_count and
+        the other timing fields the Ollama clients read.
+
+        :param host: Interface to listen on.
+        :param port: Port, 0 picks a free one (see url).
+        :param responder: Callable (request, base64 images) -> command, defaults to RuleBasedResponder.
+        :param latency: Injected latency, defaults to none.
+        """
+        self.responder = responder or RuleBasedResponder()
+        self.latency = latency or LatencyProfile()
+        self._lock = threading.Lock()
+        self._loaded_until = {}  # model -> monotonic time the mock unloads it
+
+        # Statistics
+        self.request_count = 0
+        self.load_count = 0
+        self.aborted_count = 0  # Streams the client closed before the end, e.g. early termination
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self._send_json({"version": "0.0.0-mock"})
+                elif self.path == "/api/tags":
+                    self._send_json({"models": [{"name": name, "model": name} for name in server.loaded_models()]})
+                else:
+                    body = b"Ollama is running"
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            def do_POST(self):
+                if self.path != "/api/chat":
+                    self._send_json({"error": f"{self.path} not supported by the mock server"}, status=404)
+                    return
+                try:
+                    request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                except ValueError as e:
+                    self._send_json({"error": f"invalid request: {e}"}, status=400)
+                    return
+                try:
+                    server._handle_chat(self, request)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped reading; like Ollama, stop generating
+                    with server._lock:
+                        server.aborted_count += 1
+                    self.close_connection = True
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.host, self.port = self.httpd.server_address[:2]
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def loaded_models(self):
+        now = time.monotonic()
+        with self._lock:
+            return [model for model, until in self._loaded_until.items() if until > now]
+
+    def _load_model(self, model, keep_alive):
+        """Return the simulated load time and keep the model loaded for keep_alive."""
+        now = time.monotonic()
+        with self._lock:
+            self.request_count += 1
+            loaded = self._loaded_until.get(model, 0.0) > now
+            load_time = 0.0 if loaded else self.latency.load()
+            if not loaded:
+                self.load_count += 1
+            self._loaded_until[model] = now + load_time + keep_alive
+        return load_time
+
+    def _keep_alive(self, request):
+        keep_alive = request.get("keep_alive")
+        if keep_alive is None:
+            return self.latency.keep_alive
+        # Imported lazily, the client module needs the ollama package
+        from e2e_ad.network.ollama_client import keep_alive_seconds
+        seconds = keep_alive_seconds(keep_alive)
+        return float("inf") if seconds is None else seconds
+
+    def _handle_chat(self, handler, request):
+        model = request.get("model", "")
+        messages = request.get("messages") or []
+        stream = request.get("stream", True)
+        start = time.monotonic()
+        load_time = self._load_model(model, self._keep_alive(request))
+        time.sleep(load_time)
+
+        if not messages:
+            # Ollama only loads the model for a request without messages
+            handler._send_json({
+                "model": model, "created_at": _now(), "done": True, "done_reason": "load",
+                "message": {"role": "assistant", "content": ""},
+                "load_duration": int(load_time * 1e9), "total_duration": int((time.monotonic() - start) * 1e9),
+            })
+            return
+
+        images = [image for message in messages for image in (message.get("images") or [])]
+        command = self.responder(request, images)
+        if command not in VALID_COMMANDS:
+            command = "stop"
+        content = json.dumps({"command": command}) if request.get("format") else command
+        tokens = _TOKEN_PATTERN.findall(content)
+
+        eval_start = time.monotonic()
+        time.sleep(self.latency.ttft())
+        if stream:
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/x-ndjson")
+            handler.send_header("Transfer-Encoding", "chunked")
+            handler.end_headers()
+        for index, token in enumerate(tokens):
+            if index:
+                time.sleep(self.latency.per_token())
+            if stream:
+                self._write_chunk(handler, {
+                    "model": model, "created_at": _now(), "done": False,
+                    "message": {"role": "assistant", "content": token},
+                })
+
+        final = {
+            "model": model, "created_at": _now(), "done": True, "done_reason": "stop",
+            "message": {"role": "assistant", "content": "" if stream else content},
+            "load_duration": int(load_time * 1e9),
+            "prompt_eval_count": sum(len(m.get("content", "").split()) for m in messages) + 729 * len(images),
+            "eval_count": len(tokens),
+            "eval_duration": int((time.monotonic() - eval_start) * 1e9),
+            "total_duration": int((time.monotonic() - start) * 1e9),
+        }
+        if stream:
+            self._write_chunk(handler, final)
+            handler.wfile.write(b"0\r\n\r\n")
+        else:
+            handler._send_json(final)
+
+    @staticmethod
+    def _write_chunk(handler, payload):
+        line = json.dumps(payload).encode() + b"\n"
+        handler.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        handler.wfile.flush()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+def main():
+    """
+    Run the mock server in the foreground, e.g. for the benchmark:
+
+        python -m e2e_ad.network.mock_ollama_server --port 11434 --profile moondream-gpu
+        OLLAMA_HOST=http://127.0.0.1:11434 python benchmark_pipeline.py -s recordings/session01 --strategy vlm --vlm mono
+    """
+    parser = argparse.ArgumentParser(description="Local stand-in for the Ollama chat API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=11434, help="Port (default: %(default)s)")
+    parser.add_argument("--commands", default=None, help="Comma separated commands to replay in a loop instead of the image rules")
+    parser.add_argument("--profile", default="instant", help=f"Latency profile: {', '.join(LATENCY_PROFILES)} or a JSON file (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the latency samplers")
+    args = parser.parse_args()
+
+    if args.profile in LATENCY_PROFILES:
+        latency = LatencyProfile(seed=args.seed, **LATENCY_PROFILES[args.profile])
+    else:
+        latency = LatencyProfile.from_file(args.profile, seed=args.seed)
+    responder = ScriptedResponder(args.commands.split(",")) if args.commands else RuleBasedResponder()
+
+    server = MockOllamaServer(args.host, args.port, responder, latency)
+    print(f"Mock Ollama server listening on {server.url} (profile: {args.profile})", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
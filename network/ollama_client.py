@@ -0,0 +1,205 @@
+import re
+import threading
+import time
+import ollama
+
+# Ollama reports load_duration in nanoseconds; loads above this count as a cold start.
+COLD_LOAD_THRESHOLD = 0.1
+
+def keep_alive_seconds(keep_alive):
+    """Convert an Ollama keep_alive value ("30m", "1h", 300, -1) to seconds, None for forever."""
+    if keep_alive is None:
+        return 300.0  # Ollama's default
+    if isinstance(keep_alive, (int, float)):
+        return None if keep_alive < 0 else float(keep_alive)
+    match = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*", str(keep_alive))
+    if not match:
+        raise ValueError(f"Invalid keep_alive value '{keep_alive}'")
+    value = float(match.group(1))
+    if value < 0:
+        return None
+    return value * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[match.group(2) or "s"]
+
+def _response_field(response, name):
+    """Read an optional field of an Ollama response (dict or ChatResponse)."""
+    try:
+        return response[name]
+    except (KeyError, TypeError):
+        return None
+
+def read_stream_until(stream, stop_when):
+    """
+    Accumulate a streamed chat answer until stop_when(text) returns a result, then abort the stream.
+
+    Closing the stream closes the HTTP response, which makes Ollama stop generating.
+
+    :param stream: Iterator of chat chunks (ollama.chat(..., stream=True)).
+    :param stop_when: Callable taking the text so far, returning None to keep reading.
+    :return: (result or None, text, seconds to first token, seconds to result, stopped early)
+    """
+    start = time.monotonic()
+    text = ""
+    result = ttft = None
+    stopped_early = False
+    try:
+        for chunk in stream:
+            content = chunk["message"]["content"] or ""
+            if content and ttft is None:
+                ttft = time.monotonic() - start
+            text += content
+            result = stop_when(text)
+            if result is not None:
+                stopped_early = not chunk["done"]
+                break
+        else:
+            # Stream ended: judge the complete answer (the last word is complete now)
+            result = stop_when(text + " ")
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+    return result, text, ttft, time.monotonic() - start, stopped_early
+
+def _remember_last_chunk(stream, last):
+    """Yield the chunks of a stream, keeping the latest one in last["chunk"]; closing it closes the stream."""
+    try:
+        for chunk in stream:
+            last["chunk"] = chunk
+            yield chunk
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+
+class OllamaClient:
+    def __init__(self, host=None, keep_alive="30m", timeout=60.0):
+        """
+        Long-lived Ollama client that reuses one pooled HTTP connection for all requests.
+
+        Every request pins the model in memory for keep_alive, and warm_up() loads it ahead of
+        the first decision. Request latencies are split into cold starts (model had to be loaded)
+        and steady state.
+
+        :param host: Ollama server URL, defaults to the OLLAMA_HOST environment variable.
+        :param keep_alive: How long Ollama keeps the model loaded after a request (e.g. "30m", -1 forever).
+        :param timeout: HTTP timeout in seconds.
+        """
+        self.host = host
+        self.keep_alive = keep_alive
+        self._keep_alive_s = keep_alive_seconds(keep_alive)
+        self.client = ollama.Client(host=host, timeout=timeout)
+        self._lock = threading.Lock()
+        self._last_request = {}  # model -> monotonic time of the last finished request
+
+        # Statistics
+        self.cold_count = 0
+        self.cold_time = 0.0
+        self.steady_count = 0
+        self.steady_time = 0.0
+        self.warm_up_time = None
+        self.generated_tokens = 0
+        self.counted_requests = 0  # Requests that reported eval_count
+        self.stream_count = 0
+        self.stream_ttft = 0.0
+        self.stream_ttft_count = 0
+        self.stream_decision_time = 0.0
+        self.early_stop_count = 0
+
+    def _expect_cold(self, model, now):
+        last = self._last_request.get(model)
+        if last is None:
+            return True
+        return self._keep_alive_s is not None and now - last > self._keep_alive_s
+
+    def _record(self, model, response, started, elapsed, warm_up=False):
+        load_duration = _response_field(response, "load_duration")
+        eval_count = _response_field(response, "eval_count")
+        with self._lock:
+            if load_duration is not None:
+                cold = load_duration / 1e9 > COLD_LOAD_THRESHOLD
+            else:
+                cold = self._expect_cold(model, started)
+            self._last_request[model] = time.monotonic()
+            if eval_count is not None and not warm_up:
+                self.generated_tokens += eval_count
+                self.counted_requests += 1
+            if warm_up:
+                self.warm_up_time = elapsed
+            elif cold:
+                self.cold_count += 1
+                self.cold_time += elapsed
+            else:
+                self.steady_count += 1
+                self.steady_time += elapsed
+
+    def chat(self, model, messages, **kwargs):
+        """Send a chat request (same arguments as ollama.chat) and record its latency."""
+        kwargs.setdefault("keep_alive", self.keep_alive)
+        started = time.monotonic()
+        response = self.client.chat(model=model, messages=messages, **kwargs)
+        if kwargs.get("stream"):
+            return response
+        self._record(model, response, started, time.monotonic() - started)
+        return response
+
+    def chat_until(self, model, messages, stop_when, **kwargs):
+        """
+        Stream a chat answer and stop generation as soon as stop_when(text) returns a result.
+
+        The time to the result counts as the request latency. Load time and token counts are only
+        reported in the final chunk, so after an early stop a cold start is guessed from keep_alive
+        and the request does not count towards mean_tokens.
+
+        :return: (result or None, text received so far)
+        """
+        kwargs.setdefault("keep_alive", self.keep_alive)
+        kwargs["stream"] = True
+        started = time.monotonic()
+        last = {}
+        stream = _remember_last_chunk(self.client.chat(model=model, messages=messages, **kwargs), last)
+        result, text, ttft, decision_time, stopped_early = read_stream_until(stream, stop_when)
+        final_chunk = last.get("chunk") if not stopped_early else None
+        self._record(model, final_chunk, started, decision_time)
+        with self._lock:
+            self.stream_count += 1
+            self.stream_decision_time += decision_time
+            if ttft is not None:
+                self.stream_ttft += ttft
+                self.stream_ttft_count += 1
+            if stopped_early:
+                self.early_stop_count += 1
+        return result, text
+
+    def warm_up(self, model):
+        """Load the model into memory so the first real request does not pay the load time."""
+        started = time.monotonic()
+        try:
+            # A request without messages only loads the model
+            response = self.client.chat(model=model, messages=[], keep_alive=self.keep_alive)
+        except Exception as e:
+            print(f"[Warning] Warm-up of model '{model}' failed: {e}", flush=True)
+            return None
+        elapsed = time.monotonic() - started
+        self._record(model, response, started, elapsed, warm_up=True)
+        print(f"Model '{model}' warmed up in {elapsed * 1000:.0f} ms", flush=True)
+        return elapsed
+
+    def get_stats(self):
+        return {
+            "warm_up_ms": self.warm_up_time * 1000 if self.warm_up_time is not None else None,
+            "cold_requests": self.cold_count,
+            "cold_mean_ms": self.cold_time / self.cold_count * 1000 if self.cold_count else None,
+            "steady_requests": self.steady_count,
+            "steady_mean_ms": self.steady_time / self.steady_count * 1000 if self.steady_count else None,
+            "mean_tokens": self.generated_tokens / self.counted_requests if self.counted_requests else None,
+            "streamed_requests": self.stream_count,
+            "stream_ttft_ms": self.stream_ttft / self.stream_ttft_count * 1000 if self.stream_ttft_count else None,
+            "stream_time_to_decision_ms": self.stream_decision_time / self.stream_count * 1000 if self.stream_count else None,
+            "early_stops": self.early_stop_count,
+        }
+
+    def close(self):
+        """Close the pooled HTTP connection."""
+        http_client = getattr(self.client, "_client", None)
+        if http_client is not None:
+            http_client.close()
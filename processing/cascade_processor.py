@@ -0,0 +1,142 @@
+import math
+import time
+import numpy as np
+from e2e_ad.processing.processing_module import ProcessingModule
+from e2e_ad.data.sensor_data import SensorData
+from e2e_ad.data.detection_batch import DetectionBatch
+from e2e_ad.navigation.reactive_behavior_strategy import SAFE_DISTANCE
+
+class CascadeProcessor(ProcessingModule):
+    def __init__(self, cheap_modules, vlm_module, safe_distance=SAFE_DISTANCE, clear_distance=0.4,
+                 min_confidence=0.5):
+        """
+        Decide cheaply from detections and distances first, and ask the VLM only when that is not conclusive.
+
+        The cheap modules (e.g. DetectionProcessor with YoloDetector, DistanceEstimationProcessor)
+        fill in the detections with distances. Following ReactiveBehaviorStrategy, the cascade is
+        confident when a camera sees a confident obstacle closer than safe_distance, so it turns
+        away from it. It is also confident when no detection is closer than clear_distance, so it
+        drives forward. It escalates to the VLM module when an obstacle is in between, when
+        detections lack confidence or distance, or when both cameras are blocked.
+
+        :param cheap_modules: ProcessingModules run on every frame.
+        :param vlm_module: ProcessingModule setting vlm_direction (e.g. VmlDetectionProcessor).
+        :param safe_distance: Obstacles closer than this (meters) trigger a turn.
+        :param clear_distance: Without detections closer than this (meters) the path counts as clear.
+        :param min_confidence: Minimum detection confidence for a cheap decision.
+        """
+        self.cheap_modules = cheap_modules
+        self.vlm_module = vlm_module
+        self.safe_distance = safe_distance
+        self.clear_distance = clear_distance
+        self.min_confidence = min_confidence
+
+        # Statistics
+        self.decision_count = 0
+        self.escalated_count = 0
+        self.cheap_time = 0.0
+        self.vlm_time = 0.0
+        self.escalation_reasons = {}
+
+    def _closest(self, detections):
+        """Return the closest detection with a distance, or a reason why the side is unclear."""
+        if isinstance(detections, DetectionBatch):
+            return self._closest_in_batch(detections)
+        closest = None
+        for detection in detections:
+            distance = detection.get("distance")
+            if distance is None:
+                if detection.get("confidence", 0.0) >= self.min_confidence:
+                    return None, "unknown_distance"
+                continue
+            if closest is None or distance < closest["distance"]:
+                closest = detection
+        return closest, None
+
+    def _closest_in_batch(self, batch: DetectionBatch):
+        """_closest for a DetectionBatch, the closest detection is returned as a dictionary."""
+        return batch.dispatch(self._closest_in_small_batch, self._closest_in_large_batch)
+
+    def _closest_in_large_batch(self, batch: DetectionBatch):
+        unknown = np.isnan(batch.distances)
+        confidences = np.where(np.isnan(batch.confidences), 0.0, batch.confidences)
+        if np.any(unknown & (confidences >= self.min_confidence)):
+            return None, "unknown_distance"
+        if unknown.all():
+            return None, None
+        closest = batch.detection(int(np.where(unknown, np.inf, batch.distances).argmin()))
+        if closest["confidence"] is None:
+            closest["confidence"] = 0.0
+        return closest, None
+
+    def _closest_in_small_batch(self, batch: DetectionBatch):
+        """_closest_in_batch with a loop over the columns as lists, cheaper than NumPy calls for a few rows."""
+        closest = None
+        distances = batch.distances.tolist()
+        for index, (distance, confidence) in enumerate(zip(distances, batch.confidences.tolist())):
+            if math.isnan(distance):
+                if not math.isnan(confidence) and confidence >= self.min_confidence:
+                    return None, "unknown_distance"
+                continue
+            if closest is None or distance < distances[closest]:
+                closest = index
+        if closest is None:
+            return None, None
+        detection = batch.detection(closest)
+        if detection["confidence"] is None:
+            detection["confidence"] = 0.0
+        return detection, None
+
+    def _cheap_decision(self, sensor_data: SensorData):
+        """Return (direction, None) when the cheap path is conclusive, otherwise (None, reason)."""
+        blocked = {}
+        for side, detections in (("left", sensor_data.left_detections), ("right", sensor_data.right_detections)):
+            closest, reason = self._closest(detections)
+            if reason:
+                return None, reason
+            if closest is None or closest["distance"] >= self.clear_distance:
+                blocked[side] = False
+            elif closest.get("confidence", 0.0) < self.min_confidence:
+                return None, "low_confidence"
+            elif closest["distance"] < self.safe_distance:
+                blocked[side] = True
+            else:
+                return None, "uncertain_distance"
+
+        if blocked["left"] and blocked["right"]:
+            return None, "conflict"
+        if blocked["left"]:
+            return "right", None
+        if blocked["right"]:
+            return "left", None
+        return "forward", None
+
+    def process(self, sensor_data: SensorData):
+        start = time.perf_counter()
+        for module in self.cheap_modules:
+            sensor_data = module.process(sensor_data)
+        direction, reason = self._cheap_decision(sensor_data)
+        self.cheap_time += time.perf_counter() - start
+        self.decision_count += 1
+
+        if direction is not None:
+            sensor_data.vlm_direction = direction
+            sensor_data.vlm_timestamp = sensor_data.timestamp
+            return sensor_data
+
+        self.escalated_count += 1
+        self.escalation_reasons[reason] = self.escalation_reasons.get(reason, 0) + 1
+        start = time.perf_counter()
+        sensor_data = self.vlm_module.process(sensor_data)
+        self.vlm_time += time.perf_counter() - start
+        return sensor_data
+
+    def get_stats(self):
+        return {
+            "decisions": self.decision_count,
+            "escalated": self.escalated_count,
+            "escalation_rate": self.escalated_count / self.decision_count if self.decision_count else 0.0,
+            "cheap_mean_ms": self.cheap_time / self.decision_count * 1000 if self.decision_count else None,
+            "vlm_mean_ms": self.vlm_time / self.escalated_count * 1000 if self.escalated_count else None,
+            "escalation_reasons": dict(self.escalation_reasons),
+        }
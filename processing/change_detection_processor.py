@@ -0,0 +1,112 @@
+import time
+import cv2
+import numpy as np
+from e2e_ad.processing.processing_module import ProcessingModule
+from e2e_ad.data.sensor_data import SensorData, FRAME_FIELDS
+
+class SceneChangeDetector:
+    def __init__(self, threshold=4.0, max_reuse_age=1.0, signature_size=(32, 18)):
+        """
+        Decide whether a frame pair differs enough from the last accepted pair to be processed again.
+
+        Each frame pair is reduced to a tiny grayscale signature and compared to the signature
+        of the last accepted pair by mean absolute difference.
+
+        :param threshold: Mean absolute signature difference (0-255) that counts as a change.
+        :param max_reuse_age: Maximum time in seconds since the last accepted pair before forcing a change.
+        :param signature_size: (width, height) of the downsampled signature.
+        """
+        self.threshold = threshold
+        self.max_reuse_age = max_reuse_age
+        self.signature_size = signature_size
+
+        self._signature = None
+        self._accepted_time = 0.0
+
+        # Statistics
+        self.last_difference = None
+
+    def _compute_signature(self, sensor_data: SensorData) -> np.ndarray:
+        parts = []
+        for frame in (sensor_data.left_frame, sensor_data.right_frame):
+            if frame is None:
+                continue
+            small = cv2.resize(frame, self.signature_size, interpolation=cv2.INTER_AREA)
+            if small.ndim == 3:
+                small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            parts.append(small.astype(np.int16))
+        return np.stack(parts) if parts else None
+
+    def changed(self, sensor_data: SensorData) -> bool:
+        """Return whether the frames changed; a changed pair becomes the new reference."""
+        signature = self._compute_signature(sensor_data)
+        now = time.monotonic()
+
+        if (signature is not None and self._signature is not None
+                and signature.shape == self._signature.shape
+                and now - self._accepted_time <= self.max_reuse_age):
+            self.last_difference = float(np.mean(np.abs(signature - self._signature)))
+            if self.last_difference < self.threshold:
+                return False
+
+        self._signature = signature
+        self._accepted_time = now
+        return True
+
+class ChangeDetectionProcessor(ProcessingModule):
+    def __init__(self, modules, threshold=4.0, max_reuse_age=1.0, signature_size=(32, 18)):
+        """
+        Run expensive modules only when the scene changed, otherwise reuse their last results.
+
+        Frame pairs are compared with a SceneChangeDetector. If the pair did not change, the
+        results produced by the wrapped modules for the last changed pair are copied instead
+        of running the modules again. Only suited to synchronous modules: an asynchronous
+        module returns an older decision, so gate its submissions instead
+        (see VmlDetectionProcessor's change_detector).
+
+        :param modules: List of ProcessingModule instances to gate (e.g. VLM or YOLO processors).
+        :param threshold: Mean absolute signature difference (0-255) that counts as a change.
+        :param max_reuse_age: Maximum age in seconds of reused results before forcing a rerun.
+        :param signature_size: (width, height) of the downsampled signature.
+        """
+        self.modules = modules
+        self.change_detector = SceneChangeDetector(threshold, max_reuse_age, signature_size)
+        self._results = None
+
+        # Statistics
+        self.processed_count = 0
+        self.skipped_count = 0
+        self.processing_time = 0.0
+
+    def process(self, sensor_data: SensorData):
+        if not self.change_detector.changed(sensor_data):
+            for name, value in self._results.items():
+                setattr(sensor_data, name, value)
+            self.skipped_count += 1
+            return sensor_data
+
+        before = dict(vars(sensor_data))
+        start = time.perf_counter()
+        for module in self.modules:
+            sensor_data = module.process(sensor_data)
+        self.processing_time += time.perf_counter() - start
+        self.processed_count += 1
+
+        # Remember only what the gated modules set, so results of earlier modules are never overwritten
+        self._results = {
+            name: value for name, value in vars(sensor_data).items()
+            if name not in FRAME_FIELDS and (name not in before or before[name] is not value)
+        }
+        return sensor_data
+
+    def get_stats(self):
+        """Return processed/skipped counts, the skip rate and the estimated compute time saved."""
+        total = self.processed_count + self.skipped_count
+        mean_time = self.processing_time / self.processed_count if self.processed_count else 0.0
+        return {
+            "processed": self.processed_count,
+            "skipped": self.skipped_count,
+            "skip_rate": self.skipped_count / total if total else 0.0,
+            "time_saved_s": self.skipped_count * mean_time,
+            "last_difference": self.change_detector.last_difference,
+        }
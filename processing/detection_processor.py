@@ -10,6 +10,11 @@ class DetectionProcessor(ProcessingModule):
     def process(self, sensor_data: SensorData):
         if not self.detector:
             return sensor_data
-        sensor_data.left_detections = self.detector.detect(sensor_data.left_frame, 'left')
-        sensor_data.right_detections = self.detector.detect(sensor_data.right_frame, 'right')
+        # Both cameras in one inference call when the detector supports it
+        if hasattr(self.detector, 'detect_batch'):
+            sensor_data.left_detections, sensor_data.right_detections = self.detector.detect_batch(
+                [sensor_data.left_frame, sensor_data.right_frame], ['left', 'right'])
+        else:
+            sensor_data.left_detections = self.detector.detect(sensor_data.left_frame, 'left')
+            sensor_data.right_detections = self.detector.detect(sensor_data.right_frame, 'right')
         return sensor_data
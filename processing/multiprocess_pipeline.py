@@ -0,0 +1,292 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+from e2e_ad.data.sensor_data import SensorData, FRAME_FIELDS
+from e2e_ad.data.sensor_data_hub import SensorDataHub
+from e2e_ad.processing.shared_frame_ring import SharedFrameRing, SharedSlotHandle, SlotDescriptor
+
+FRAME_NAMES = ["left_frame", "right_frame"]
+MODEL_INPUT_NAMES = ["left_model_input", "right_model_input"]
+
+def _capture_process_main(capture_factory, cropper_factory, ring_name, slot_count, slot_size,
+                          free_slots, frames_out, stop_event, sync_tolerance, capture_dropped):
+    """Capture, synchronize and crop frame pairs straight into shared-memory slots."""
+    from e2e_ad.camera.stereo_synchronizer import StereoSynchronizer
+
+    ring = SharedFrameRing(slot_count, slot_size, name=ring_name)
+    capture = capture_factory()
+    capture.start()
+    synchronizer = StereoSynchronizer.from_capture(capture, tolerance=sync_tolerance)
+    cropper = cropper_factory()
+    sequence = 0
+    try:
+        while not stop_event.is_set():
+            pair = synchronizer.wait_for_pair(timeout=0.5)
+            if pair is None:
+                continue
+            left_entry, right_entry = pair
+            try:
+                try:
+                    slot = free_slots.get_nowait()
+                except queue.Empty:
+                    # Every slot is still in use downstream: drop instead of blocking capture
+                    with capture_dropped.get_lock():
+                        capture_dropped.value += 1
+                    continue
+
+                writer = ring.writer(slot)
+                left_buffer, right_buffer, left_input, right_input = cropper.crop_frames_with_model_input(
+                    left_entry.frame, right_entry.frame, writer
+                )
+                if left_buffer is None or right_buffer is None or left_input is None or right_input is None:
+                    free_slots.put(slot)
+                    continue
+                # Crops and model inputs were written straight into the slot, in this order
+                names = FRAME_NAMES + MODEL_INPUT_NAMES
+            finally:
+                left_entry.release()
+                right_entry.release()
+
+            sequence += 1
+            frames_out.put(SlotDescriptor(slot, sequence, left_entry.timestamp, writer.describe(names)))
+    finally:
+        capture.stop()
+        cropper.cleanup()
+        ring.close()
+
+def _worker_process_main(module_factory, ring_name, slot_count, slot_size, work_in, results_out, stop_event):
+    """Run heavy processing modules on frames read from shared memory and send back only the results."""
+    ring = SharedFrameRing(slot_count, slot_size, name=ring_name)
+    modules = module_factory()
+    try:
+        while not stop_event.is_set():
+            try:
+                descriptor = work_in.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            start = time.perf_counter()
+            sensor_data = SensorData(timestamp=descriptor.timestamp, **ring.arrays(descriptor))
+            try:
+                for module in modules:
+                    sensor_data = module.process(sensor_data)
+                results = {name: value for name, value in vars(sensor_data).items() if name not in FRAME_FIELDS}
+            except Exception as e:
+                print(f"Error in processing worker: {e}", flush=True)
+                results = {}
+            del sensor_data
+            results_out.put((descriptor.sequence, results, time.perf_counter() - start))
+    finally:
+        ring.close()
+
+class MultiProcessPipeline:
+    def __init__(self, sensor_data_hub: SensorDataHub, capture_factory, cropper_factory, worker_module_factory,
+                 slot_size, slot_count=6, max_in_flight=2, sync_tolerance=0.015):
+        """
+        Process-parallel alternative to running DualCameraCapture, the cropper and
+        ProcessingPipelineManager in one interpreter.
+
+        Capture, synchronization and cropping run in a capture process and heavy modules in a
+        worker process. Frames are written once into shared-memory slots; only SlotDescriptors
+        and the (small) module results are sent between processes. Modules registered with
+        register_module() run in this process on the worker results, e.g. visualization and
+        recording, before the SensorData is published to the hub.
+
+        Factories are called inside the child processes and must be picklable (module-level
+        functions or functools.partial of classes/functions).
+
+        :param sensor_data_hub: Hub receiving the processed SensorData.
+        :param capture_factory: Returns a started-able capture (DualCameraCapture, ReplayCapture).
+        :param cropper_factory: Returns a FrameCropper.
+        :param worker_module_factory: Returns the list of ProcessingModules run in the worker.
+        :param slot_size: Bytes per slot; must hold both crops plus both model inputs.
+        :param slot_count: Number of shared-memory slots.
+        :param max_in_flight: Maximum number of frames queued for or processed by the worker.
+        :param sync_tolerance: Stereo synchronizer tolerance in seconds.
+        """
+        self.sensor_data_hub = sensor_data_hub
+        self.capture_factory = capture_factory
+        self.cropper_factory = cropper_factory
+        self.worker_module_factory = worker_module_factory
+        self.slot_size = slot_size
+        self.slot_count = slot_count
+        self.max_in_flight = max_in_flight
+        self.sync_tolerance = sync_tolerance
+        self.processing_modules = []
+
+        # Spawn keeps CUDA and OpenCV state out of the children
+        self._ctx = mp.get_context("spawn")
+        self._ring = None
+        self._processes = []
+        self._threads = []
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._capture_dropped = None
+        self._worker = None
+        self.worker_exitcode = None  # Set once the worker process died while running
+        self.capture_exitcode = None  # Set once the capture process died while running
+        self.running = False
+
+        # Statistics
+        self.received_count = 0
+        self.dropped_count = 0
+        self.processed_count = 0
+        self.worker_lost_count = 0
+        self.worker_time = 0.0
+
+    def register_module(self, module):
+        """Add a module that runs in this process after the worker results arrived."""
+        self.processing_modules.append(module)
+
+    def start(self):
+        self._ring = SharedFrameRing(self.slot_count, self.slot_size)
+        self._free_slots = self._ctx.Queue()
+        for slot in range(self.slot_count):
+            self._free_slots.put(slot)
+        self._frames_in = self._ctx.Queue()
+        self._work_out = self._ctx.Queue()
+        self._results_in = self._ctx.Queue()
+        self._stop_event = self._ctx.Event()
+        self._capture_dropped = self._ctx.Value("i", 0)
+        self.running = True
+
+        ring_args = (self._ring.name, self.slot_count, self._ring.slot_size)
+        self._processes = [
+            self._ctx.Process(
+                target=_capture_process_main, daemon=True,
+                args=(self.capture_factory, self.cropper_factory) + ring_args + (
+                    self._free_slots, self._frames_in, self._stop_event, self.sync_tolerance, self._capture_dropped),
+            ),
+            self._ctx.Process(
+                target=_worker_process_main, daemon=True,
+                args=(self.worker_module_factory,) + ring_args + (self._work_out, self._results_in, self._stop_event),
+            ),
+        ]
+        self._worker = self._processes[1]
+        for process in self._processes:
+            process.start()
+        self._threads = [
+            threading.Thread(target=self._dispatch_loop, daemon=True),
+            threading.Thread(target=self._collect_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _reap_worker(self):
+        """
+        Detect a dead worker process; call with _pending_lock held. Its in-flight frames will never
+        come back, so they are taken out of _pending once.
+
+        :return: The lost (descriptor, handle) entries when the worker was just found dead, else None.
+        """
+        if self.worker_exitcode is not None or self._worker.is_alive():
+            return None
+        self.worker_exitcode = self._worker.exitcode
+        lost = list(self._pending.values())
+        self._pending.clear()
+        self.worker_lost_count += len(lost)
+        return lost
+
+    def _release_lost(self, lost):
+        """Return the slots of frames lost with the worker and report the failure."""
+        if lost is None:
+            return
+        for _, handle in lost:
+            handle.release()
+        print(f"[Warning] Processing worker died (exit code {self.worker_exitcode}), "
+              f"released {len(lost)} in-flight frames; frames are no longer processed", flush=True)
+
+    def _check_capture(self):
+        """Report once when the capture process died, since no frames will arrive anymore."""
+        if self.capture_exitcode is not None or self._processes[0].is_alive():
+            return
+        self.capture_exitcode = self._processes[0].exitcode
+        print(f"[Warning] Capture process died (exit code {self.capture_exitcode}); "
+              f"no new frames will arrive", flush=True)
+
+    def _dispatch_loop(self):
+        """Forward new frames to the worker, dropping them while the worker is saturated or dead."""
+        while self.running:
+            try:
+                descriptor = self._frames_in.get(timeout=0.5)
+            except queue.Empty:
+                self._check_capture()
+                continue
+            handle = SharedSlotHandle(descriptor.slot, self._free_slots)
+            self.received_count += 1
+            # Liveness check and registration under one lock, so no frame is registered after the
+            # collect loop released the in-flight frames of a dead worker
+            with self._pending_lock:
+                lost = self._reap_worker()
+                dispatch = self.worker_exitcode is None and len(self._pending) < self.max_in_flight
+                if dispatch:
+                    self._pending[descriptor.sequence] = (descriptor, handle)
+                else:
+                    self.dropped_count += 1
+            self._release_lost(lost)
+            if not dispatch:
+                handle.release()
+                continue
+            self._work_out.put(descriptor)
+
+    def _collect_loop(self):
+        """Merge worker results with the shared frames, run local modules and publish."""
+        while self.running:
+            try:
+                sequence, results, elapsed = self._results_in.get(timeout=0.5)
+            except queue.Empty:
+                # Also notices a dead worker while no new frames arrive
+                with self._pending_lock:
+                    lost = self._reap_worker()
+                self._release_lost(lost)
+                continue
+            with self._pending_lock:
+                entry = self._pending.pop(sequence, None)
+            if entry is None:
+                # Sent just before the worker died; its slot was already released
+                continue
+            descriptor, handle = entry
+            self.worker_time += elapsed
+            self.processed_count += 1
+
+            # The SensorData takes over the handle's reference
+            sensor_data = SensorData(buffers=[handle], timestamp=descriptor.timestamp, **self._ring.arrays(descriptor))
+            for name, value in results.items():
+                setattr(sensor_data, name, value)
+            try:
+                for module in self.processing_modules:
+                    sensor_data = module.process(sensor_data)
+                self.sensor_data_hub.update(sensor_data)
+            except Exception as e:
+                print(f"Error in multi-process pipeline: {e}", flush=True)
+            finally:
+                sensor_data.release()
+
+    def get_stats(self):
+        return {
+            "received": self.received_count,
+            "processed": self.processed_count,
+            "dropped_in_flight": self.dropped_count,
+            "dropped_no_slot": self._capture_dropped.value if self._capture_dropped is not None else 0,
+            "lost_in_worker": self.worker_lost_count,
+            "worker_exitcode": self.worker_exitcode,
+            "capture_exitcode": self.capture_exitcode,
+            "mean_worker_ms": self.worker_time / self.processed_count * 1000 if self.processed_count else None,
+        }
+
+    def stop(self):
+        self.running = False
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join()
+        for process in self._processes:
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+        # Drop the hub's frames before the shared memory goes away
+        self.sensor_data_hub.update(SensorData())
+        with self._pending_lock:
+            for _, handle in self._pending.values():
+                handle.release()
+            self._pending.clear()
+        self._ring.close()
@@ -10,11 +10,29 @@ class ProcessingPipelineManager:
         """Dynamically add a processing module."""
         self.processing_modules.append(module)
 
-    def process_and_update(self, left_frame, right_frame):
-        sensor_data = SensorData(left_frame=left_frame, right_frame=right_frame)
+    def process_and_update(self, left_frame, right_frame, left_model_input=None, right_model_input=None, buffers=None,
+                           timestamp=None):
+        """
+        Run all modules on a frame pair and publish the result to the hub.
 
-        for module in self.processing_modules:
-            sensor_data = module.process(sensor_data)
+        :param timestamp: Capture time (time.monotonic) of the frame pair.
+        :param buffers: Pooled buffers backing the frames. The pipeline takes over the caller's
+                        references and releases them once the hub holds its own.
+        """
+        sensor_data = SensorData(
+            left_frame=left_frame,
+            right_frame=right_frame,
+            left_model_input=left_model_input,
+            right_model_input=right_model_input,
+            buffers=list(buffers or []),
+            timestamp=timestamp,
+        )
 
-        self.sensor_data_hub.update(sensor_data)
+        try:
+            for module in self.processing_modules:
+                sensor_data = module.process(sensor_data)
+
+            self.sensor_data_hub.update(sensor_data)
+        finally:
+            sensor_data.release()
         return sensor_data
@@ -0,0 +1,14 @@
+from e2e_ad.processing.processing_module import ProcessingModule
+from e2e_ad.data.sensor_data import SensorData
+
+class RecordingProcessor(ProcessingModule):
+    def __init__(self, recorder):
+        """
+        :param recorder: An instance of SessionRecorder. Register this module last so the
+                         recorded SensorData contains the results of all other modules.
+        """
+        self.recorder = recorder
+
+    def process(self, sensor_data: SensorData):
+        self.recorder.record(sensor_data)
+        return sensor_data
@@ -0,0 +1,134 @@
+import threading
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+import numpy as np
+
+SLOT_ALIGNMENT = 64
+
+@dataclass
+class ArrayDescriptor:
+    name: str
+    offset: int  # Byte offset inside the slot
+    shape: Tuple[int, ...]
+    dtype: str
+
+@dataclass
+class SlotDescriptor:
+    """Small, picklable description of the arrays stored in one shared-memory slot."""
+    slot: int
+    sequence: int
+    timestamp: float
+    arrays: List[ArrayDescriptor] = field(default_factory=list)
+
+class _SlotArray:
+    """Array view into a slot, shaped like a PooledFrame so croppers can write into it."""
+    def __init__(self, array: np.ndarray):
+        self.array = array
+
+    def release(self):
+        pass
+
+class SlotWriter:
+    def __init__(self, ring: "SharedFrameRing", slot: int):
+        """Lays out arrays one after another inside a single slot."""
+        self.ring = ring
+        self.slot = slot
+        self._offset = 0
+        self._arrays = []
+
+    def acquire(self, shape, dtype=np.uint8) -> _SlotArray:
+        """Reserve space for an array in the slot (FrameBufferPool.acquire interface)."""
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if self._offset + nbytes > self.ring.slot_size:
+            raise ValueError(f"Slot size {self.ring.slot_size} too small for the frame data")
+        start = self.slot * self.ring.slot_size + self._offset
+        array = np.ndarray(shape, dtype=dtype, buffer=self.ring.shm.buf, offset=start)
+        self._arrays.append((self._offset, tuple(shape), dtype.str))
+        self._offset += -(-nbytes // SLOT_ALIGNMENT) * SLOT_ALIGNMENT
+        return _SlotArray(array)
+
+    def write(self, array: np.ndarray):
+        """Copy an array into the slot."""
+        np.copyto(self.acquire(array.shape, array.dtype).array, array)
+
+    def describe(self, names: List[str]) -> List[ArrayDescriptor]:
+        """Name the arrays written so far, in the order they were acquired."""
+        if len(names) != len(self._arrays):
+            raise ValueError(f"Expected {len(self._arrays)} names, got {len(names)}")
+        return [ArrayDescriptor(name, offset, shape, dtype)
+                for name, (offset, shape, dtype) in zip(names, self._arrays)]
+
+class SharedFrameRing:
+    def __init__(self, slot_count: int, slot_size: int, name: str = None):
+        """Fixed number of equally sized frame slots in one shared-memory block.
+
+        Only SlotDescriptors cross process boundaries; the frame data stays in place.
+
+        Args:
+            slot_count (int): Number of slots
+            slot_size (int): Size of a slot in bytes
+            name (str): Attach to an existing block instead of creating one
+        """
+        self.slot_count = slot_count
+        self.slot_size = -(-slot_size // SLOT_ALIGNMENT) * SLOT_ALIGNMENT
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=slot_count * self.slot_size)
+        else:
+            # Child processes share the creator's resource tracker, which unlinks the block
+            # only if the creator dies without calling close().
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+
+    def writer(self, slot: int) -> SlotWriter:
+        return SlotWriter(self, slot)
+
+    def arrays(self, descriptor: SlotDescriptor) -> Dict[str, np.ndarray]:
+        """Return zero-copy views of the arrays described by a SlotDescriptor."""
+        base = descriptor.slot * self.slot_size
+        return {
+            a.name: np.ndarray(a.shape, dtype=np.dtype(a.dtype), buffer=self.shm.buf, offset=base + a.offset)
+            for a in descriptor.arrays
+        }
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            # Views handed out earlier are still referenced; the mapping goes away with the process.
+            pass
+        if self.owner:
+            self.shm.unlink()
+
+class SharedSlotHandle:
+    def __init__(self, slot: int, free_slots):
+        """Reference-counted handle on a slot, compatible with the pooled buffers in SensorData.
+
+        The slot goes back to the producer's free list when the last reference is released.
+
+        Args:
+            slot (int): Slot index
+            free_slots (multiprocessing.Queue): Queue of free slot indices
+        """
+        self.slot = slot
+        self.free_slots = free_slots
+        self._lock = threading.Lock()
+        self._refcount = 1
+
+    def retain(self) -> "SharedSlotHandle":
+        with self._lock:
+            if self._refcount <= 0:
+                raise RuntimeError("Cannot retain a shared slot that was already released")
+            self._refcount += 1
+        return self
+
+    def release(self):
+        with self._lock:
+            if self._refcount <= 0:
+                raise RuntimeError("Shared slot released more often than retained")
+            self._refcount -= 1
+            recycle = self._refcount == 0
+        if recycle:
+            self.free_slots.put(self.slot)
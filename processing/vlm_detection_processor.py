@@ -1,19 +1,167 @@
+import threading
+import time
 from e2e_ad.processing.processing_module import ProcessingModule
 from e2e_ad.data.sensor_data import SensorData
 
 class VmlDetectionProcessor(ProcessingModule):
-    def __init__(self, detector):
+    def __init__(self, detector, asynchronous=False, max_in_flight=1, max_decision_age=None, stereo=False,
+                 change_detector=None):
+        """
+        :param detector: VLM detector with a process(frame, is_rgb) method returning a direction.
+        :param asynchronous: Run the detector on background workers instead of blocking the pipeline.
+                             process() then submits the frame and attaches the most recent finished
+                             decision, so vlm_direction may come from an earlier frame (see vlm_timestamp).
+        :param max_in_flight: Number of background workers, i.e. concurrent VLM requests (asynchronous mode).
+        :param max_decision_age: Drop decisions computed from frames older than this many seconds
+                                 instead of attaching them (asynchronous mode, None keeps them).
+        :param stereo: Send both camera views in one request (detector.process_stereo) instead of
+                       only the left one.
+        :param change_detector: SceneChangeDetector; in asynchronous mode frames that did not change
+                                are not submitted, the latest finished decision is still attached.
+        """
         self.detector = detector
         if not self.detector:
             print("[Warning] Detector module not available.", flush=True)
+        self.asynchronous = asynchronous and bool(self.detector)
+        self.max_decision_age = max_decision_age
+        self.stereo = stereo
+        self.change_detector = change_detector if self.asynchronous else None
+
+        self._condition = threading.Condition()
+        self._pending = None  # (frames, is_rgb, timestamp, sensor_data) waiting for a free worker
+        self._direction = None
+        self._direction_timestamp = None
+        self._workers = []
+        self.running = self.asynchronous
+
+        # Statistics
+        self.submitted_count = 0
+        self.dropped_count = 0      # Pending frames replaced by a newer frame before a worker took them
+        self.unchanged_count = 0    # Frames not submitted because the scene did not change
+        self.discarded_count = 0    # Finished decisions older than the one already published
+        self.completed_count = 0
+        self.in_flight_count = 0
+        self.latency = 0.0
+
+        if self.asynchronous:
+            for _ in range(max(1, max_in_flight)):
+                worker = threading.Thread(target=self._worker_loop, daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _select_inputs(self, sensor_data: SensorData):
+        """Return the frames to send (left, or left and right in stereo mode) and whether they are RGB."""
+        if self.stereo:
+            if sensor_data.left_model_input is not None and sensor_data.right_model_input is not None:
+                return (sensor_data.left_model_input, sensor_data.right_model_input), True
+            return (sensor_data.left_frame, sensor_data.right_frame), False
+        if sensor_data.left_model_input is not None:
+            # Already cropped, resized and converted to RGB by the cropper
+            return (sensor_data.left_model_input,), True
+        return (sensor_data.left_frame,), False
+
+    def _detect(self, frames, is_rgb):
+        if self.stereo:
+            return self.detector.process_stereo(*frames, is_rgb=is_rgb)
+        frame, = frames
+        return self.detector.process(frame, is_rgb=is_rgb) if is_rgb else self.detector.process(frame)
 
     def process(self, sensor_data: SensorData):
         if not self.detector:
             return sensor_data
-        
-        direction = self.detector.process(sensor_data.left_frame)
+
+        if self.asynchronous:
+            return self._process_async(sensor_data)
+
+        frames, is_rgb = self._select_inputs(sensor_data)
+        direction = self._detect(frames, is_rgb)
 
         print(f"[DEBUG] direction: {direction}", flush=True)
 
         sensor_data.vlm_direction = direction
+        sensor_data.vlm_timestamp = sensor_data.timestamp
+        return sensor_data
+
+    def _process_async(self, sensor_data: SensorData):
+        frames, is_rgb = self._select_inputs(sensor_data)
+        timestamp = sensor_data.timestamp if sensor_data.timestamp is not None else time.monotonic()
+        submit = frames[0] is not None
+        if submit and self.change_detector is not None and not self.change_detector.changed(sensor_data):
+            submit = False
+            with self._condition:
+                self.unchanged_count += 1
+        with self._condition:
+            if submit:
+                if self._pending is not None:
+                    self.dropped_count += 1
+                    self._pending[3].release()
+                # Keep the pooled buffers from being recycled until a worker is done with the frames
+                self._pending = (frames, is_rgb, timestamp, sensor_data.retain())
+                self.submitted_count += 1
+                self._condition.notify()
+            direction, direction_timestamp = self._direction, self._direction_timestamp
+
+        if (direction_timestamp is not None and self.max_decision_age is not None
+                and timestamp - direction_timestamp > self.max_decision_age):
+            direction, direction_timestamp = None, None
+        sensor_data.vlm_direction = direction
+        sensor_data.vlm_timestamp = direction_timestamp
         return sensor_data
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                while self.running and self._pending is None:
+                    self._condition.wait()
+                if not self.running:
+                    return
+                frames, is_rgb, timestamp, sensor_data = self._pending
+                self._pending = None
+                self.in_flight_count += 1
+
+            start = time.perf_counter()
+            try:
+                direction = self._detect(frames, is_rgb)
+            except Exception as e:
+                print(f"Error in asynchronous VLM worker: {e}", flush=True)
+                direction = None
+            finally:
+                sensor_data.release()
+            elapsed = time.perf_counter() - start
+
+            with self._condition:
+                self.in_flight_count -= 1
+                if direction is None:
+                    continue
+                self.completed_count += 1
+                self.latency += elapsed
+                if self._direction_timestamp is not None and timestamp < self._direction_timestamp:
+                    # A worker already published a decision for a newer frame
+                    self.discarded_count += 1
+                    continue
+                self._direction = direction
+                self._direction_timestamp = timestamp
+
+    def get_stats(self):
+        with self._condition:
+            return {
+                "submitted": self.submitted_count,
+                "dropped_stale": self.dropped_count,
+                "skipped_unchanged": self.unchanged_count,
+                "discarded_out_of_order": self.discarded_count,
+                "completed": self.completed_count,
+                "in_flight": self.in_flight_count,
+                "mean_latency_ms": self.latency / self.completed_count * 1000 if self.completed_count else None,
+                "time_saved_s": self.unchanged_count * self.latency / self.completed_count if self.completed_count else 0.0,
+            }
+
+    def stop(self):
+        """Stop the background workers (asynchronous mode). Requests already sent still finish."""
+        with self._condition:
+            self.running = False
+            if self._pending is not None:
+                self._pending[3].release()
+            self._pending = None
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=1.0)
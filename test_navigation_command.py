@@ -0,0 +1,55 @@
+from e2e_ad.detection.navigation_command import parse_command, parse_command_prefix
+
+# Complete model answers and the command parse_command must extract
+COMMAND_CASES = [
+    ('{"command": "left"}', "left"),
+    ('  {"command": "Forward"}\n', "forward"),
+    ('"right"', "right"),
+    ("stop", "stop"),
+    ("Turn left.", "left"),
+    ("Go straight ahead", "forward"),
+    ("Don't go forward, turn left", "left"),
+    ("Don’t go forward, turn left", "left"),
+    ("I would not turn right. Forward!", "forward"),
+    ("Turn left, no, turn right", "right"),
+    ("Never stop", None),
+    ("jump", None),
+    ('{"command": "jump"}', None),
+    ('{"direction": "left"}', None),
+    ("", None),
+    (None, None),
+    ('Sure! Here is my answer: {"command": "right"}', "right"),
+    ('Output {"command": "left"} to steer away from the right wall', "left"),
+    ('```json\n{"command": "stop"}\n```', "stop"),
+]
+
+# Streamed answers so far and the command parse_command_prefix may decide on
+PREFIX_CASES = [
+    ('{"command": "le', "left"),
+    ('{"command": "l', "left"),
+    ('{"command": "f', "forward"),
+    ('{"command": "s', "stop"),
+    ('{"command": "r', "right"),
+    ('{"command": "', None),
+    ('{"comm', None),
+    ('{"command": "j', None),
+    ("Turn left", None),  # Free text may still negate or revise the command
+    ("Don't go forward", None),
+]
+
+def main():
+    """Check the command parsing of complete and streamed VLM answers."""
+    failed = 0
+    for function, cases in ((parse_command, COMMAND_CASES), (parse_command_prefix, PREFIX_CASES)):
+        for text, expected in cases:
+            result = function(text)
+            if result != expected:
+                print(f"{function.__name__}({text!r}): {result!r}, expected {expected!r}")
+                failed += 1
+    total = len(COMMAND_CASES) + len(PREFIX_CASES)
+    print(f"{total - failed} of {total} cases passed")
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import time
+import numpy as np
+
+from e2e_ad.detection.vlm_detector2 import VlmDetector2
+from e2e_ad.detection.navigation_command import COMMAND_SCHEMA, parse_command_prefix
+from e2e_ad.network.mock_ollama_server import MockOllamaServer, LatencyProfile, ScriptedResponder, RuleBasedResponder
+from e2e_ad.network.ollama_client import OllamaClient
+
+MODEL = "moondream"
+LOAD_TIME = 0.3
+KEEP_ALIVE = 1.0  # Seconds, short so the test can wait for the mock to unload the model
+
+def check(failures, name, condition, detail=""):
+    print(f"{name}: {'ok' if condition else 'FAILED'}{f' ({detail})' if detail else ''}")
+    if not condition:
+        failures.append(name)
+
+def ask(client, stream):
+    messages = [{"role": "user", "content": "Where do you go?"}]
+    if stream:
+        command, _ = client.chat_until(MODEL, messages, parse_command_prefix, format=COMMAND_SCHEMA)
+        return command
+    return client.chat(MODEL, messages, format=COMMAND_SCHEMA)["message"]["content"]
+
+def check_client(failures):
+    """Warm-up, steady requests, a cold start after keep_alive ran out, and streamed early stops."""
+    latency = LatencyProfile(load=LOAD_TIME, ttft=0.01, per_token=0.02)
+    with MockOllamaServer(responder=ScriptedResponder(["left"]), latency=latency) as server:
+        client = OllamaClient(host=server.url, keep_alive=KEEP_ALIVE)
+        try:
+            client.warm_up(MODEL)
+            stats = client.get_stats()
+            check(failures, "warm-up pays the load time", stats["warm_up_ms"] >= LOAD_TIME * 1000, f"{stats['warm_up_ms']:.0f} ms")
+            check(failures, "warm-up is not a request", stats["cold_requests"] == 0 and stats["steady_requests"] == 0)
+
+            answers = [ask(client, stream=False) for _ in range(3)]
+            stats = client.get_stats()
+            check(failures, "answers after warm-up", answers == ['{"command": "left"}'] * 3, str(answers))
+            check(failures, "requests after warm-up are steady", stats["steady_requests"] == 3 and stats["cold_requests"] == 0)
+            check(failures, "steady requests skip the load", stats["steady_mean_ms"] < LOAD_TIME * 1000, f"{stats['steady_mean_ms']:.0f} ms")
+            full_answer_ms = stats["steady_mean_ms"]
+            check(failures, "mean tokens of the structured answer", stats["mean_tokens"] == 7, str(stats["mean_tokens"]))
+
+            time.sleep(KEEP_ALIVE + 0.3)
+            ask(client, stream=False)
+            stats = client.get_stats()
+            check(failures, "request after keep_alive is cold", stats["cold_requests"] == 1 and server.load_count == 2)
+            check(failures, "cold request pays the load time", stats["cold_mean_ms"] >= LOAD_TIME * 1000, f"{stats['cold_mean_ms']:.0f} ms")
+
+            commands = [ask(client, stream=True) for _ in range(3)]
+            stats = client.get_stats()
+            check(failures, "streamed commands", commands == ["left"] * 3, str(commands))
+            check(failures, "streams stop at the command", stats["streamed_requests"] == 3 and stats["early_stops"] == 3,
+                  f"{stats['early_stops']} of {stats['streamed_requests']}")
+            check(failures, "streams decide before the answer ends",
+                  stats["stream_time_to_decision_ms"] < full_answer_ms,
+                  f"{stats['stream_time_to_decision_ms']:.0f} vs {full_answer_ms:.0f} ms")
+            check(failures, "early stops do not count tokens", stats["mean_tokens"] == 7, str(stats["mean_tokens"]))
+        finally:
+            client.close()
+
+def scene(left, right):
+    """Frame whose left and right halves have the given brightness."""
+    frame = np.empty((120, 160, 3), dtype=np.uint8)
+    frame[:, :80] = left
+    frame[:, 80:] = right
+    return frame
+
+def check_detector(failures, streaming):
+    """VlmDetector2 end to end: image encoding, request, answer parsing and the client statistics."""
+    mode = "streaming" if streaming else "non-streaming"
+    latency = LatencyProfile(load=LOAD_TIME, ttft=0.01, per_token=0.02)
+    with MockOllamaServer(responder=RuleBasedResponder(), latency=latency) as server:
+        client = OllamaClient(host=server.url, keep_alive=KEEP_ALIVE)
+        detector = VlmDetector2(MODEL, client=client, streaming=streaming)
+        try:
+            detector.warm_up()
+            cases = {"forward": scene(120, 120), "left": scene(200, 80), "right": scene(80, 200), "stop": scene(10, 10)}
+            actions = {expected: detector.process(frame) for expected, frame in cases.items()}
+            # Side by side, a bright left camera and a dark right camera make the left half brighter
+            stereo = detector.process_stereo(scene(200, 200), scene(80, 80))
+            stats = detector.get_stats()
+            check(failures, f"{mode} detector commands", all(expected == action for expected, action in actions.items()), str(actions))
+            check(failures, f"{mode} detector stereo command", stereo == "left", stereo)
+            check(failures, f"{mode} detector warm-up", stats["warm_up_ms"] >= LOAD_TIME * 1000 and server.load_count == 1)
+            check(failures, f"{mode} detector requests are steady", stats["steady_requests"] == 5 and stats["cold_requests"] == 0)
+            expected_stops = 5 if streaming else 0
+            check(failures, f"{mode} detector early stops", stats["streamed_requests"] == expected_stops and stats["early_stops"] == expected_stops,
+                  f"{stats['early_stops']} of {stats['streamed_requests']}")
+        finally:
+            detector.cleanup()
+
+def main():
+    """Run OllamaClient and VlmDetector2 against the mock Ollama server and check the answers and latency statistics."""
+    failures = []
+    check_client(failures)
+    for streaming in (False, True):
+        check_detector(failures, streaming)
+    if failures:
+        print(f"{len(failures)} checks failed: {', '.join(failures)}")
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import tempfile
+import threading
+import numpy as np
+
+from e2e_ad.camera.replay_capture import ReplayCapture, write_replay_session
+from e2e_ad.camera.stereo_synchronizer import StereoSynchronizer
+
+def play(right_offset, frame_count=60, fps=30.0, dropped=()):
+    """
+    Play a synthetic stereo session in 'fast' mode through a StereoSynchronizer.
+
+    :param right_offset: Start offset of the right camera in seconds.
+    :param dropped: Indices of right camera frames missing from the recording.
+    :return: (finished, number of emitted pairs)
+    """
+    frames = [np.full((8, 8, 3), i % 256, dtype=np.uint8) for i in range(frame_count)]
+    left_timestamps = [i / fps for i in range(frame_count)]
+    right_indices = [i for i in range(frame_count) if i not in dropped]
+    right_timestamps = [right_offset + i / fps for i in right_indices]
+
+    with tempfile.TemporaryDirectory() as session_dir:
+        write_replay_session(session_dir, [frames, [frames[i] for i in right_indices]],
+                             [left_timestamps, right_timestamps])
+        capture = ReplayCapture(session_dir, mode="fast")
+        synchronizer = StereoSynchronizer.from_capture(capture, tolerance=0.015)
+        stop = threading.Event()
+
+        def consume():
+            while not stop.is_set():
+                pair = synchronizer.wait_for_pair(timeout=0.1)
+                if pair is not None:
+                    for entry in pair:
+                        entry.release()
+
+        consumer = threading.Thread(target=consume, daemon=True)
+        consumer.start()
+        capture.start()
+        finished = capture.wait_finished(timeout=10)
+        stop.set()
+        consumer.join()
+        capture.stop()
+        return finished, synchronizer.pair_count
+
+def main():
+    """
+    Check that 'fast' replay plays sessions to the end when the cameras are not in lockstep.
+
+    A start offset or a dropped frame gives one camera consecutive schedule events, which used
+    to deadlock the per-camera back-pressure.
+    """
+    cases = {
+        "aligned": dict(right_offset=0.0),
+        "5 ms right offset": dict(right_offset=0.005),
+        "50 ms right offset": dict(right_offset=0.05),
+        "2 frames + 3 ms right offset": dict(right_offset=2 / 30.0 + 0.003),
+        "dropped right frames": dict(right_offset=0.002, dropped=(10, 11, 30)),
+    }
+    failed = False
+    for name, kwargs in cases.items():
+        finished, pairs = play(**kwargs)
+        print(f"{name}: {'finished' if finished else 'HUNG'}, {pairs} pairs")
+        failed |= not finished
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
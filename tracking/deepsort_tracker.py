@@ -1,3 +1,7 @@
+import numpy as np
+from e2e_ad.data.detection_batch import DetectionBatch
+from e2e_ad.detection.temporal_filter import iou_matrix
+
 class DeepSortTracker:
     def __init__(self, iou_threshold=0.3, max_missed=3):
         """
@@ -45,7 +49,10 @@ class DeepSortTracker:
                            Other keys (like 'confidence', 'distance', etc.) remain intact.
         :param camera_id: Identifier for the camera (e.g., 'left' or 'right').
         :return: The list of detections with a new 'track_id' key added.
+                 A DetectionBatch gets its track_ids column filled instead, see update_batch.
         """
+        if isinstance(detections, DetectionBatch):
+            return self.update_batch(detections, camera_id)
         # Initialize track list for this camera if not present.
         if camera_id not in self.tracks:
             self.tracks[camera_id] = []
@@ -85,6 +92,104 @@ class DeepSortTracker:
                 assigned.append(True)
                 self.next_track_id += 1
 
+        self._age_tracks(camera_id, active_tracks, assigned)
+        return detections
+
+    def update_batch(self, batch: DetectionBatch, camera_id):
+        """
+        Same association as update for a DetectionBatch, with the IoU against all tracks computed at once.
+
+        Tracks only change when they get assigned, and assigned tracks are skipped afterwards,
+        so the IoU matrix of the tracks at the start of the frame stays valid for the whole frame.
+        """
+        if camera_id not in self.tracks:
+            self.tracks[camera_id] = []
+        active_tracks = self.tracks[camera_id]
+        assigned = [False] * len(active_tracks)
+
+        if active_tracks and len(batch):
+            matches = batch.dispatch(self._scalar_matches, self._matrix_matches, active_tracks, others=len(active_tracks))
+        else:
+            matches = [-1] * len(batch)
+
+        boxes = batch.boxes.tolist()
+        track_ids = []
+        new_tracks = []
+        for index, match in enumerate(matches):
+            if match < 0:
+                new_tracks.append({"track_id": self.next_track_id, "bbox": boxes[index],
+                                   "label": str(batch.labels[index]), "missed": 0})
+                track_ids.append(self.next_track_id)
+                self.next_track_id += 1
+            else:
+                track = active_tracks[match]
+                track["bbox"] = boxes[index]
+                track["missed"] = 0
+                assigned[match] = True
+                track_ids.append(track["track_id"])
+        batch.track_ids[:] = track_ids
+
+        self._age_tracks(camera_id, active_tracks + new_tracks, assigned + [True] * len(new_tracks))
+        return batch
+
+    def _scalar_matches(self, batch: DetectionBatch, active_tracks):
+        """Track index per detection (-1 for none) using the per-pair loop of update, for few detection-track pairs."""
+        assigned = [False] * len(active_tracks)
+        matches = []
+        for bbox, label in zip(batch.boxes.tolist(), batch.labels.tolist()):
+            best_iou = 0.0
+            best_idx = -1
+            for i, track in enumerate(active_tracks):
+                if assigned[i] or label != track["label"]:
+                    continue
+                iou = self.compute_iou(bbox, track["bbox"])
+                if iou > best_iou:
+                    best_iou = iou
+                    best_idx = i
+            if best_idx != -1 and best_iou >= self.iou_threshold:
+                assigned[best_idx] = True
+                matches.append(best_idx)
+            else:
+                matches.append(-1)
+        return matches
+
+    def _matrix_matches(self, batch: DetectionBatch, active_tracks):
+        """Track index per detection (-1 for none) from the IoU matrix of all detection-track pairs."""
+        track_boxes = np.array([track["bbox"] for track in active_tracks], dtype=np.float64)
+        track_labels = np.array([track["label"] for track in active_tracks], dtype=str)
+        # IoU only for pairs with the same label, compared as integer codes
+        _, codes = np.unique(np.concatenate([batch.labels, track_labels]), return_inverse=True)
+        pairs = np.nonzero(codes[:len(batch), None] == codes[None, len(batch):])
+        ious = np.zeros((len(batch), len(active_tracks)))
+        ious[pairs] = iou_matrix(batch.boxes[pairs[0], None], track_boxes[pairs[1], None])[:, 0, 0]
+        ious[ious < self.iou_threshold] = 0.0
+        return self._greedy_matches(ious).tolist()
+
+    @staticmethod
+    def _greedy_matches(ious):
+        """
+        Track index per detection (-1 for none), assigning detections in order to their best free track.
+
+        :param ious: (detections, tracks) IoU, 0 where the label differs or the IoU is below the threshold.
+        """
+        best = ious.argmax(axis=1)
+        matched = ious[np.arange(len(ious)), best] > 0.0
+        matches = np.where(matched, best, -1)
+        if len(np.unique(best[matched])) == np.count_nonzero(matched):
+            # No two detections want the same track, so the order of assignment does not matter
+            return matches
+        free = np.ones(ious.shape[1], dtype=bool)
+        for index in np.flatnonzero(matched).tolist():
+            candidates = np.where(free, ious[index], 0.0)
+            best_idx = int(candidates.argmax())
+            if candidates[best_idx] > 0.0:
+                matches[index] = best_idx
+                free[best_idx] = False
+            else:
+                matches[index] = -1
+        return matches
+
+    def _age_tracks(self, camera_id, active_tracks, assigned):
         # Increase missed count for tracks not updated in this frame.
         new_active_tracks = []
         for i, track in enumerate(active_tracks):
@@ -95,5 +200,3 @@ class DeepSortTracker:
                 if track["missed"] <= self.max_missed:
                     new_active_tracks.append(track)
         self.tracks[camera_id] = new_active_tracks
-
-        return detections
@@ -1,4 +1,6 @@
 import cv2
+import numpy as np
+from e2e_ad.data.detection_batch import DetectionBatch
 
 class FrameVisualizer:
     def __init__(self):
@@ -9,6 +11,21 @@ class FrameVisualizer:
         self.corner_color = (0, 0, 255)
         self.track_color = (0, 255, 255)
 
+    @staticmethod
+    def _detection_rows(detections):
+        """Yield (bbox, label, confidence, distance, track_id) per detection, None for missing values."""
+        if isinstance(detections, DetectionBatch):
+            # Read each column once instead of looking up keys per detection
+            distances = np.where(np.isnan(detections.distances), None, detections.distances)
+            track_ids = np.where(detections.track_ids < 0, None, detections.track_ids)
+            confidences = np.nan_to_num(detections.confidences, nan=0.0)
+            yield from zip(detections.boxes.astype(int).tolist(), detections.labels.tolist(),
+                           confidences.tolist(), distances.tolist(), track_ids.tolist())
+            return
+        for det in detections:
+            yield (det.get("bbox"), det.get("label", "object"), det.get("confidence", 0),
+                   det.get("distance", None), det.get("track_id", None))
+
     def draw_enriched_frame(self, frame, detections, tracking_objects=None):
         """
         Draw bounding boxes, labels, distance info, and tracking IDs on the frame.
@@ -16,19 +33,13 @@ class FrameVisualizer:
         :param frame: The image frame as a NumPy array.
         :param detections: List of detection dictionaries, where each dictionary should
                            have at least the keys "bbox", "label", "confidence", "camera_height",
-                           and optionally "distance" and "track_id".
+                           and optionally "distance" and "track_id", or a DetectionBatch.
         :param tracking_objects: (Optional) List of tracking dictionaries with keys "track_id",
                                  "position", "velocity", etc.
         :return: The annotated frame.
         """
         # Draw detection bounding boxes.
-        for det in detections:
-            bbox = det.get("bbox")
-            label = det.get("label", "object")
-            confidence = det.get("confidence", 0)
-            distance = det.get("distance", None)
-            track_id = det.get("track_id", None)
-            
+        for bbox, label, confidence, distance, track_id in self._detection_rows(detections):
             if distance is not None:
                 display_text = f"{label} {confidence:.2f}%: {distance:.2f}m"
             else:
@@ -53,8 +64,8 @@ class FrameVisualizer:
                 tracking_text = f" ID:{track_id}"
                 cv2.putText(frame, tracking_text, (x1+25, y1+25), self.font, 1, self.track_color, 1)
         
-        # Draw additional tracking objects if provided.
-        if tracking_objects is not None:
+        # Draw additional tracking objects if provided (a DetectionBatch from the tracker has its IDs drawn above).
+        if tracking_objects is not None and not isinstance(tracking_objects, DetectionBatch):
             for track in tracking_objects:
                 # Assume the first two coordinates of the 'position' represent pixel coordinates.
                 pos = track.get("position", [0, 0])